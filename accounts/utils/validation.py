@@ -3,11 +3,11 @@ Utilitários para validação
 """
 
 import secrets
-import requests
 import logging
 from django.contrib.auth import get_user_model
 from eth_account.messages import encode_defunct
 from eth_account import Account
+from core import http_client
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -74,7 +74,7 @@ def get_habbo_user_data(nick_habbo):
         "Accept": "application/json",
     }
 
-    response = requests.get(api_url, headers=headers, timeout=15)
+    response = http_client.get(api_url, headers=headers, timeout=15)
     response.raise_for_status()
 
     return response.json()
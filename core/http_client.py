@@ -0,0 +1,378 @@
+"""
+Cliente HTTP compartilhado para as integrações externas.
+
+Mantém uma ``requests.Session`` por host (com pool de conexões keep-alive),
+aplica a mesma política de timeout/retry/backoff a todas as chamadas e coleta
+métricas de latência e erro por host no processo atual.
+
+Com ``HTTP_STUB_TRANSPORT = True`` (ou dentro de ``use_stub_transport()``) as
+sessões usam um transporte local que só responde às rotas registradas, para
+que testes e ambientes offline nunca acessem a rede.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from random import random
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_USER_AGENT = "nft-portal/1.0"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Métodos que podem ser repetidos sem risco de efeito duplicado
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+# Limite para o Retry-After informado pelo servidor
+MAX_RETRY_AFTER_SECONDS = 30.0
+
+
+def _setting(name: str, default: Any) -> Any:
+    return getattr(settings, name, default)
+
+
+# ---------------------------------------------------------------------------
+# Transporte local (testes/offline)
+# ---------------------------------------------------------------------------
+
+
+class StubTransport(BaseAdapter):
+    """Adapter do requests que responde a partir de rotas registradas.
+
+    Rotas são comparadas por método e prefixo da URL (sem a query string);
+    requisições sem rota correspondente falham com ``ConnectionError``.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._routes: List[Tuple[str, str, Dict[str, Any]]] = []
+        self.calls: List[requests.PreparedRequest] = []
+
+    def add(
+        self,
+        method: str,
+        url: str,
+        *,
+        status: int = 200,
+        json: Any = None,
+        body: bytes | str = b"",
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self._routes.append(
+            (
+                method.upper(),
+                url,
+                {"status": status, "json": json, "body": body, "headers": headers},
+            )
+        )
+
+    def send(self, request, **kwargs):  # type: ignore[override]
+        self.calls.append(request)
+        url = (request.url or "").split("?", 1)[0]
+        # Rotas registradas por último têm prioridade
+        for method, prefix, spec in reversed(self._routes):
+            if method == request.method and url.startswith(prefix):
+                return self._build_response(request, spec)
+        raise requests.exceptions.ConnectionError(
+            f"Nenhuma rota registrada no transporte local para {request.method} {url}",
+            request=request,
+        )
+
+    @staticmethod
+    def _build_response(request, spec: Dict[str, Any]) -> requests.Response:
+        import io
+        import json as jsonlib
+
+        body = spec["body"]
+        headers = dict(spec["headers"] or {})
+        if spec["json"] is not None:
+            body = jsonlib.dumps(spec["json"])
+            headers.setdefault("Content-Type", "application/json")
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+
+        response = requests.Response()
+        response.status_code = spec["status"]
+        response.headers.update(headers)
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Sessões por host
+# ---------------------------------------------------------------------------
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_pid: Optional[int] = None
+_sessions_lock = threading.Lock()
+_active_stub: Optional[StubTransport] = None
+
+
+def _host_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    session.headers["User-Agent"] = DEFAULT_USER_AGENT
+    stub = _active_stub
+    if stub is None and _setting("HTTP_STUB_TRANSPORT", False):
+        stub = StubTransport()
+    if stub is not None:
+        session.mount("http://", stub)
+        session.mount("https://", stub)
+        return session
+    # Retries ficam a cargo de request(); o adapter só mantém o pool
+    adapter = HTTPAdapter(
+        pool_connections=int(_setting("HTTP_POOL_CONNECTIONS", 4)),
+        pool_maxsize=int(_setting("HTTP_POOL_MAXSIZE", 16)),
+        max_retries=0,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session(url: str) -> requests.Session:
+    """Sessão compartilhada (thread-safe) do host da URL."""
+    global _sessions_pid
+    host = _host_of(url)
+    pid = os.getpid()
+    session = _sessions.get(host)
+    if session is not None and _sessions_pid == pid:
+        return session
+    with _sessions_lock:
+        # Workers pré-fork (gunicorn/celery) não devem herdar sockets do pai
+        if _sessions_pid != pid:
+            _sessions.clear()
+            _sessions_pid = pid
+        session = _sessions.get(host)
+        if session is None:
+            session = _build_session()
+            _sessions[host] = session
+        return session
+
+
+def close_sessions() -> None:
+    """Fecha todas as sessões do processo atual."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+@contextmanager
+def use_stub_transport(
+    stub: Optional[StubTransport] = None,
+) -> Iterator[StubTransport]:
+    """Direciona todas as requisições para um transporte local durante o bloco."""
+    global _active_stub
+    previous = _active_stub
+    _active_stub = stub or StubTransport()
+    close_sessions()
+    try:
+        yield _active_stub
+    finally:
+        _active_stub = previous
+        close_sessions()
+
+
+# ---------------------------------------------------------------------------
+# Métricas por host
+# ---------------------------------------------------------------------------
+
+_metrics: Dict[str, Dict[str, Any]] = {}
+_metrics_lock = threading.Lock()
+
+
+def _record(
+    host: str,
+    elapsed: float,
+    *,
+    status: Optional[int] = None,
+    error: bool = False,
+    retry: bool = False,
+) -> None:
+    with _metrics_lock:
+        m = _metrics.setdefault(
+            host,
+            {
+                "requests": 0,
+                "errors": 0,
+                "retries": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "last_status": None,
+            },
+        )
+        elapsed_ms = elapsed * 1000
+        m["requests"] += 1
+        m["total_ms"] += elapsed_ms
+        m["max_ms"] = max(m["max_ms"], elapsed_ms)
+        if error or (status is not None and status >= 500):
+            m["errors"] += 1
+        if retry:
+            m["retries"] += 1
+        if status is not None:
+            m["last_status"] = status
+
+
+def get_http_metrics() -> Dict[str, Dict[str, Any]]:
+    """Snapshot das métricas por host (requisições, erros, retries, latência)."""
+    with _metrics_lock:
+        snapshot = {}
+        for host, m in _metrics.items():
+            avg = m["total_ms"] / m["requests"] if m["requests"] else 0.0
+            snapshot[host] = {
+                "requests": m["requests"],
+                "errors": m["errors"],
+                "retries": m["retries"],
+                "avg_ms": round(avg, 1),
+                "max_ms": round(m["max_ms"], 1),
+                "last_status": m["last_status"],
+            }
+        return snapshot
+
+
+def reset_http_metrics() -> None:
+    with _metrics_lock:
+        _metrics.clear()
+
+
+# ---------------------------------------------------------------------------
+# Requisições
+# ---------------------------------------------------------------------------
+
+
+def request(
+    method: str,
+    url: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    json: Any = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+    retries: Optional[int] = None,
+    backoff_factor: Optional[float] = None,
+    status_forcelist: Tuple[int, ...] = RETRY_STATUSES,
+    limiter: Optional[Any] = None,
+) -> requests.Response:
+    """
+    Executa uma requisição pela sessão do host com a política unificada de retry.
+
+    Args:
+        timeout: Timeout de leitura em segundos (padrão: HTTP_DEFAULT_TIMEOUT); o
+            de conexão é limitado por HTTP_CONNECT_TIMEOUT
+        retries: Total de tentativas (padrão: HTTP_DEFAULT_RETRIES para métodos
+            idempotentes, 1 para os demais)
+        status_forcelist: Status que disparam nova tentativa com backoff
+        limiter: Limitador de taxa opcional (acquire/on_success/on_throttled)
+
+    Returns:
+        A última resposta recebida (o chamador decide o que fazer com o status)
+
+    Raises:
+        requests.RequestException: Quando todas as tentativas falham na rede
+    """
+    method = method.upper()
+    read_timeout = float(
+        timeout if timeout is not None else _setting("HTTP_DEFAULT_TIMEOUT", 15)
+    )
+    connect_timeout = min(float(_setting("HTTP_CONNECT_TIMEOUT", 5)), read_timeout)
+    if retries is None:
+        retries = (
+            int(_setting("HTTP_DEFAULT_RETRIES", 3))
+            if method in IDEMPOTENT_METHODS
+            else 1
+        )
+    retries = max(1, retries)
+    if backoff_factor is None:
+        backoff_factor = float(_setting("HTTP_BACKOFF_FACTOR", 0.5))
+
+    host = _host_of(url)
+    session = get_session(url)
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        last_attempt = attempt + 1 >= retries
+        started = time.monotonic()
+        try:
+            response = session.request(
+                method,
+                url,
+                params=params,
+                json=json,
+                headers=headers,
+                timeout=(connect_timeout, read_timeout),
+            )
+        except requests.RequestException as e:
+            _record(
+                host, time.monotonic() - started, error=True, retry=not last_attempt
+            )
+            if last_attempt:
+                raise
+            sleep_s = backoff_factor * (2**attempt) + (random() * 0.1)
+            logger.warning(
+                "%s %s falhou: %s; nova tentativa em %.2fs (%d/%d)",
+                method,
+                url,
+                e,
+                sleep_s,
+                attempt + 1,
+                retries,
+            )
+            time.sleep(sleep_s)
+            attempt += 1
+            continue
+
+        status = response.status_code
+        retry = status in status_forcelist and not last_attempt
+        _record(host, time.monotonic() - started, status=status, retry=retry)
+        if limiter is not None:
+            if status == 429:
+                limiter.on_throttled()
+            elif status < 400:
+                limiter.on_success()
+        if not retry:
+            return response
+
+        sleep_s = backoff_factor * (2**attempt) + (random() * 0.1)
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            sleep_s = max(sleep_s, min(float(retry_after), MAX_RETRY_AFTER_SECONDS))
+        logger.warning(
+            "HTTP %s de %s; nova tentativa em %.2fs (%d/%d)",
+            status,
+            url,
+            sleep_s,
+            attempt + 1,
+            retries,
+        )
+        response.close()
+        time.sleep(sleep_s)
+        attempt += 1
+
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs: Any) -> requests.Response:
+    return request("POST", url, **kwargs)
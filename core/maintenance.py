@@ -0,0 +1,245 @@
+"""
+Rotina de retenção e manutenção do banco.
+
+Executada semanalmente por ``nft.tasks.cleanup_old_price_updates`` (e sob
+demanda com ``manage.py nft_tasks cleanup``). Cada etapa apaga ou limpa dados
+vencidos em lotes por id, para não segurar locks numa transação longa:
+
+- acessos aos NFTs (brutos, por hora e por dia - ``nft.services_trending``);
+- histórico de preços bruto e por hora (``nft.services_history``);
+- tarefas de validação de nick do Habbo antigas;
+- dados transitórios de pedidos cancelados há muito tempo (client secret do
+  Stripe e resposta bruta dos pagamentos não pagos da AbacatePay);
+- refresh tokens do JWT já expirados (a blacklist cai em cascata).
+
+No fim as tabelas que perderam linhas passam por ``VACUUM (ANALYZE)`` no
+PostgreSQL (``ANALYZE`` no SQLite). O relatório traz linhas afetadas e tempo de
+cada etapa.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict, List
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+DELETE_CHUNK_SIZE = 5000
+
+
+def _setting(name: str, default: Any) -> Any:
+    return getattr(settings, name, default)
+
+
+# ---------------------------------------------------------------------------
+# Operações em lote
+# ---------------------------------------------------------------------------
+
+
+def delete_in_chunks(queryset, chunk_size: int = DELETE_CHUNK_SIZE) -> int:
+    """Remove em lotes por id para não travar a tabela numa transação longa."""
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        count, _ = queryset.model.objects.filter(id__in=ids).delete()
+        deleted += count
+
+
+def update_in_chunks(queryset, chunk_size: int = DELETE_CHUNK_SIZE, **values) -> int:
+    """
+    ``UPDATE`` em lotes por id.
+
+    O filtro do queryset precisa deixar de casar com as linhas atualizadas
+    (ex.: ``campo__isnull=False`` -> ``campo=None``), senão o laço não termina.
+    """
+    updated = 0
+    while True:
+        ids = list(queryset.values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            return updated
+        updated += queryset.model.objects.filter(id__in=ids).update(**values)
+
+
+def vacuum_analyze(tables: List[str]) -> List[str]:
+    """
+    ``VACUUM (ANALYZE)`` no PostgreSQL e ``ANALYZE`` no SQLite.
+
+    O VACUUM não roda dentro de transação; nesse caso só o ANALYZE é feito.
+    """
+    done = []
+    vacuum = connection.vendor == "postgresql" and not connection.in_atomic_block
+    with connection.cursor() as cursor:
+        for table in tables:
+            name = connection.ops.quote_name(table)
+            try:
+                if vacuum:
+                    cursor.execute(f"VACUUM (ANALYZE) {name}")
+                elif connection.vendor in ("postgresql", "sqlite"):
+                    cursor.execute(f"ANALYZE {name}")
+                else:
+                    continue
+                done.append(table)
+            except Exception as e:  # noqa: BLE001 - manutenção não quebra a rotina
+                logger.warning("Falha ao otimizar a tabela %s: %s", table, e)
+    return done
+
+
+# ---------------------------------------------------------------------------
+# Etapas
+# ---------------------------------------------------------------------------
+
+
+def prune_nft_accesses() -> Dict[str, int]:
+    from nft.services_trending import prune_access_data
+
+    return prune_access_data()
+
+
+def prune_price_history() -> Dict[str, int]:
+    from nft.services_history import prune_price_history as prune
+
+    return prune()
+
+
+def prune_validation_tasks() -> Dict[str, int]:
+    from accounts.models import HabboValidationTask
+
+    cutoff = timezone.now() - timedelta(
+        days=int(_setting("HABBO_VALIDATION_RETENTION_DAYS", 7))
+    )
+    return {
+        "deleted": delete_in_chunks(
+            HabboValidationTask.objects.filter(created_at__lt=cutoff)
+        )
+    }
+
+
+def scrub_cancelled_orders() -> Dict[str, int]:
+    """Limpa segredos e payloads de pagamento de pedidos cancelados antigos."""
+    from orders.models import Order
+    from payments.models import AbacatePayPayment
+
+    cutoff = timezone.now() - timedelta(
+        days=int(_setting("CANCELLED_ORDER_SCRUB_DAYS", 30))
+    )
+    # QuerySet.update não mexe no updated_at (auto_now)
+    cancelled = Order.objects.filter(status="cancelled", updated_at__lt=cutoff)
+    secrets = update_in_chunks(
+        cancelled.filter(stripe_client_secret__isnull=False),
+        stripe_client_secret=None,
+    )
+    payloads = update_in_chunks(
+        AbacatePayPayment.objects.filter(order__in=cancelled.values("id"))
+        .exclude(status="PAID")
+        .exclude(raw_response={}),
+        raw_response={},
+    )
+    return {"client_secrets_cleared": secrets, "payment_payloads_cleared": payloads}
+
+
+def prune_jwt_tokens() -> Dict[str, int]:
+    """Remove refresh tokens expirados (equivale ao ``flushexpiredtokens``)."""
+    if not apps.is_installed("rest_framework_simplejwt.token_blacklist"):
+        return {"deleted": 0}
+    from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+    return {
+        "deleted": delete_in_chunks(
+            OutstandingToken.objects.filter(expires_at__lt=timezone.now())
+        )
+    }
+
+
+def _tables() -> Dict[str, List[str]]:
+    """Tabelas tocadas por cada etapa (para o VACUUM)."""
+    tables = {
+        "nft_accesses": [
+            apps.get_model("nft", "NFTItemAccess")._meta.db_table,
+            apps.get_model("nft", "NFTItemAccessHourly")._meta.db_table,
+            apps.get_model("nft", "NFTItemAccessDaily")._meta.db_table,
+        ],
+        "nft_price_history": [
+            apps.get_model("nft", "NFTPricePoint")._meta.db_table,
+            apps.get_model("nft", "NFTPriceHourly")._meta.db_table,
+        ],
+        "validation_tasks": [
+            apps.get_model("accounts", "HabboValidationTask")._meta.db_table
+        ],
+        "cancelled_orders": [
+            apps.get_model("orders", "Order")._meta.db_table,
+            apps.get_model("payments", "AbacatePayPayment")._meta.db_table,
+        ],
+    }
+    if apps.is_installed("rest_framework_simplejwt.token_blacklist"):
+        tables["jwt_tokens"] = [
+            apps.get_model("token_blacklist", "OutstandingToken")._meta.db_table,
+            apps.get_model("token_blacklist", "BlacklistedToken")._meta.db_table,
+        ]
+    return tables
+
+
+STEPS: Dict[str, Callable[[], Dict[str, int]]] = {
+    "nft_accesses": prune_nft_accesses,
+    "nft_price_history": prune_price_history,
+    "validation_tasks": prune_validation_tasks,
+    "cancelled_orders": scrub_cancelled_orders,
+    "jwt_tokens": prune_jwt_tokens,
+}
+
+
+def run_maintenance(vacuum: bool = True) -> Dict[str, Any]:
+    """
+    Executa todas as etapas e devolve o relatório.
+
+    Uma etapa com erro é registrada no relatório sem interromper as demais.
+    """
+    started = time.monotonic()
+    tables = _tables()
+    report: Dict[str, Any] = {"steps": {}, "rows": 0}
+    touched: List[str] = []
+
+    for name, step in STEPS.items():
+        step_started = time.monotonic()
+        try:
+            counts = step()
+            rows = sum(counts.values())
+            report["steps"][name] = {"status": "success", "rows": rows, **counts}
+            if rows:
+                touched.extend(tables.get(name, []))
+            report["rows"] += rows
+        except Exception as e:  # noqa: BLE001 - segue com as próximas etapas
+            logger.error("Erro na etapa de manutenção %s: %s", name, e)
+            report["steps"][name] = {"status": "failed", "error": str(e)}
+        report["steps"][name]["seconds"] = round(time.monotonic() - step_started, 3)
+
+    if vacuum and touched:
+        vacuum_started = time.monotonic()
+        report["vacuumed"] = vacuum_analyze(touched)
+        report["vacuum_seconds"] = round(time.monotonic() - vacuum_started, 3)
+
+    report["seconds"] = round(time.monotonic() - started, 3)
+    report["status"] = (
+        "failed"
+        if any(s["status"] == "failed" for s in report["steps"].values())
+        else "success"
+    )
+    logger.info(
+        "Manutenção concluída: %d linhas em %.1fs (%s)",
+        report["rows"],
+        report["seconds"],
+        ", ".join(
+            f"{name}={step.get('rows', 'erro')}"
+            for name, step in report["steps"].items()
+        ),
+    )
+    return report
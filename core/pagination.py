@@ -0,0 +1,270 @@
+"""
+Paginação padrão da API.
+
+Por padrão mantém o ``PageNumberPagination`` (``?page=``, com ``count``). Quando a
+requisição informa ``?cursor=`` (vazio para a primeira página) a listagem passa
+para paginação por keyset: o cursor guarda os valores dos campos de ordenação
+do último item e a próxima página é ``WHERE (campos) > (valores)``, sem
+``COUNT(*)`` nem ``OFFSET``, então o custo não cresce com a profundidade.
+
+A ordenação usada é a do queryset já filtrado (``OrderingFilter``/``order_by``),
+acrescida da chave primária como desempate, na mesma direção do primeiro campo
+(assim um índice composto ``(campo, id)`` atende às duas direções). NULLs ficam
+por último em ordem crescente e primeiro em ordem decrescente, como no
+PostgreSQL.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import Any, List, Optional, Tuple
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework import exceptions
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# (campo, descendente)
+Ordering = List[Tuple[str, bool]]
+
+
+class KeysetPagination:
+    """Paginação por keyset sobre a ordenação do queryset."""
+
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Cursor inválido."
+    invalid_ordering_message = (
+        "Ordenação não suportada na paginação por cursor: {field}."
+    )
+
+    def __init__(self, page_size: int) -> None:
+        self.page_size = page_size
+        self.next_values: Optional[List[Any]] = None
+        self.previous_values: Optional[List[Any]] = None
+
+    # -- ordenação ---------------------------------------------------------
+
+    def get_ordering(self, queryset) -> Ordering:
+        model = queryset.model
+        raw = list(queryset.query.order_by or model._meta.ordering or [])
+        pk_name = model._meta.pk.name
+        ordering: Ordering = []
+        for item in raw:
+            if not isinstance(item, str) or "__" in item or item.startswith("?"):
+                raise exceptions.ValidationError(
+                    self.invalid_ordering_message.format(field=item)
+                )
+            descending = item.startswith("-")
+            name = item.lstrip("-")
+            if name == "pk":
+                name = pk_name
+            try:
+                model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # Anotações (ex.: relevância da busca) não têm valor estável
+                raise exceptions.ValidationError(
+                    self.invalid_ordering_message.format(field=name)
+                )
+            if name == pk_name:
+                break
+            ordering.append((name, descending))
+        first_descending = ordering[0][1] if ordering else True
+        ordering.append((pk_name, first_descending))
+        return ordering
+
+    @staticmethod
+    def _order_by(ordering: Ordering, reverse: bool) -> List[Any]:
+        expressions = []
+        for name, descending in ordering:
+            if descending != reverse:
+                expressions.append(F(name).desc(nulls_first=True))
+            else:
+                expressions.append(F(name).asc(nulls_last=True))
+        return expressions
+
+    @staticmethod
+    def _after(name: str, value: Any, descending: bool) -> Optional[Q]:
+        """Linhas que vêm depois de ``value`` no campo (None = nenhuma)."""
+        if descending:
+            # NULLs primeiro
+            if value is None:
+                return Q(**{f"{name}__isnull": False})
+            return Q(**{f"{name}__lt": value})
+        # NULLs por último
+        if value is None:
+            return None
+        return Q(**{f"{name}__gt": value}) | Q(**{f"{name}__isnull": True})
+
+    @staticmethod
+    def _equal(name: str, value: Any) -> Q:
+        if value is None:
+            return Q(**{f"{name}__isnull": True})
+        return Q(**{name: value})
+
+    def _seek(self, ordering: Ordering, values: List[Any], reverse: bool) -> Q:
+        """(c1, c2, ...) > (v1, v2, ...) na ordenação informada."""
+        condition = Q(pk__in=[])
+        prefix = Q()
+        for (name, descending), value in zip(ordering, values):
+            after = self._after(name, value, descending != reverse)
+            if after is not None:
+                condition |= prefix & after
+            prefix &= self._equal(name, value)
+        return condition
+
+    # -- cursor ------------------------------------------------------------
+
+    @staticmethod
+    def _signature(ordering: Ordering) -> str:
+        return ",".join(("-" if desc else "") + name for name, desc in ordering)
+
+    def encode_cursor(self, ordering: Ordering, values: List[Any], reverse: bool):
+        payload = {"o": self._signature(ordering), "v": values, "r": int(reverse)}
+        raw = json.dumps(payload, default=str, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    def decode_cursor(self, model, ordering: Ordering, encoded: str):
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            if payload["o"] != self._signature(ordering):
+                raise ValueError("ordenação diferente")
+            raw_values = payload["v"]
+            if len(raw_values) != len(ordering):
+                raise ValueError("quantidade de valores")
+            values = [
+                None if raw is None else model._meta.get_field(name).to_python(raw)
+                for (name, _), raw in zip(ordering, raw_values)
+            ]
+            return values, bool(payload.get("r"))
+        except (
+            ValueError,
+            KeyError,
+            TypeError,
+            binascii.Error,
+            UnicodeDecodeError,
+            ValidationError,
+        ):
+            raise exceptions.NotFound(self.invalid_cursor_message)
+
+    # -- paginação ---------------------------------------------------------
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = ordering = self.get_ordering(queryset)
+        encoded = request.query_params.get(self.cursor_query_param) or ""
+        values, reverse = None, False
+        if encoded:
+            values, reverse = self.decode_cursor(queryset.model, ordering, encoded)
+
+        queryset = queryset.order_by(*self._order_by(ordering, reverse))
+        if values is not None:
+            queryset = queryset.filter(self._seek(ordering, values, reverse))
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Campos adiados por .only() são carregados só nas duas linhas da borda
+        def row_values(obj):
+            return [getattr(obj, name) for name, _ in ordering]
+
+        self.next_values = self.previous_values = None
+        if rows:
+            if has_more or reverse:
+                self.next_values = row_values(rows[-1])
+            if (has_more and reverse) or (values is not None and not reverse):
+                self.previous_values = row_values(rows[0])
+        return rows
+
+    def _link(self, values: Optional[List[Any]], reverse: bool) -> Optional[str]:
+        if values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, "page")
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(self.ordering, values, reverse),
+        )
+
+    def get_next_link(self) -> Optional[str]:
+        return self._link(self.next_values, False)
+
+    def get_previous_link(self) -> Optional[str]:
+        return self._link(self.previous_values, True)
+
+    def get_paginated_response(self, data) -> Response:
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+
+class HybridPagination(PageNumberPagination):
+    """
+    ``PageNumberPagination`` com modo keyset opcional por requisição.
+
+    ``?page=N`` (ou nenhum parâmetro) mantém a resposta atual com ``count``;
+    ``?cursor=`` troca para ``KeysetPagination`` (sem ``count``).
+    """
+
+    cursor_query_param = "cursor"
+    _keyset: Optional[KeysetPagination] = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self._keyset = None
+        if self.cursor_query_param in request.query_params:
+            page_size = self.get_page_size(request)
+            if not page_size:
+                return None
+            self._keyset = KeysetPagination(page_size)
+            return self._keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self._keyset is not None:
+            return self._keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_next_link(self):
+        if self._keyset is not None:
+            return self._keyset.get_next_link()
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self._keyset is not None:
+            return self._keyset.get_previous_link()
+        return super().get_previous_link()
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append(
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": (
+                    "Ativa a paginação por cursor (vazio na primeira página); "
+                    "use os links next/previous da resposta"
+                ),
+                "schema": {"type": "string"},
+            }
+        )
+        return parameters
+
+    def get_html_context(self):
+        if self._keyset is not None:
+            return {
+                "previous_url": self.get_previous_link(),
+                "next_url": self.get_next_link(),
+            }
+        return super().get_html_context()
@@ -121,6 +121,25 @@ else:
     }
 
 
+# Cache compartilhado entre os workers web e Celery (cotações, markups, etc.)
+# Sem REDIS_URL cada processo usa um cache em memória próprio (dev/testes)
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "nft_portal",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -247,7 +266,8 @@ REST_FRAMEWORK = {
         "rest_framework.renderers.JSONRenderer",
         "rest_framework.renderers.BrowsableAPIRenderer",  # Only for development
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    # Páginas numeradas por padrão; ?cursor= ativa a paginação por keyset
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.HybridPagination",
     "PAGE_SIZE": 50,
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_FILTER_BACKENDS": [
@@ -382,6 +402,104 @@ CELERY_TASK_ALWAYS_EAGER = False
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 60 * 30
 
+# Cliente HTTP compartilhado das integrações externas (core.http_client)
+# Conexões keep-alive mantidas por host e timeouts/retries padrão
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_DEFAULT_TIMEOUT = float(os.getenv("HTTP_DEFAULT_TIMEOUT", "15"))
+HTTP_DEFAULT_RETRIES = int(os.getenv("HTTP_DEFAULT_RETRIES", "3"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+# Responde todas as requisições externas com um transporte local (testes/offline)
+HTTP_STUB_TRANSPORT = os.getenv("HTTP_STUB_TRANSPORT", "False").lower() in (
+    "true",
+    "1",
+    "t",
+)
+
+# Rotina de atualização de preços dos NFTs (nft.services_refresh)
+# Requisições por segundo à Immutable, requisições simultâneas e itens por checkpoint
+NFT_PRICE_REFRESH_RATE = float(os.getenv("NFT_PRICE_REFRESH_RATE", "5"))
+NFT_PRICE_REFRESH_CONCURRENCY = int(os.getenv("NFT_PRICE_REFRESH_CONCURRENCY", "8"))
+NFT_PRICE_REFRESH_BATCH_SIZE = int(os.getenv("NFT_PRICE_REFRESH_BATCH_SIZE", "100"))
+# Produtos por consulta de ordens ativas à Immutable (filtro sell_metadata em lista)
+NFT_IMMUTABLE_CODES_PER_REQUEST = int(
+    os.getenv("NFT_IMMUTABLE_CODES_PER_REQUEST", "20")
+)
+# Pausa (e reagenda) a execução antes de atingir CELERY_TASK_TIME_LIMIT
+NFT_PRICE_REFRESH_TIME_BUDGET = int(
+    os.getenv("NFT_PRICE_REFRESH_TIME_BUDGET", str(60 * 25))
+)
+
+# Revalidação de preços na criação de pedidos (nft.services_checkout)
+# Segundos em que o menor preço exibido na página do produto vale para o checkout,
+# prazo total da revalidação de todas as linhas e consultas simultâneas
+NFT_CHECKOUT_PRICE_TTL = int(os.getenv("NFT_CHECKOUT_PRICE_TTL", "60"))
+NFT_CHECKOUT_PRICE_DEADLINE = float(os.getenv("NFT_CHECKOUT_PRICE_DEADLINE", "4"))
+NFT_CHECKOUT_PRICE_CONCURRENCY = int(os.getenv("NFT_CHECKOUT_PRICE_CONCURRENCY", "8"))
+
+# Cotações ETH/USD e USD/BRL (nft.services_rates)
+# Segundos em que a cotação é servida sem revalidar; após isso é servida "stale"
+# enquanto a atualização roda em background, até NFT_FX_STALE_TTL
+NFT_FX_FRESH_TTL = int(os.getenv("NFT_FX_FRESH_TTL", str(60 * 10)))
+NFT_FX_STALE_TTL = int(os.getenv("NFT_FX_STALE_TTL", str(60 * 60 * 24)))
+# Usadas apenas enquanto a tabela ExchangeRate ainda está vazia
+NFT_FX_BOOTSTRAP_ETH_USD = os.getenv("NFT_FX_BOOTSTRAP_ETH_USD", "4713.59")
+NFT_FX_BOOTSTRAP_USD_BRL = os.getenv("NFT_FX_BOOTSTRAP_USD_BRL", "5.42")
+
+# Detalhe de itens legacy (legacy.services.get_item_cached)
+# Segundos em que o item é servido do banco sem consultar a API externa; até
+# LEGACY_ITEM_MAX_STALE o item antigo é servido enquanto o Celery o atualiza
+LEGACY_ITEM_FRESH_TTL = int(os.getenv("LEGACY_ITEM_FRESH_TTL", str(60 * 5)))
+LEGACY_ITEM_MAX_STALE = int(os.getenv("LEGACY_ITEM_MAX_STALE", str(60 * 60 * 24)))
+
+# Registro de acessos aos NFTs (nft.services_access)
+# Máximo de eventos pendentes no buffer (os mais antigos são descartados)
+NFT_ACCESS_BUFFER_MAX = int(os.getenv("NFT_ACCESS_BUFFER_MAX", "100000"))
+# Eventos por bulk_create no flush
+NFT_ACCESS_FLUSH_BATCH = int(os.getenv("NFT_ACCESS_FLUSH_BATCH", "1000"))
+# Acessos do mesmo IP ao mesmo item dentro desta janela (s) contam uma vez
+NFT_ACCESS_DEDUP_WINDOW = int(os.getenv("NFT_ACCESS_DEDUP_WINDOW", str(60 * 30)))
+# Sem Redis: intervalo máximo (s) entre flushes do buffer em memória
+NFT_ACCESS_MEMORY_FLUSH_INTERVAL = int(
+    os.getenv("NFT_ACCESS_MEMORY_FLUSH_INTERVAL", "30")
+)
+
+# Trending por acessos (nft.services_trending)
+# Itens pré-calculados por janela e retenção (dias) de cada nível de dados
+NFT_TRENDING_TOP_K = int(os.getenv("NFT_TRENDING_TOP_K", "50"))
+NFT_ACCESS_RAW_RETENTION_DAYS = int(os.getenv("NFT_ACCESS_RAW_RETENTION_DAYS", "7"))
+NFT_ACCESS_HOURLY_RETENTION_DAYS = int(
+    os.getenv("NFT_ACCESS_HOURLY_RETENTION_DAYS", "30")
+)
+NFT_ACCESS_DAILY_RETENTION_DAYS = int(
+    os.getenv("NFT_ACCESS_DAILY_RETENTION_DAYS", "400")
+)
+
+# Histórico de preços (nft.services_history)
+# Retenção (dias) dos pontos brutos e da consolidação por hora; os totais
+# diários ficam para os gráficos
+NFT_PRICE_RAW_RETENTION_DAYS = int(os.getenv("NFT_PRICE_RAW_RETENTION_DAYS", "30"))
+NFT_PRICE_HOURLY_RETENTION_DAYS = int(
+    os.getenv("NFT_PRICE_HOURLY_RETENTION_DAYS", "90")
+)
+
+# Retenção de dados (core.maintenance, executada por cleanup-old-data)
+# Dias até remover validações de nick do Habbo e até limpar os dados de
+# pagamento transitórios de pedidos cancelados
+HABBO_VALIDATION_RETENTION_DAYS = int(os.getenv("HABBO_VALIDATION_RETENTION_DAYS", "7"))
+CANCELLED_ORDER_SCRUB_DAYS = int(os.getenv("CANCELLED_ORDER_SCRUB_DAYS", "30"))
+
+# Expiração de pedidos não pagos (orders.expiry, executada por expire-unpaid-orders)
+# Prazo de pagamento, pedidos por lote e lotes por execução do sweeper
+ORDER_PAYMENT_TIMEOUT_MINUTES = int(os.getenv("ORDER_PAYMENT_TIMEOUT_MINUTES", "5"))
+ORDER_EXPIRY_BATCH_SIZE = int(os.getenv("ORDER_EXPIRY_BATCH_SIZE", "500"))
+ORDER_EXPIRY_MAX_BATCHES = int(os.getenv("ORDER_EXPIRY_MAX_BATCHES", "20"))
+
+# Cache de respostas da listagem de NFTs (nft.cache.CachedListMixin)
+# Invalidado pelo version stamp do catálogo; o TTL só limita o uso de memória
+NFT_LIST_CACHE_TTL = int(os.getenv("NFT_LIST_CACHE_TTL", str(60 * 5)))
+
 # Configurações de Timezone para Celery
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_ENABLE_UTC = False  # Usar timezone local em vez de UTC
@@ -396,7 +514,7 @@ from celery.schedules import crontab  # noqa: E402
 
 # Configurações de Agendamento (Beat Schedule)
 CELERY_BEAT_SCHEDULE = {
-    # Atualização de preços dos NFTs - Todo dia às 3h da manhã (sequencial, um item a cada 3.5s)
+    # Atualização de preços dos NFTs - Todo dia às 3h da manhã (concorrente, com limite de taxa e checkpoint)
     "update-all-nft-prices-3am": {
         "task": "nft.tasks.update_all_nft_prices_sequential",
         "schedule": crontab(hour=3, minute=0),  # Executa diariamente às 3h00
@@ -404,7 +522,55 @@ CELERY_BEAT_SCHEDULE = {
             "expires": 60 * 60 * 4,  # Expira em 4 horas se não executar
         },
     },
-    # Limpeza semanal de dados antigos
+    # Cotações ETH/USD e USD/BRL - revalida antes de expirar no cache
+    "refresh-fx-rates": {
+        "task": "nft.tasks.refresh_fx_rates",
+        "schedule": 60.0 * 5.0,  # Executa a cada 5 minutos
+        "options": {
+            "expires": 60 * 5,  # Expira em 5 minutos se não executar
+        },
+    },
+    # Grava em lote os acessos aos NFTs enfileirados no Redis
+    "flush-nft-accesses": {
+        "task": "nft.tasks.flush_nft_accesses",
+        "schedule": 15.0,  # Executa a cada 15 segundos
+        "options": {
+            "expires": 60,  # Expira em 1 minuto se não executar
+        },
+    },
+    # Consolida os acessos por hora/dia e recalcula o trending
+    "refresh-nft-trending": {
+        "task": "nft.tasks.refresh_nft_trending",
+        "schedule": 60.0 * 5.0,  # Executa a cada 5 minutos
+        "options": {
+            "expires": 60 * 5,  # Expira em 5 minutos se não executar
+        },
+    },
+    # Consolida o histórico de preços por hora/dia
+    "rollup-nft-price-history": {
+        "task": "nft.tasks.rollup_nft_price_history",
+        "schedule": 60.0 * 15.0,  # Executa a cada 15 minutos
+        "options": {
+            "expires": 60 * 15,  # Expira em 15 minutos se não executar
+        },
+    },
+    # Avança a janela das métricas de 7 dias dos itens sem vendas novas
+    "expire-nft-sales-windows": {
+        "task": "nft.tasks.expire_nft_sales_windows",
+        "schedule": 60.0 * 60.0,  # Executa a cada hora
+        "options": {
+            "expires": 60 * 60,  # Expira em 1 hora se não executar
+        },
+    },
+    # Recalcula os agregados de todas as coleções (itens movidos, exclusões em lote)
+    "refresh-nft-collection-aggregates": {
+        "task": "nft.tasks.refresh_nft_collection_aggregates",
+        "schedule": 60.0 * 60.0 * 24.0,  # Executa uma vez por dia
+        "options": {
+            "expires": 60 * 60 * 6,  # Expira em 6 horas se não executar
+        },
+    },
+    # Limpeza semanal de dados antigos e VACUUM/ANALYZE (core.maintenance)
     "cleanup-old-data": {
         "task": "nft.tasks.cleanup_old_price_updates",
         "schedule": 60.0 * 60.0 * 24.0 * 7.0,  # Executa a cada 7 dias
@@ -412,12 +578,12 @@ CELERY_BEAT_SCHEDULE = {
             "expires": 60 * 60 * 24,  # Expira em 24 horas se não executar
         },
     },
-    # Rotina de segurança: verifica pedidos não pagos a cada 30 minutos
-    "cancel-unpaid-orders-security": {
-        "task": "orders.tasks.cancel_unpaid_orders_security_check",
-        "schedule": 60.0 * 30.0,  # Executa a cada 30 minutos
+    # Cancela em lote os pedidos não pagos no prazo (orders.expiry)
+    "expire-unpaid-orders": {
+        "task": "orders.tasks.expire_unpaid_orders",
+        "schedule": 60.0,  # Executa a cada minuto
         "options": {
-            "expires": 60 * 60,  # Expira em 1 hora se não executar
+            "expires": 60,  # Expira em 1 minuto se não executar
         },
     },
     # Sincronização de novos NFTs da SecureHabbo - Todo dia às 2h da manhã
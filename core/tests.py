@@ -0,0 +1,72 @@
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from . import http_client
+from .http_client import use_stub_transport
+
+API = "https://api.example.com"
+
+
+@mock.patch("core.http_client.time.sleep")
+class HttpClientRetryTests(SimpleTestCase):
+    def setUp(self):
+        http_client.reset_http_metrics()
+
+    def test_get_retries_retryable_status_until_attempts_run_out(self, sleep):
+        with use_stub_transport() as stub:
+            stub.add("GET", f"{API}/orders", status=503)
+            response = http_client.get(f"{API}/orders", retries=3, backoff_factor=0)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(stub.calls), 3)
+        self.assertEqual(sleep.call_count, 2)
+        metrics = http_client.get_http_metrics()[API]
+        self.assertEqual(metrics["requests"], 3)
+        self.assertEqual(metrics["retries"], 2)
+
+    def test_retry_after_header_sets_the_wait(self, sleep):
+        with use_stub_transport() as stub:
+            stub.add("GET", f"{API}/orders", status=429, headers={"Retry-After": "7"})
+            http_client.get(f"{API}/orders", retries=2, backoff_factor=0)
+
+        sleep.assert_called_once_with(7.0)
+
+    def test_retry_after_is_capped(self, sleep):
+        with use_stub_transport() as stub:
+            stub.add(
+                "GET", f"{API}/orders", status=503, headers={"Retry-After": "3600"}
+            )
+            http_client.get(f"{API}/orders", retries=2, backoff_factor=0)
+
+        sleep.assert_called_once_with(http_client.MAX_RETRY_AFTER_SECONDS)
+
+    def test_post_is_not_retried_by_default(self, sleep):
+        with use_stub_transport() as stub:
+            stub.add("POST", f"{API}/orders", status=503)
+            response = http_client.post(f"{API}/orders", json={"id": 1})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(stub.calls), 1)
+        sleep.assert_not_called()
+
+    def test_network_errors_are_retried_then_raised(self, sleep):
+        with use_stub_transport() as stub:
+            # Sem rota registrada o transporte local falha com ConnectionError
+            with self.assertRaises(requests.ConnectionError):
+                http_client.get(f"{API}/orders", retries=3, backoff_factor=0)
+
+        self.assertEqual(len(stub.calls), 3)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(http_client.get_http_metrics()[API]["errors"], 3)
+
+    def test_success_is_returned_without_retry(self, sleep):
+        with use_stub_transport() as stub:
+            stub.add("GET", f"{API}/orders", json={"result": [1, 2]})
+            response = http_client.get(f"{API}/orders", params={"page": 1})
+
+        self.assertEqual(response.json(), {"result": [1, 2]})
+        self.assertEqual(len(stub.calls), 1)
+        self.assertIn("page=1", stub.calls[0].url)
+        sleep.assert_not_called()
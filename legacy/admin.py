@@ -9,6 +9,7 @@ from decimal import Decimal
 import json
 from .models import Item
 from .services import LegacyPriceService
+from .utils import get_price_multiplier
 
 
 class SlugInputNoValidation(forms.TextInput):
@@ -572,10 +573,12 @@ class ItemAdmin(admin.ModelAdmin):
         """Atualiza itens selecionados a partir da API externa"""
         updated = 0
         errors = 0
+        # Mesmo multiplicador para todos os itens e seus históricos
+        multiplier = get_price_multiplier()
 
         for item in queryset:
             try:
-                item_data = LegacyPriceService.get_item_data(item.slug)
+                item_data = LegacyPriceService.get_item_data(item.slug, multiplier)
 
                 item.name = item_data["name"]
                 item.image_url = item_data["image_url"]
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class LegacyConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "legacy"
+
+    def ready(self):
+        # Conectar sinais de invalidação de cache
+        import legacy.signals  # noqa: F401
@@ -1,7 +1,15 @@
+import hashlib
 import requests
 import logging
-from .utils import convert_item_price
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from .models import Item
+from .utils import convert_item_prices, get_price_multiplier
 from django.utils.translation import gettext_lazy as _
+from core import http_client
 
 
 logger = logging.getLogger(__name__)
@@ -15,12 +23,14 @@ class LegacyPriceService:
     IMAGE_BASE_URL = "https://habboapi.site/api/image"
 
     @staticmethod
-    def get_item_data(slug: str) -> dict:
+    def get_item_data(slug: str, multiplier: float | None = None) -> dict:
         """
         Busca informações de um item na API externa.
 
         Args:
             slug: Slug do item
+            multiplier: Multiplicador de preço já resolvido (atualizações em lote);
+                usa o da configuração padrão em cache se omitido
 
         Returns:
             Dicionário com informações do item
@@ -42,7 +52,7 @@ class LegacyPriceService:
         }
 
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = http_client.get(url, headers=headers, timeout=10)
             response.raise_for_status()
             data = response.json()
 
@@ -65,10 +75,14 @@ class LegacyPriceService:
             if not name or last_price_raw is None:
                 raise ValueError(_("Required fields not found in API response"))
 
-            # Converter preços usando a função utilitária e arredondar para 2 casas decimais
-            last_price = round(convert_item_price(float(last_price_raw)), 2)
+            # Multiplicador resolvido uma vez para o preço atual e todo o histórico
+            if multiplier is None:
+                multiplier = get_price_multiplier()
+
+            # Converter preços e arredondar para 2 casas decimais
+            (last_price,) = convert_item_prices([last_price_raw], multiplier)
             average_price = (
-                round(convert_item_price(float(average_price_raw)), 2)
+                convert_item_prices([average_price_raw], multiplier)[0]
                 if average_price_raw
                 else last_price
             )
@@ -82,15 +96,13 @@ class LegacyPriceService:
                     converted_prices = []
                     converted_averages = []
                     if prices_data.get("price"):
-                        converted_prices = [
-                            round(convert_item_price(float(p)), 2)
-                            for p in prices_data["price"]
-                        ]
+                        converted_prices = convert_item_prices(
+                            prices_data["price"], multiplier
+                        )
                     if prices_data.get("average"):
-                        converted_averages = [
-                            round(convert_item_price(float(a)), 2)
-                            for a in prices_data["average"]
-                        ]
+                        converted_averages = convert_item_prices(
+                            prices_data["average"], multiplier
+                        )
 
                     converted_price_history = {
                         **price_history,
@@ -147,3 +159,122 @@ class LegacyPriceService:
         """
         item_data = LegacyPriceService.get_item_data(slug)
         return float(item_data["last_price"])
+
+
+# Lock por slug que garante uma única atualização em andamento por item
+REFRESH_LOCK_TTL = 60
+# Quanto uma requisição sem o item no banco espera pela busca de outra
+MISS_WAIT_SECONDS = 3.0
+MISS_POLL_INTERVAL = 0.2
+
+
+def _refresh_lock_key(slug: str) -> str:
+    # Slugs aceitam qualquer caractere; o hash mantém a chave válida em qualquer backend
+    return "legacy:item:refresh:" + hashlib.sha1(slug.encode("utf-8")).hexdigest()
+
+
+def acquire_item_refresh_lock(slug: str) -> bool:
+    return bool(cache.add(_refresh_lock_key(slug), 1, timeout=REFRESH_LOCK_TTL))
+
+
+def release_item_refresh_lock(slug: str) -> None:
+    cache.delete(_refresh_lock_key(slug))
+
+
+def upsert_item_from_api(slug: str, multiplier: float | None = None):
+    """
+    Busca o item na API externa e cria/atualiza o registro local.
+
+    Returns:
+        Tupla (Item, created)
+
+    Raises:
+        ValueError: Se a API falhar ou a resposta for inválida
+    """
+    item_data = LegacyPriceService.get_item_data(slug, multiplier)
+
+    item, created = Item.objects.update_or_create(
+        slug=item_data["slug"],
+        defaults={
+            "name": item_data["name"],
+            "description": item_data["description"],
+            "last_price": item_data["last_price"],
+            "average_price": item_data["average_price"],
+            "available_offers": item_data["available_offers"],
+            "price_history": item_data["price_history"],
+        },
+    )
+
+    # A imagem só é definida na criação, não na atualização
+    if created:
+        item.image_url = item_data["image_url"]
+        item.save(update_fields=["image_url"])
+
+    return item, created
+
+
+def _schedule_item_refresh(slug: str) -> None:
+    """Agenda a atualização em background se ninguém estiver atualizando o item."""
+    if not acquire_item_refresh_lock(slug):
+        return
+    try:
+        from .tasks import refresh_legacy_item
+
+        # A task herda o lock e o libera ao terminar
+        refresh_legacy_item.delay(slug, lock_held=True)
+    except Exception as e:  # broker indisponível, etc.
+        release_item_refresh_lock(slug)
+        logger.warning(f"Não foi possível agendar a atualização de {slug}: {e}")
+
+
+def get_item_cached(slug: str) -> Item:
+    """
+    Retorna o item servindo do banco sempre que possível (read-through).
+
+    - Atualizado há menos de LEGACY_ITEM_FRESH_TTL: servido direto do banco.
+    - Mais antigo: servido do banco enquanto uma task Celery o atualiza
+      (stale-while-revalidate), até LEGACY_ITEM_MAX_STALE; depois disso a
+      atualização é feita na própria requisição.
+    - Inexistente: buscado na API por uma única requisição por vez; as demais
+      aguardam o resultado em vez de consultar a API também.
+
+    Raises:
+        ValueError: Se o item precisar ser buscado e a API falhar
+    """
+    fresh_ttl = int(getattr(settings, "LEGACY_ITEM_FRESH_TTL", 300))
+    max_stale = int(getattr(settings, "LEGACY_ITEM_MAX_STALE", 60 * 60 * 24))
+
+    item = Item.objects.filter(slug=slug).first()
+    if item is not None:
+        age = timezone.now() - item.updated_at
+        if age < timedelta(seconds=fresh_ttl):
+            return item
+        if age < timedelta(seconds=max_stale):
+            _schedule_item_refresh(slug)
+            return item
+
+    if acquire_item_refresh_lock(slug):
+        try:
+            try:
+                refreshed, _ = upsert_item_from_api(slug)
+            except ValueError:
+                # Upstream indisponível: uma cópia antiga ainda é melhor que erro
+                if item is not None:
+                    logger.warning(f"Servindo cópia antiga de {slug}; API indisponível")
+                    return item
+                raise
+            return refreshed
+        finally:
+            release_item_refresh_lock(slug)
+
+    # Outra requisição já está buscando este item: aguarda o resultado dela
+    if item is not None:
+        return item
+    deadline = time.monotonic() + MISS_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(MISS_POLL_INTERVAL)
+        item = Item.objects.filter(slug=slug).first()
+        if item is not None:
+            return item
+    refreshed, _ = upsert_item_from_api(slug)
+    return refreshed
@@ -0,0 +1,15 @@
+"""
+Sinais do app legacy (invalidação de caches derivados dos modelos)
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import DefaultPricingConfig
+from .utils import invalidate_price_multiplier
+
+
+@receiver(post_save, sender=DefaultPricingConfig)
+@receiver(post_delete, sender=DefaultPricingConfig)
+def default_pricing_config_changed(sender, **kwargs):
+    invalidate_price_multiplier()
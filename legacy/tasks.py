@@ -0,0 +1,39 @@
+"""
+Tasks Celery para o módulo legacy
+"""
+
+import logging
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refresh_legacy_item(slug: str, lock_held: bool = False):
+    """
+    Atualiza um item legacy a partir da API externa em background.
+
+    Disparada por get_item_cached quando o item servido está antigo; nesse caso o
+    lock do item já foi adquirido por quem agendou (``lock_held``).
+
+    Args:
+        slug: Slug do item
+        lock_held: Se o lock de atualização do item já pertence a esta task
+    """
+    from .services import (
+        acquire_item_refresh_lock,
+        release_item_refresh_lock,
+        upsert_item_from_api,
+    )
+
+    if not lock_held and not acquire_item_refresh_lock(slug):
+        return {"status": "skipped", "reason": "Atualização já em andamento"}
+
+    try:
+        item, created = upsert_item_from_api(slug)
+        return {"status": "success", "slug": item.slug, "created": created}
+    except Exception as e:
+        logger.error(f"Erro ao atualizar item legacy {slug}: {e}")
+        return {"status": "failed", "error": str(e)}
+    finally:
+        release_item_refresh_lock(slug)
@@ -1,17 +1,57 @@
+from typing import Iterable, List, Optional
+
+from django.core.cache import cache
+
 from .models import DefaultPricingConfig
 
+# Multiplicador derivado de DefaultPricingConfig compartilhado entre processos;
+# invalidado por legacy.signals sempre que a configuração muda
+PRICE_MULTIPLIER_CACHE_KEY = "legacy:pricing:multiplier"
+PRICE_MULTIPLIER_CACHE_TTL = 60 * 60
+
+
+def get_price_multiplier() -> float:
+    """
+    Retorna o multiplicador de preço (bar_value / 50) da configuração padrão.
+    Se não houver configuração, usa bar_value padrão de 10.
+    """
+    multiplier = cache.get(PRICE_MULTIPLIER_CACHE_KEY)
+    if multiplier is None:
+        default_pricing_config = DefaultPricingConfig.objects.first()
+
+        if default_pricing_config is None:
+            bar_value = 10.0
+        else:
+            bar_value = float(default_pricing_config.bar_value)
+        multiplier = bar_value / 50
+        cache.set(PRICE_MULTIPLIER_CACHE_KEY, multiplier, PRICE_MULTIPLIER_CACHE_TTL)
+    return multiplier
+
+
+def invalidate_price_multiplier() -> None:
+    """Descarta o multiplicador em cache; a próxima conversão o recalcula."""
+    cache.delete(PRICE_MULTIPLIER_CACHE_KEY)
 
-def convert_item_price(value: float) -> float:
+
+def convert_item_price(value: float, multiplier: Optional[float] = None) -> float:
     """
     Converte o preço do item usando a configuração de pricing padrão.
-    Se não houver configuração, usa bar_value padrão de 50 (multiplicador 1.0).
+    Se não houver configuração, usa bar_value padrão de 10.
     """
+    if multiplier is None:
+        multiplier = get_price_multiplier()
+    return value * multiplier
 
-    default_pricing_config = DefaultPricingConfig.objects.first()
 
-    if default_pricing_config is None:
-        bar_value = 10.0
-    else:
-        bar_value = float(default_pricing_config.bar_value)
-    price = value * (bar_value / 50)
-    return price
+def convert_item_prices(
+    values: Iterable[float],
+    multiplier: Optional[float] = None,
+    ndigits: int = 2,
+) -> List[float]:
+    """
+    Converte uma lista de preços (ex.: histórico) de uma vez, com o multiplicador
+    resolvido uma única vez e arredondamento para ``ndigits`` casas decimais.
+    """
+    if multiplier is None:
+        multiplier = get_price_multiplier()
+    return [round(float(value) * multiplier, ndigits) for value in values]
@@ -8,7 +8,7 @@ from .serializers import (
     LegacyItemCreateSerializer,
     LegacyItemListSerializer,
 )
-from .services import LegacyPriceService
+from .services import get_item_cached, upsert_item_from_api
 from .models import Item
 from .docs import (
     legacy_item_detail_schema,
@@ -28,28 +28,9 @@ class LegacyItemDetail(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            # Buscar dados completos da API externa
-            item_data = LegacyPriceService.get_item_data(
-                serializer.validated_data["slug"]
-            )
-
-            # Atualizar item no banco se existir, ou criar se não existir
-            item, created = Item.objects.update_or_create(
-                slug=item_data["slug"],
-                defaults={
-                    "name": item_data["name"],
-                    "description": item_data["description"],
-                    "last_price": item_data["last_price"],
-                    "average_price": item_data["average_price"],
-                    "available_offers": item_data["available_offers"],
-                    "price_history": item_data["price_history"],
-                },
-            )
-
-            # A imagem só é definida na criação, não na atualização
-            if created:
-                item.image_url = item_data["image_url"]
-                item.save(update_fields=["image_url"])
+            # Servido do banco; a API externa só é consultada quando o item não
+            # existe ou está antigo (ver get_item_cached)
+            item = get_item_cached(serializer.validated_data["slug"])
 
             # Serializar resposta com todos os dados do item
             response_serializer = LegacyItemDetailsSerializer(item)
@@ -84,29 +65,11 @@ class LegacyItemCreate(APIView):
             return Response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            # Buscar dados da API externa
-            item_data = LegacyPriceService.get_item_data(
+            # Buscar dados da API externa e criar/atualizar o item
+            item, created = upsert_item_from_api(
                 input_serializer.validated_data["slug"]
             )
 
-            # Criar/atualizar item usando o serializer
-            item, created = Item.objects.update_or_create(
-                slug=item_data["slug"],
-                defaults={
-                    "name": item_data["name"],
-                    "description": item_data["description"],
-                    "last_price": item_data["last_price"],
-                    "average_price": item_data["average_price"],
-                    "available_offers": item_data["available_offers"],
-                    "price_history": item_data["price_history"],
-                },
-            )
-
-            # A imagem só é definida na criação, não na atualização
-            if created:
-                item.image_url = item_data["image_url"]
-                item.save(update_fields=["image_url"])
-
             # Serializar resposta
             response_serializer = LegacyItemCreateSerializer(item)
             status_code = status.HTTP_201_CREATED if created else status.HTTP_200_OK
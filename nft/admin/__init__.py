@@ -3,12 +3,24 @@ Admin configuration for NFT app
 """
 
 # Importar todos os admins para garantir que sejam registrados
-from .items import NFTItemAdmin, PricingConfigAdmin, NFTItemAccessAdmin  # noqa: F401
+from .items import (  # noqa: F401
+    NFTItemAdmin,
+    PricingConfigAdmin,
+    NFTItemAccessAdmin,
+    NFTItemAccessDailyAdmin,
+    NFTPriceDailyAdmin,
+    PriceRefreshRunAdmin,
+    ExchangeRateAdmin,
+)
 from .collections import NftCollectionAdmin  # noqa: F401
 
 __all__ = [
     "NFTItemAdmin",
     "PricingConfigAdmin",
     "NFTItemAccessAdmin",
+    "NFTItemAccessDailyAdmin",
+    "NFTPriceDailyAdmin",
+    "PriceRefreshRunAdmin",
+    "ExchangeRateAdmin",
     "NftCollectionAdmin",
 ]
@@ -6,14 +6,22 @@ from django.utils.dateparse import parse_datetime
 from django.http import JsonResponse, HttpResponse
 from decimal import Decimal
 import json
-import requests
 import hashlib
 from PIL import Image, ImageDraw, ImageFont
 import io
 import os
 from django.conf import settings
+from core import http_client
 
-from ..models import NFTItem, PricingConfig, NFTItemAccess
+from ..models import (
+    NFTItem,
+    PricingConfig,
+    NFTItemAccess,
+    NFTItemAccessDaily,
+    NFTPriceDaily,
+    PriceRefreshRun,
+    ExchangeRate,
+)
 
 
 @admin.register(NFTItem)
@@ -55,6 +63,27 @@ class NFTItemAdmin(admin.ModelAdmin):
     )
     readonly_fields = ("created_at", "updated_at")
     change_list_template = "admin/nft/nftitem/change_list.html"
+    actions = ["refresh_prices_from_immutable"]
+
+    def refresh_prices_from_immutable(self, request, queryset):
+        """Atualiza os preços dos itens selecionados com consultas em paralelo"""
+        from ..services_refresh import refresh_prices_for
+
+        codes = list(
+            queryset.exclude(product_code__isnull=True)
+            .exclude(product_code__exact="")
+            .values_list("product_code", flat=True)
+        )
+        result = refresh_prices_for(codes)
+        level = messages.WARNING if result["failed_count"] else messages.SUCCESS
+        self.message_user(
+            request,
+            f"{result['updated_count']} item(ns) atualizado(s), "
+            f"{result['failed_count']} falha(s).",
+            level=level,
+        )
+
+    refresh_prices_from_immutable.short_description = "Atualizar preços pela Immutable"
 
     def get_urls(self):
         urls = super().get_urls()
@@ -354,17 +383,13 @@ class NFTItemAdmin(admin.ModelAdmin):
 
     def get_nfts_api(self, request):
         """API para buscar NFTs para seleção"""
-        from django.db import models
+        from ..search import search_queryset
 
         search = request.GET.get("search", "")
-        nfts = NFTItem.objects.all()
+        nfts = NFTItem.objects.select_related("collection")
 
         if search:
-            nfts = nfts.filter(
-                models.Q(name__icontains=search)
-                | models.Q(name_pt_br__icontains=search)
-                | models.Q(product_code__icontains=search)
-            )
+            nfts = search_queryset(nfts, search)
 
         nfts = nfts[:50]  # Limitar resultados
 
@@ -475,7 +500,8 @@ class NFTItemAdmin(admin.ModelAdmin):
                             request,
                             f"Sincronização concluída! "
                             f"{result['new_items']} novos itens cadastrados, "
-                            f"{result['updated_items']} itens atualizados.",
+                            f"{result['updated_items']} itens atualizados, "
+                            f"{result.get('unchanged_items', 0)} sem alteração.",
                         )
                         if result.get("errors"):
                             messages.warning(
@@ -783,7 +809,7 @@ class NFTItemAdmin(admin.ModelAdmin):
             if not image_url:
                 return None
 
-            response = requests.get(image_url, timeout=10)
+            response = http_client.get(image_url, timeout=10)
             response.raise_for_status()
 
             image = Image.open(io.BytesIO(response.content))
@@ -820,3 +846,79 @@ class NFTItemAccessAdmin(admin.ModelAdmin):
     list_display = ("item", "accessed_at")
     list_filter = ("accessed_at",)
     search_fields = ("item__name", "item__product_code")
+
+
+@admin.register(NFTItemAccessDaily)
+class NFTItemAccessDailyAdmin(admin.ModelAdmin):
+    list_display = ("item", "day", "access_count", "last_access_at")
+    list_filter = ("day",)
+    search_fields = ("item__name", "item__product_code")
+    list_select_related = ("item",)
+    date_hierarchy = "day"
+    readonly_fields = ("item", "day", "access_count", "last_access_at")
+
+
+@admin.register(NFTPriceDaily)
+class NFTPriceDailyAdmin(admin.ModelAdmin):
+    list_display = (
+        "item",
+        "day",
+        "open_brl",
+        "high_brl",
+        "low_brl",
+        "close_brl",
+        "sales_count",
+        "sales_volume_brl",
+    )
+    list_filter = ("day",)
+    search_fields = ("item__name", "item__product_code")
+    list_select_related = ("item",)
+    date_hierarchy = "day"
+    readonly_fields = (
+        "item",
+        "day",
+        "open_brl",
+        "high_brl",
+        "low_brl",
+        "close_brl",
+        "sales_count",
+        "sales_volume_brl",
+        "last_sale_brl",
+    )
+
+
+@admin.register(PriceRefreshRun)
+class PriceRefreshRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "status",
+        "processed_count",
+        "total_items",
+        "updated_count",
+        "failed_count",
+        "last_product_code",
+        "started_at",
+        "finished_at",
+    )
+    list_filter = ("status",)
+    readonly_fields = (
+        "status",
+        "last_product_code",
+        "total_items",
+        "processed_count",
+        "updated_count",
+        "failed_count",
+        "error",
+        "started_at",
+        "finished_at",
+        "updated_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ("pair", "rate", "source", "fetched_at")
+    readonly_fields = ("source", "fetched_at")
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class NftConfig(AppConfig):
@@ -9,3 +10,15 @@ class NftConfig(AppConfig):
     def ready(self):
         # Importar admin para garantir que os registros sejam feitos
         import nft.admin  # noqa: F401
+
+        # Conectar sinais de invalidação de cache
+        import nft.signals  # noqa: F401
+
+        # Triggers FTS (SQLite) descartados por rebuilds de tabela nas migrações
+        post_migrate.connect(_repair_search_indexes, sender=self)
+
+
+def _repair_search_indexes(sender, using="default", **kwargs):
+    from .search import repair_search_indexes
+
+    repair_search_indexes(using)
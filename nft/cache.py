@@ -0,0 +1,192 @@
+"""
+Cache de respostas da listagem pública de NFTs.
+
+A listagem (``NFTItemListAPI``) é cacheada por combinação normalizada de query
+params. Todas as chaves incluem o "version stamp" do catálogo, que é trocado
+sempre que ``NFTItem``, ``NftCollection`` ou ``PricingConfig`` mudam (sinais e
+gravações em lote), invalidando todas as páginas de uma vez sem precisar
+enumerá-las.
+
+As respostas levam ``ETag`` e ``Last-Modified`` derivados da versão, de modo que
+navegadores e o nginx podem revalidar com ``If-None-Match``/``If-Modified-Since``
+e receber 304 sem que a consulta seja refeita.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+
+CATALOG_VERSION_KEY = "nft:catalog:version"
+LIST_CACHE_PREFIX = "nft:list"
+STATS_KEY_PREFIX = "nft:list:stats"
+STATS_COUNTERS = ("hit", "miss", "not_modified")
+# Parâmetros que não alteram o conteúdo da resposta
+IGNORED_PARAMS = ("format", "_")
+
+
+def _list_cache_ttl() -> int:
+    return int(getattr(settings, "NFT_LIST_CACHE_TTL", 300))
+
+
+# ---------------------------------------------------------------------------
+# Version stamp do catálogo
+# ---------------------------------------------------------------------------
+
+
+def _new_version() -> Dict[str, Any]:
+    # Last-Modified tem resolução de segundos
+    return {"version": uuid.uuid4().hex[:12], "modified": int(time.time())}
+
+
+def get_catalog_version() -> Dict[str, Any]:
+    """Versão atual do catálogo (``{"version", "modified"}``)."""
+    stamp = cache.get(CATALOG_VERSION_KEY)
+    if stamp is None:
+        # Cache vazio/expurgado: inicia uma versão nova (add evita corrida)
+        cache.add(CATALOG_VERSION_KEY, _new_version(), timeout=None)
+        stamp = cache.get(CATALOG_VERSION_KEY) or _new_version()
+    return stamp
+
+
+def bump_catalog_version() -> None:
+    """Invalida todas as respostas cacheadas da listagem."""
+    cache.set(CATALOG_VERSION_KEY, _new_version(), timeout=None)
+
+
+# ---------------------------------------------------------------------------
+# Métricas
+# ---------------------------------------------------------------------------
+
+
+def _count(counter: str) -> None:
+    key = f"{STATS_KEY_PREFIX}:{counter}"
+    try:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+    except ValueError:
+        # Chave expurgada entre o add e o incr
+        cache.set(key, 1, timeout=None)
+
+
+def get_list_cache_stats() -> Dict[str, Any]:
+    """Contadores de hit/miss/304 da listagem e a taxa de acerto."""
+    values = cache.get_many([f"{STATS_KEY_PREFIX}:{c}" for c in STATS_COUNTERS])
+    stats = {c: int(values.get(f"{STATS_KEY_PREFIX}:{c}", 0)) for c in STATS_COUNTERS}
+    served = stats["hit"] + stats["not_modified"]
+    total = served + stats["miss"]
+    stats["hit_ratio"] = round(served / total, 3) if total else 0.0
+    return stats
+
+
+def reset_list_cache_stats() -> None:
+    cache.delete_many([f"{STATS_KEY_PREFIX}:{c}" for c in STATS_COUNTERS])
+
+
+# ---------------------------------------------------------------------------
+# Mixin das views
+# ---------------------------------------------------------------------------
+
+
+def normalized_query(request) -> str:
+    """Query params ordenados, sem vazios e sem parâmetros irrelevantes."""
+    pairs = []
+    for key in sorted(request.query_params.keys()):
+        if key in IGNORED_PARAMS:
+            continue
+        values = sorted(
+            v.strip() for v in request.query_params.getlist(key) if v.strip()
+        )
+        pairs.extend((key, v) for v in values)
+    return "&".join(f"{k}={v}" for k, v in pairs)
+
+
+class CachedListMixin:
+    """
+    Cacheia ``list()`` de uma ListAPIView por versão do catálogo + query params.
+
+    Só requisições GET/HEAD são cacheadas; a resposta é a mesma para qualquer
+    usuário, então não use em views cujo conteúdo dependa de quem está logado.
+    """
+
+    list_cache_namespace: Optional[str] = None
+
+    def _list_cache_parts(self, request):
+        stamp = get_catalog_version()
+        namespace = self.list_cache_namespace or self.__class__.__name__
+        fingerprint = hashlib.sha1(
+            "|".join(
+                [
+                    stamp["version"],
+                    namespace,
+                    request.get_host(),
+                    request.path,
+                    normalized_query(request),
+                ]
+            ).encode("utf-8")
+        ).hexdigest()
+        etag = quote_etag(fingerprint[:20])
+        return stamp, f"{LIST_CACHE_PREFIX}:{namespace}:{fingerprint}", f"W/{etag}"
+
+    @staticmethod
+    def _not_modified(request, etag: str, modified: int) -> bool:
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            # Comparação fraca: ignora o prefixo W/
+            candidates = {
+                t.strip().removeprefix("W/") for t in if_none_match.split(",")
+            }
+            return "*" in candidates or etag.removeprefix("W/") in candidates
+        if_modified_since = parse_http_date_safe(
+            request.headers.get("If-Modified-Since") or ""
+        )
+        return if_modified_since is not None and modified <= if_modified_since
+
+    @staticmethod
+    def _set_cache_headers(response, etag: str, modified: int, state: str) -> None:
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(modified)
+        response["Cache-Control"] = "public, max-age=0, must-revalidate"
+        response["X-Cache"] = state
+
+    def list(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().list(request, *args, **kwargs)
+
+        stamp, key, etag = self._list_cache_parts(request)
+        modified = int(stamp["modified"])
+
+        if self._not_modified(request, etag, modified):
+            _count("not_modified")
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            self._set_cache_headers(response, etag, modified, "REVALIDATED")
+            return response
+
+        data = cache.get(key)
+        if data is not None:
+            _count("hit")
+            response = Response(data)
+            self._set_cache_headers(response, etag, modified, "HIT")
+            return response
+
+        _count("miss")
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            try:
+                cache.set(key, response.data, timeout=_list_cache_ttl())
+            except Exception as e:  # noqa: BLE001 - cache indisponível não quebra a API
+                logger.warning("Falha ao gravar listagem no cache: %s", e)
+            self._set_cache_headers(response, etag, modified, "MISS")
+        return response
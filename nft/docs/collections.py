@@ -25,6 +25,8 @@ collection_list_schema = extend_schema(
     **Exemplos de uso:**
     - `/collections/` - Lista todas as coleções
     - `/collections/?q=bored` - Busca coleções com "bored" no nome, descrição, endereço ou slug
+    - `/collections/?page=1` - Resposta paginada (`count`, `next`, `previous`, `results`);
+      `cursor` ativa a paginação por cursor
     """,
     parameters=[
         OpenApiParameter(
@@ -46,6 +48,23 @@ collection_list_schema = extend_schema(
                 ),
             ],
         ),
+        OpenApiParameter(
+            name="page",
+            type=OpenApiTypes.INT,
+            location=OpenApiParameter.QUERY,
+            description="Ativa a resposta paginada e seleciona a página",
+            required=False,
+        ),
+        OpenApiParameter(
+            name="cursor",
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+            description=(
+                "Ativa a paginação por cursor (vazio na primeira página); "
+                "use os links next/previous da resposta"
+            ),
+            required=False,
+        ),
     ],
     responses={
         200: OpenApiResponse(
@@ -340,6 +359,9 @@ collection_stats_schema = extend_schema(
     - Total de proprietários únicos
     - Preço médio de floor price
     - Volume total negociado
+    - Itens do catálogo e volume de 7 dias (BRL) somados das coleções
+
+    Os valores vêm de um snapshot em cache, renovado quando o catálogo muda.
 
     **Casos de uso:**
     - Dashboard administrativo
@@ -358,6 +380,8 @@ collection_stats_schema = extend_schema(
                         "total_owners": 450000,
                         "average_floor_price": 1.85,
                         "total_volume": 15000000.50,
+                        "total_catalog_items": 3200,
+                        "seven_day_volume_brl": 125000.00,
                     },
                 )
             ],
@@ -5,7 +5,11 @@ from drf_spectacular.utils import (
     OpenApiParameter,
 )
 
-from ..serializers.items import FetchByProductCodeSerializer, NFTItemSerializer
+from ..serializers.items import (
+    FetchByProductCodeSerializer,
+    NFTItemListSerializer,
+    NFTItemSerializer,
+)
 
 
 nft_item_upsert_schema = extend_schema(
@@ -82,8 +86,12 @@ nft_item_list_schema = extend_schema(
         "- collection_id (number)\n"
         "- collection_slug (string)\n"
         "Busca: "
-        "use o parâmetro 'search' para procurar por nome ou product_code.\n"
-        "Ordenação: use 'ordering', ex.: ordering=last_price_brl,-updated_at."
+        "use o parâmetro 'search' para procurar por nome ou product_code "
+        "(por prefixo, sem diferenciar acentos; sem 'ordering' o resultado vem "
+        "ordenado por relevância).\n"
+        "Ordenação: use 'ordering', ex.: ordering=last_price_brl,-updated_at.\n"
+        "Campos: use 'fields' para receber só parte dos campos, "
+        "ex.: fields=id,name,image_url,last_price_brl."
     ),
     parameters=[
         OpenApiParameter(name="rarity", type=str, location=OpenApiParameter.QUERY),
@@ -115,8 +123,24 @@ nft_item_list_schema = extend_schema(
         OpenApiParameter(name="ordering", type=str, location=OpenApiParameter.QUERY),
         OpenApiParameter(name="page", type=int, location=OpenApiParameter.QUERY),
         OpenApiParameter(name="page_size", type=int, location=OpenApiParameter.QUERY),
+        OpenApiParameter(
+            name="cursor",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description=(
+                "Paginação por cursor (vazio na primeira página); a resposta traz "
+                "next/previous sem count. Não combina com a ordenação por relevância "
+                "da busca: informe 'ordering'."
+            ),
+        ),
+        OpenApiParameter(
+            name="fields",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="Lista de campos separados por vírgula (sparse fieldset)",
+        ),
     ],
-    responses={200: OpenApiResponse(response=NFTItemSerializer)},
+    responses={200: OpenApiResponse(response=NFTItemListSerializer)},
     examples=[
         OpenApiExample(
             "Exemplo de listagem",
@@ -141,3 +165,35 @@ nft_item_list_schema = extend_schema(
         )
     ],
 )
+
+
+nft_item_autocomplete_schema = extend_schema(
+    operation_id="nft_items_autocomplete",
+    tags=["nft"],
+    summary="Sugestões de NFTs para a busca",
+    description=(
+        "Retorna os itens mais relevantes cujo nome (inglês ou pt-BR) ou "
+        "product_code começa com os termos digitados, sem diferenciar acentos.\n\n"
+        "Exige ao menos 2 caracteres em 'q'."
+    ),
+    parameters=[
+        OpenApiParameter(
+            name="q", type=str, location=OpenApiParameter.QUERY, required=True
+        ),
+        OpenApiParameter(
+            name="limit",
+            type=int,
+            location=OpenApiParameter.QUERY,
+            description="Máximo de sugestões (padrão 8, máximo 20)",
+        ),
+    ],
+    responses={
+        200: OpenApiResponse(
+            response={
+                "type": "object",
+                "properties": {"results": {"type": "array"}},
+            },
+            description="Sugestões ordenadas por relevância",
+        )
+    },
+)
@@ -1,8 +1,10 @@
 import django_filters as filters
 from decimal import Decimal
+from rest_framework import filters as drf_filters
 
 from .models import NFTItem
 from .models import PricingConfig
+from .search import is_indexed, search_queryset
 
 
 class NFTItemFilter(filters.FilterSet):
@@ -99,3 +101,24 @@ class NFTItemFilter(filters.FilterSet):
         return queryset.filter(
             markup_percent__isnull=False, markup_percent__lt=global_markup
         )
+
+
+class IndexedSearchFilter(drf_filters.SearchFilter):
+    """
+    SearchFilter que usa o índice textual (nft.search) quando os
+    ``search_fields`` da view estão cobertos por ele.
+
+    O resultado vem ordenado por relevância, a menos que a requisição informe
+    ``ordering`` (o OrderingFilter seguinte sobrescreve a ordem). Views com
+    prefixos de lookup (``^``, ``=``, ``@``) ou campos fora do índice usam o
+    comportamento padrão do DRF.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        terms = self.get_search_terms(request)
+        if not search_fields or not terms:
+            return queryset
+        if not is_indexed(queryset.model, search_fields):
+            return super().filter_queryset(request, queryset, view)
+        return search_queryset(queryset, " ".join(terms), fields=search_fields)
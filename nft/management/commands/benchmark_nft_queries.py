@@ -0,0 +1,177 @@
+"""
+Comando de management que mede as consultas mais comuns da listagem de NFTs
+e mostra, pelo EXPLAIN, quais índices o banco usa e se ainda há sort completo.
+"""
+
+import re
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+
+from nft.filters import NFTItemFilter
+from nft.models import NFTItem
+
+PAGE_SIZE = 50
+
+# PostgreSQL: "Index Scan using x", "Index Only Scan using x", "Bitmap Index Scan on x"
+# SQLite: "USING INDEX x", "USING COVERING INDEX x"
+INDEX_RE = re.compile(
+    r"(?:Index(?: Only)? Scan(?: Backward)? using|Bitmap Index Scan on|"
+    r"USING (?:COVERING )?INDEX)\s+(\w+)"
+)
+# "Incremental Sort" aproveita a ordem do índice e não é um sort completo
+FULL_SORT_RE = re.compile(
+    r"(?<!Incremental )\bSort\b(?! Key)|USE TEMP B-TREE FOR ORDER BY"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Executa as consultas típicas da listagem de NFTs e mostra tempo, "
+        "índices usados e sorts completos (EXPLAIN)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Execuções por consulta (mediana reportada)",
+        )
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Usa EXPLAIN ANALYZE (somente PostgreSQL)",
+        )
+        parser.add_argument(
+            "--show-plans",
+            action="store_true",
+            help="Imprime o plano completo de cada consulta",
+        )
+        parser.add_argument(
+            "--fail-on-sort",
+            action="store_true",
+            help="Termina com erro se alguma consulta fizer sort completo",
+        )
+
+    def handle(self, *args, **options):
+        scenarios = self.build_scenarios()
+        if not scenarios:
+            self.stdout.write(self.style.WARNING("Nenhum NFT cadastrado para medir."))
+            return
+
+        self.stdout.write(
+            f"Banco: {connection.vendor} - {NFTItem.objects.count()} itens, "
+            f"páginas de {PAGE_SIZE}, {options['repeat']} execuções por consulta\n"
+        )
+        sorted_queries = []
+        for label, params, ordering in scenarios:
+            qs = NFTItemFilter(params, queryset=NFTItem.objects.all()).qs
+            # Sem ordering: busca pontual, a ordem padrão do modelo não importa
+            qs = qs.order_by(ordering) if ordering else qs.order_by()
+            page = qs[:PAGE_SIZE]
+
+            timings = []
+            for _ in range(max(1, options["repeat"])):
+                started = time.perf_counter()
+                list(page)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            explain_options = {}
+            if options["analyze"] and connection.vendor == "postgresql":
+                explain_options = {"analyze": True, "buffers": True}
+            plan = page.explain(**explain_options)
+            indexes = sorted(set(INDEX_RE.findall(plan)))
+            full_sort = bool(FULL_SORT_RE.search(plan))
+            if full_sort:
+                sorted_queries.append(label)
+
+            status = (
+                self.style.ERROR("SORT COMPLETO")
+                if full_sort
+                else self.style.SUCCESS("ordem pelo índice")
+            )
+            self.stdout.write(
+                f"- {label}: {statistics.median(timings):.2f} ms (mediana) - {status}\n"
+                f"    índices: {', '.join(indexes) or 'nenhum (varredura sequencial)'}"
+            )
+            if options["show_plans"]:
+                for line in plan.splitlines():
+                    self.stdout.write(f"      {line}")
+
+        if sorted_queries and options["fail_on_sort"]:
+            raise CommandError(
+                f"{len(sorted_queries)} consulta(s) com sort completo: "
+                + "; ".join(sorted_queries)
+            )
+
+    def build_scenarios(self):
+        """Consultas equivalentes às da API, com valores reais do catálogo."""
+        sample = (
+            NFTItem.objects.filter(collection__isnull=False)
+            .values("collection_id")
+            .annotate(total=Count("id"))
+            .order_by("-total")
+            .first()
+        )
+        any_item = (
+            NFTItem.objects.exclude(product_code__isnull=True)
+            .exclude(product_code="")
+            .only("product_code")
+            .first()
+        )
+        if any_item is None:
+            return []
+
+        scenarios = [
+            ("catálogo por volume 7d", {}, "-seven_day_volume_brl"),
+            ("catálogo por atualização", {}, "-updated_at"),
+            ("catálogo por preço", {}, "last_price_brl"),
+            ("promoções (promo_only)", {"promo_only": "1"}, "last_price_brl"),
+            ("item por product_code", {"product_code": any_item.product_code}, None),
+        ]
+        if sample:
+            collection_id = str(sample["collection_id"])
+            in_collection = NFTItem.objects.filter(collection_id=collection_id)
+            rarity = (
+                in_collection.exclude(rarity="")
+                .values_list("rarity", flat=True)
+                .first()
+            )
+            item_type = (
+                in_collection.exclude(item_type="")
+                .values_list("item_type", flat=True)
+                .first()
+            )
+            scenarios += [
+                (
+                    "coleção por preço",
+                    {"collection_id": collection_id},
+                    "last_price_brl",
+                ),
+                (
+                    "coleção por volume 7d",
+                    {"collection_id": collection_id},
+                    "-seven_day_volume_brl",
+                ),
+            ]
+            if rarity:
+                scenarios.append(
+                    (
+                        "coleção + raridade por preço",
+                        {"collection_id": collection_id, "rarity": rarity},
+                        "last_price_brl",
+                    )
+                )
+            if item_type:
+                scenarios.append(
+                    (
+                        "coleção + tipo por preço",
+                        {"collection_id": collection_id, "item_type": item_type},
+                        "-last_price_brl",
+                    )
+                )
+        return scenarios
@@ -4,7 +4,10 @@ from nft.tasks import (
     update_all_nft_prices_sequential,
     update_nft_price,
 )
-from nft.models import NFTItem
+from nft.cache import get_list_cache_stats
+from nft.models import NFTItem, PriceRefreshRun
+from nft.services_access import get_access_buffer
+from django.conf import settings
 
 
 class Command(BaseCommand):
@@ -13,7 +16,15 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument(
             "action",
-            choices=["status", "run-now", "run-sequential", "run-single", "test"],
+            choices=[
+                "status",
+                "run-now",
+                "run-sequential",
+                "run-local",
+                "run-single",
+                "test",
+                "cleanup",
+            ],
             help="Ação a ser executada",
         )
         parser.add_argument(
@@ -21,6 +32,16 @@ class Command(BaseCommand):
             type=str,
             help="Código do produto para atualização individual",
         )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            help="Consultas simultâneas à Immutable (run-local)",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            help="Requisições por segundo à Immutable (run-local)",
+        )
 
     def handle(self, *args, **options):
         action = options["action"]
@@ -31,6 +52,8 @@ class Command(BaseCommand):
             self.run_now()
         elif action == "run-sequential":
             self.run_sequential()
+        elif action == "run-local":
+            self.run_local(options.get("rate"), options.get("concurrency"))
         elif action == "run-single":
             product_code = options.get("product_code")
             if not product_code:
@@ -43,6 +66,8 @@ class Command(BaseCommand):
             self.run_single(product_code)
         elif action == "test":
             self.test_system()
+        elif action == "cleanup":
+            self.run_cleanup()
 
     def show_status(self):
         """Mostra o status do sistema."""
@@ -73,13 +98,33 @@ class Command(BaseCommand):
             price_str = f"R$ {price}" if price else "N/A"
             self.stdout.write(f"  • {product_code}: {name} - {price_str}")
 
+        rate = getattr(settings, "NFT_PRICE_REFRESH_RATE", 5.0)
+        concurrency = getattr(settings, "NFT_PRICE_REFRESH_CONCURRENCY", 8)
         self.stdout.write("\nPróxima execução agendada: Todo dia às 3h00")
-        self.stdout.write("Intervalo entre atualizações: 3.5 segundos por produto")
+        self.stdout.write(
+            f"Limite de taxa: {rate} req/s, {concurrency} requisições simultâneas"
+        )
 
-        if products_with_code > 0:
-            estimated_duration = products_with_code * 3.5 / 60
+        last_run = PriceRefreshRun.objects.first()
+        if last_run:
             self.stdout.write(
-                f"Duração estimada da rotina: {estimated_duration:.1f} minutos"
+                f"Última execução: #{last_run.pk} ({last_run.get_status_display()}) - "
+                f"{last_run.processed_count}/{last_run.total_items} processados, "
+                f"{last_run.failed_count} falhas"
+            )
+
+        stats = get_list_cache_stats()
+        self.stdout.write(
+            f"Cache da listagem: {stats['hit']} hits, {stats['miss']} misses, "
+            f"{stats['not_modified']} respostas 304 (taxa de acerto {stats['hit_ratio']:.1%})"
+        )
+
+        try:
+            pending = get_access_buffer().size()
+            self.stdout.write(f"Acessos aguardando gravação: {pending}")
+        except Exception as e:
+            self.stdout.write(
+                self.style.WARNING(f"Buffer de acessos indisponível: {e}")
             )
 
     def run_now(self):
@@ -100,18 +145,17 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f"Erro ao executar a rotina: {e}"))
 
     def run_sequential(self):
-        """Executa a rotina de atualização sequencialmente (um item a cada 3.5s)."""
-        self.stdout.write(
-            "Executando atualização sequencial de preços (um item a cada 3.5s)..."
-        )
+        """Executa a rotina de atualização em lote (concorrente, com checkpoint)."""
+        self.stdout.write("Executando atualização de preços em lote...")
 
         try:
             result = update_all_nft_prices_sequential.delay()
             self.stdout.write(
-                self.style.SUCCESS(f"Task sequencial iniciada! ID: {result.id}")
+                self.style.SUCCESS(f"Task de atualização iniciada! ID: {result.id}")
             )
             self.stdout.write(
-                "A rotina está processando os itens sequencialmente em background."
+                "A rotina está processando os itens em background "
+                "(retoma do último checkpoint se interrompida)."
             )
             self.stdout.write(
                 "Use 'celery -A core worker --loglevel=info' para ver os logs."
@@ -120,6 +164,32 @@ class Command(BaseCommand):
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Erro ao executar a rotina: {e}"))
 
+    def run_local(self, rate=None, concurrency=None):
+        """Executa a atualização em lote neste processo, sem passar pelo Celery."""
+        from nft.services_refresh import refresh_all_nft_prices
+
+        self.stdout.write("Executando atualização de preços neste processo...")
+        try:
+            result = refresh_all_nft_prices(
+                rate=rate, concurrency=concurrency, time_budget=0
+            )
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"Erro ao executar a rotina: {e}"))
+            return
+
+        if result.get("status") == "skipped":
+            self.stdout.write(self.style.WARNING(result.get("reason", "")))
+            return
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Atualização #{result['run_id']} {result['status']}: "
+                f"{result['processed_count']}/{result['total_items']} processados, "
+                f"{result['updated_count']} atualizados, "
+                f"{result['failed_count']} falhas em "
+                f"{result['elapsed_minutes']:.1f}min"
+            )
+        )
+
     def run_single(self, product_code):
         """Atualiza um produto específico."""
         self.stdout.write(f"Atualizando produto específico: {product_code}")
@@ -165,3 +235,33 @@ class Command(BaseCommand):
 
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Erro no teste: {e}"))
+
+    def run_cleanup(self):
+        """Executa a retenção/manutenção do banco neste processo."""
+        from core.maintenance import run_maintenance
+
+        self.stdout.write("Executando limpeza de dados antigos...")
+        report = run_maintenance()
+        for name, step in report["steps"].items():
+            if step["status"] == "failed":
+                self.stdout.write(self.style.ERROR(f"- {name}: erro ({step['error']})"))
+                continue
+            details = ", ".join(
+                f"{key}={value}"
+                for key, value in step.items()
+                if key not in ("status", "rows", "seconds")
+            )
+            self.stdout.write(
+                f"- {name}: {step['rows']} linhas em {step['seconds']:.2f}s ({details})"
+            )
+        if report.get("vacuumed"):
+            self.stdout.write(
+                f"VACUUM/ANALYZE em {len(report['vacuumed'])} tabela(s) "
+                f"em {report['vacuum_seconds']:.2f}s"
+            )
+        style = (
+            self.style.SUCCESS if report["status"] == "success" else self.style.WARNING
+        )
+        self.stdout.write(
+            style(f"Total: {report['rows']} linhas em {report['seconds']:.2f}s")
+        )
@@ -22,7 +22,8 @@ class Command(BaseCommand):
                     f"\n✅ Sincronização concluída com sucesso!\n"
                     f"   Total de itens na API: {result['total_api']}\n"
                     f"   Novos itens cadastrados: {result['new_items']}\n"
-                    f"   Itens atualizados: {result['updated_items']}"
+                    f"   Itens atualizados: {result['updated_items']}\n"
+                    f"   Itens sem alteração: {result.get('unchanged_items', 0)}"
                 )
             )
 
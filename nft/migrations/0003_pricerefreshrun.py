@@ -0,0 +1,55 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nft", "0002_alter_nftitem_options"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PriceRefreshRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "Em execução"),
+                            ("interrupted", "Interrompida"),
+                            ("completed", "Concluída"),
+                        ],
+                        db_index=True,
+                        default="running",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "last_product_code",
+                    models.CharField(blank=True, default="", max_length=120),
+                ),
+                ("total_items", models.PositiveIntegerField(default=0)),
+                ("processed_count", models.PositiveIntegerField(default=0)),
+                ("updated_count", models.PositiveIntegerField(default=0)),
+                ("failed_count", models.PositiveIntegerField(default=0)),
+                ("error", models.TextField(blank=True, default="")),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Execução de Atualização de Preços",
+                "verbose_name_plural": "Execuções de Atualização de Preços",
+                "ordering": ["-started_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nft", "0003_pricerefreshrun"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExchangeRate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "pair",
+                    models.CharField(
+                        choices=[("ETH-USD", "ETH → USD"), ("USD-BRL", "USD → BRL")],
+                        max_length=10,
+                        unique=True,
+                    ),
+                ),
+                ("rate", models.DecimalField(decimal_places=8, max_digits=20)),
+                ("source", models.CharField(blank=True, default="", max_length=50)),
+                ("fetched_at", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name": "Cotação",
+                "verbose_name_plural": "Cotações",
+                "ordering": ["pair"],
+            },
+        ),
+    ]
@@ -0,0 +1,132 @@
+"""
+Índices de busca textual (ver nft/search.py).
+
+PostgreSQL: extensões unaccent/pg_trgm, função imutável ``nft_unaccent`` e
+índices GIN (tsvector e trigramas) sobre o texto sem acentos de cada tabela.
+SQLite: tabelas FTS5 de conteúdo externo mantidas por triggers.
+
+Se as extensões/FTS5 não estiverem disponíveis a migração apenas registra um
+aviso; a busca continua funcionando com ``icontains``.
+"""
+
+import logging
+
+from django.db import migrations, transaction
+
+logger = logging.getLogger(__name__)
+
+
+# Cópia congelada de nft.search.SEARCH_INDEXES
+INDEXES = {
+    "nft_nftitem": ("name", "name_pt_br", "product_code"),
+    "nft_nftcollection": ("name", "description", "slug", "creator_name", "address"),
+}
+
+
+def _document(columns):
+    parts = " || ' ' || ".join(f"coalesce({col}, '')" for col in columns)
+    return f"nft_unaccent(lower({parts}))"
+
+
+def _postgres_forward(cursor):
+    cursor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # unaccent() é STABLE; o wrapper com dicionário explícito pode ser IMMUTABLE
+    # e portanto usado em índices de expressão
+    cursor.execute("""
+        CREATE OR REPLACE FUNCTION nft_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+        """)
+    for table, columns in INDEXES.items():
+        document = _document(columns)
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_search_tsv ON {table} "
+            f"USING gin (to_tsvector('simple'::regconfig, {document}))"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_search_trgm ON {table} "
+            f"USING gin ({document} gin_trgm_ops)"
+        )
+
+
+def _postgres_backward(cursor):
+    for table in INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {table}_search_tsv")
+        cursor.execute(f"DROP INDEX IF EXISTS {table}_search_trgm")
+    cursor.execute("DROP FUNCTION IF EXISTS nft_unaccent(text)")
+
+
+def _sqlite_forward(cursor):
+    for table, columns in INDEXES.items():
+        fts = f"{table}_fts"
+        cols = ", ".join(columns)
+        new_values = ", ".join(f"new.{col}" for col in columns)
+        old_values = ", ".join(f"old.{col}" for col in columns)
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{cols}, content='{table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+            f"VALUES ('delete', old.id, {old_values}); END"
+        )
+        # Só reindexa quando uma coluna buscável muda (não a cada atualização de preço)
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} "
+            f"ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+            f"VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+        )
+        cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _sqlite_backward(cursor):
+    for table in INDEXES:
+        fts = f"{table}_fts"
+        for suffix in ("ai", "ad", "au"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+        cursor.execute(f"DROP TABLE IF EXISTS {fts}")
+
+
+def forwards(apps, schema_editor):
+    connection = schema_editor.connection
+    handlers = {"postgresql": _postgres_forward, "sqlite": _sqlite_forward}
+    handler = handlers.get(connection.vendor)
+    if handler is None:
+        return
+    try:
+        # Savepoint: uma falha (sem permissão para a extensão, sem FTS5) não
+        # aborta a transação da migração
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                handler(cursor)
+    except Exception as e:  # noqa: BLE001
+        logger.warning("Índices de busca não criados (%s); a busca usará icontains", e)
+
+
+def backwards(apps, schema_editor):
+    connection = schema_editor.connection
+    handlers = {"postgresql": _postgres_backward, "sqlite": _sqlite_backward}
+    handler = handlers.get(connection.vendor)
+    if handler is not None:
+        with connection.cursor() as cursor:
+            handler(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nft", "0004_exchangerate"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
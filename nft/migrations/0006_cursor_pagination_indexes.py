@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nft", "0005_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="nftitem",
+            index=models.Index(
+                fields=["last_price_brl", "id"], name="nft_item_price_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="nftitem",
+            index=models.Index(
+                fields=["created_at", "id"], name="nft_item_created_id_idx"
+            ),
+        ),
+    ]
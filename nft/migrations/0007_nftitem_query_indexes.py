@@ -0,0 +1,83 @@
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nft", "0006_cursor_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="nftitem",
+            index=models.Index(
+                fields=["updated_at", "id"], name="nft_item_updated_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="nftitem",
+            index=models.Index(
+                fields=["seven_day_volume_brl", "id"], name="nft_item_volume_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="nftitem",
+            index=models.Index(
+                fields=["collection", "last_price_brl"], name="nft_item_coll_price_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="nftitem",
+            index=models.Index(
+                models.F("collection"),
+                django.db.models.functions.text.Upper("rarity"),
+                models.F("last_price_brl"),
+                name="nft_item_coll_rarity_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="nftitem",
+            index=models.Index(
+                models.F("collection"),
+                django.db.models.functions.text.Upper("item_type"),
+                models.F("last_price_brl"),
+                name="nft_item_coll_type_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="nftitem",
+            index=models.Index(
+                fields=["collection", "-seven_day_volume_brl"],
+                name="nft_item_coll_volume_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="nftitem",
+            index=models.Index(
+                fields=["collection"],
+                include=(
+                    "last_price_brl",
+                    "seven_day_volume_brl",
+                    "seven_day_sales_count",
+                ),
+                name="nft_item_coll_cover_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="nftitem",
+            index=models.Index(
+                condition=models.Q(("markup_percent__isnull", False)),
+                fields=["markup_percent"],
+                name="nft_item_promo_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="nftitem",
+            index=models.Index(
+                django.db.models.functions.text.Upper("product_code"),
+                condition=models.Q(("product_code__isnull", False)),
+                name="nft_item_code_upper_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nft", "0007_nftitem_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="nftitemaccess",
+            name="accessed_at",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+        ),
+    ]
@@ -0,0 +1,102 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nft", "0008_nftitemaccess_accessed_at_default"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NFTItemAccessHourly",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hour", models.DateTimeField(verbose_name="Hora")),
+                (
+                    "access_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Acessos"),
+                ),
+                (
+                    "last_access_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Último acesso"
+                    ),
+                ),
+                (
+                    "item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="access_hourly",
+                        to="nft.nftitem",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Acessos por Hora",
+                "verbose_name_plural": "Acessos por Hora",
+                "indexes": [
+                    models.Index(fields=["hour"], name="nft_access_hourly_hour_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("item", "hour"), name="nft_access_hourly_item_hour"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="NFTItemAccessDaily",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="Dia")),
+                (
+                    "access_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Acessos"),
+                ),
+                (
+                    "last_access_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Último acesso"
+                    ),
+                ),
+                (
+                    "item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="access_daily",
+                        to="nft.nftitem",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Acessos por Dia",
+                "verbose_name_plural": "Acessos por Dia",
+                "indexes": [
+                    models.Index(fields=["day"], name="nft_access_daily_day_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("item", "day"), name="nft_access_daily_item_day"
+                    )
+                ],
+            },
+        ),
+    ]
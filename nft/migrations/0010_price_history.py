@@ -0,0 +1,272 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nft", "0009_access_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NFTPricePoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("price", "Preço anunciado"), ("sale", "Venda")],
+                        max_length=5,
+                        verbose_name="Tipo",
+                    ),
+                ),
+                (
+                    "recorded_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Horário"
+                    ),
+                ),
+                (
+                    "price_brl",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=18, verbose_name="Preço (BRL)"
+                    ),
+                ),
+                ("order_id", models.CharField(blank=True, max_length=100, null=True)),
+                (
+                    "item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_points",
+                        to="nft.nftitem",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ponto de Preço",
+                "verbose_name_plural": "Pontos de Preço",
+                "indexes": [
+                    models.Index(
+                        fields=["item", "kind", "recorded_at"],
+                        name="nft_price_point_series_idx",
+                    ),
+                    models.Index(
+                        fields=["recorded_at"], name="nft_price_point_time_idx"
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("order_id__isnull", False)),
+                        fields=("item", "order_id"),
+                        name="nft_price_point_item_order",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="NFTPriceHourly",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hour", models.DateTimeField(verbose_name="Hora")),
+                (
+                    "open_brl",
+                    models.DecimalField(
+                        blank=True,
+                        null=True,
+                        decimal_places=2,
+                        max_digits=18,
+                        verbose_name="Abertura",
+                    ),
+                ),
+                (
+                    "high_brl",
+                    models.DecimalField(
+                        blank=True,
+                        null=True,
+                        decimal_places=2,
+                        max_digits=18,
+                        verbose_name="Máxima",
+                    ),
+                ),
+                (
+                    "low_brl",
+                    models.DecimalField(
+                        blank=True,
+                        null=True,
+                        decimal_places=2,
+                        max_digits=18,
+                        verbose_name="Mínima",
+                    ),
+                ),
+                (
+                    "close_brl",
+                    models.DecimalField(
+                        blank=True,
+                        null=True,
+                        decimal_places=2,
+                        max_digits=18,
+                        verbose_name="Fechamento",
+                    ),
+                ),
+                (
+                    "sales_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Vendas"),
+                ),
+                (
+                    "sales_volume_brl",
+                    models.DecimalField(
+                        default=0,
+                        decimal_places=2,
+                        max_digits=18,
+                        verbose_name="Volume (BRL)",
+                    ),
+                ),
+                (
+                    "last_sale_brl",
+                    models.DecimalField(
+                        blank=True,
+                        null=True,
+                        decimal_places=2,
+                        max_digits=18,
+                        verbose_name="Última venda",
+                    ),
+                ),
+                (
+                    "item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_hourly",
+                        to="nft.nftitem",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Preço por Hora",
+                "verbose_name_plural": "Preços por Hora",
+                "indexes": [
+                    models.Index(fields=["hour"], name="nft_price_hourly_hour_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("item", "hour"), name="nft_price_hourly_item_hour"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="NFTPriceDaily",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="Dia")),
+                (
+                    "open_brl",
+                    models.DecimalField(
+                        blank=True,
+                        null=True,
+                        decimal_places=2,
+                        max_digits=18,
+                        verbose_name="Abertura",
+                    ),
+                ),
+                (
+                    "high_brl",
+                    models.DecimalField(
+                        blank=True,
+                        null=True,
+                        decimal_places=2,
+                        max_digits=18,
+                        verbose_name="Máxima",
+                    ),
+                ),
+                (
+                    "low_brl",
+                    models.DecimalField(
+                        blank=True,
+                        null=True,
+                        decimal_places=2,
+                        max_digits=18,
+                        verbose_name="Mínima",
+                    ),
+                ),
+                (
+                    "close_brl",
+                    models.DecimalField(
+                        blank=True,
+                        null=True,
+                        decimal_places=2,
+                        max_digits=18,
+                        verbose_name="Fechamento",
+                    ),
+                ),
+                (
+                    "sales_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Vendas"),
+                ),
+                (
+                    "sales_volume_brl",
+                    models.DecimalField(
+                        default=0,
+                        decimal_places=2,
+                        max_digits=18,
+                        verbose_name="Volume (BRL)",
+                    ),
+                ),
+                (
+                    "last_sale_brl",
+                    models.DecimalField(
+                        blank=True,
+                        null=True,
+                        decimal_places=2,
+                        max_digits=18,
+                        verbose_name="Última venda",
+                    ),
+                ),
+                (
+                    "item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_daily",
+                        to="nft.nftitem",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Preço por Dia",
+                "verbose_name_plural": "Preços por Dia",
+                "indexes": [
+                    models.Index(fields=["day"], name="nft_price_daily_day_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("item", "day"), name="nft_price_daily_item_day"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nft", "0010_price_history"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="nftitem",
+            name="sales_watermark",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="nftitem",
+            name="seven_day_window_start",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
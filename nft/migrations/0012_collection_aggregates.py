@@ -0,0 +1,136 @@
+from django.db import migrations, models
+from django.db.models import Count, Min, Q, Sum
+from django.utils import timezone
+
+
+def backfill_aggregates(apps, schema_editor):
+    NftCollection = apps.get_model("nft", "NftCollection")
+    NFTItem = apps.get_model("nft", "NFTItem")
+    now = timezone.now()
+    rows = (
+        NFTItem.objects.filter(collection__isnull=False)
+        .values("collection_id")
+        .annotate(
+            count=Count("id"),
+            floor=Min("last_price_brl", filter=Q(last_price_brl__gt=0)),
+            volume=Sum("seven_day_volume_brl"),
+        )
+        .order_by()
+    )
+    collections = [
+        NftCollection(
+            id=row["collection_id"],
+            nft_items_count=row["count"],
+            floor_price_brl=row["floor"],
+            seven_day_volume_brl=row["volume"] or 0,
+            aggregates_updated_at=now,
+        )
+        for row in rows
+    ]
+    NftCollection.objects.bulk_update(
+        collections,
+        [
+            "nft_items_count",
+            "floor_price_brl",
+            "seven_day_volume_brl",
+            "aggregates_updated_at",
+        ],
+        batch_size=500,
+    )
+
+
+# Cópia congelada de nft.search.SEARCH_INDEXES
+SEARCH_INDEXES = {
+    "nft_nftitem": ("name", "name_pt_br", "product_code"),
+    "nft_nftcollection": ("name", "description", "slug", "creator_name", "address"),
+}
+
+
+def reinstall_search_triggers(apps, schema_editor):
+    """
+    No SQLite o AddField reconstrói a tabela (cópia + rename) e descarta os
+    triggers FTS da migração 0005 (o nft_nftitem já perdeu os seus no 0011).
+    Recria os triggers e reindexa as tabelas FTS existentes.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for table, columns in SEARCH_INDEXES.items():
+            fts = f"{table}_fts"
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [fts],
+            )
+            if cursor.fetchone() is None:
+                # FTS5 indisponível na 0005: a busca segue com icontains
+                continue
+            cols = ", ".join(columns)
+            new_values = ", ".join(f"new.{col}" for col in columns)
+            old_values = ", ".join(f"old.{col}" for col in columns)
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+                f"VALUES ('delete', old.id, {old_values}); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} "
+                f"ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+                f"VALUES ('delete', old.id, {old_values}); "
+                f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+            )
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nft", "0011_nftitem_sales_watermark"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="nftcollection",
+            name="nft_items_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="NFTs do catálogo ligados a esta coleção",
+                verbose_name="Itens no Catálogo",
+            ),
+        ),
+        migrations.AddField(
+            model_name="nftcollection",
+            name="floor_price_brl",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=2,
+                help_text="Menor last_price_brl dos itens da coleção",
+                max_digits=18,
+                null=True,
+                verbose_name="Floor Price (BRL)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="nftcollection",
+            name="seven_day_volume_brl",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                help_text="Soma do volume de 7 dias dos itens da coleção",
+                max_digits=20,
+                verbose_name="Volume 7d (BRL)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="nftcollection",
+            name="aggregates_updated_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(reinstall_search_triggers, migrations.RunPython.noop),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+"""
+Remove o índice de cobertura dos agregados por coleção: ``INCLUDE`` não existe
+no SQLite (models.W040) e os agregados já localizam os itens da coleção por
+``nft_item_coll_price_idx``.
+"""
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nft", "0012_collection_aggregates"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="nftitem",
+            name="nft_item_coll_cover_idx",
+        ),
+    ]
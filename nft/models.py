@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 from django.conf import settings
@@ -68,6 +70,11 @@ class NFTItem(models.Model):
         max_digits=7, decimal_places=2, blank=True, null=True, default=0
     )
     seven_day_updated_at = models.DateTimeField(blank=True, null=True)
+    # Estado incremental das métricas de 7 dias (nft.services_history):
+    # maior updated_timestamp de venda já lido da Immutable e início da janela
+    # já aplicado às somas (vendas anteriores a ele já foram descontadas)
+    sales_watermark = models.DateTimeField(blank=True, null=True)
+    seven_day_window_start = models.DateTimeField(blank=True, null=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -84,6 +91,46 @@ class NFTItem(models.Model):
             models.Index(fields=["is_craft_material"]),
             models.Index(fields=["name"]),
             models.Index(fields=["product_code"]),
+            # Paginação por cursor (core.pagination): ordenação + desempate por id
+            models.Index(fields=["last_price_brl", "id"], name="nft_item_price_id_idx"),
+            models.Index(fields=["created_at", "id"], name="nft_item_created_id_idx"),
+            models.Index(fields=["updated_at", "id"], name="nft_item_updated_id_idx"),
+            models.Index(
+                fields=["seven_day_volume_brl", "id"], name="nft_item_volume_id_idx"
+            ),
+            # Listagens por coleção ordenadas sem sort completo. rarity/item_type
+            # são filtrados com iexact, que no PostgreSQL vira UPPER(col) = UPPER(%s)
+            models.Index(
+                fields=["collection", "last_price_brl"], name="nft_item_coll_price_idx"
+            ),
+            models.Index(
+                "collection",
+                Upper("rarity"),
+                "last_price_brl",
+                name="nft_item_coll_rarity_idx",
+            ),
+            models.Index(
+                "collection",
+                Upper("item_type"),
+                "last_price_brl",
+                name="nft_item_coll_type_idx",
+            ),
+            models.Index(
+                fields=["collection", "-seven_day_volume_brl"],
+                name="nft_item_coll_volume_idx",
+            ),
+            # promo_only: só itens com markup próprio
+            models.Index(
+                fields=["markup_percent"],
+                condition=models.Q(markup_percent__isnull=False),
+                name="nft_item_promo_idx",
+            ),
+            # Busca por product_code (iexact) ignorando itens sem código
+            models.Index(
+                Upper("product_code"),
+                condition=models.Q(product_code__isnull=False),
+                name="nft_item_code_upper_idx",
+            ),
         ]
         ordering = ["name", "rarity", "item_type", "item_sub_type"]
 
@@ -150,6 +197,29 @@ class NftCollection(models.Model):
         help_text="Volume total negociado",
     )
 
+    # Agregados dos NFTItem da coleção, mantidos por nft.services_collections
+    nft_items_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Itens no Catálogo",
+        help_text="NFTs do catálogo ligados a esta coleção",
+    )
+    floor_price_brl = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name="Floor Price (BRL)",
+        help_text="Menor last_price_brl dos itens da coleção",
+    )
+    seven_day_volume_brl = models.DecimalField(
+        max_digits=20,
+        decimal_places=2,
+        default=0,
+        verbose_name="Volume 7d (BRL)",
+        help_text="Soma do volume de 7 dias dos itens da coleção",
+    )
+    aggregates_updated_at = models.DateTimeField(null=True, blank=True)
+
     metadata_api_url = models.URLField(
         blank=True, verbose_name="URL da API de Metadados"
     )
@@ -212,7 +282,8 @@ class NFTItemAccess(models.Model):
     """Tracks user access/pageviews for NFT items."""
 
     item = models.ForeignKey(NFTItem, on_delete=models.CASCADE, related_name="accesses")
-    accessed_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Preenchido com o horário do acesso (gravado em lote depois do fato)
+    accessed_at = models.DateTimeField(default=timezone.now, db_index=True)
     ip_hash = models.CharField(max_length=64, blank=True, default="")
     user_agent_hash = models.CharField(max_length=64, blank=True, default="")
 
@@ -223,6 +294,163 @@ class NFTItemAccess(models.Model):
         ]
 
 
+class NFTItemAccessHourly(models.Model):
+    """Acessos por item e hora, consolidados de NFTItemAccess."""
+
+    item = models.ForeignKey(
+        NFTItem, on_delete=models.CASCADE, related_name="access_hourly"
+    )
+    hour = models.DateTimeField("Hora")
+    access_count = models.PositiveIntegerField("Acessos", default=0)
+    last_access_at = models.DateTimeField("Último acesso", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Acessos por Hora"
+        verbose_name_plural = "Acessos por Hora"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["item", "hour"], name="nft_access_hourly_item_hour"
+            )
+        ]
+        indexes = [models.Index(fields=["hour"], name="nft_access_hourly_hour_idx")]
+
+
+class NFTItemAccessDaily(models.Model):
+    """Acessos por item e dia (fuso TIME_ZONE), base do trending."""
+
+    item = models.ForeignKey(
+        NFTItem, on_delete=models.CASCADE, related_name="access_daily"
+    )
+    day = models.DateField("Dia")
+    access_count = models.PositiveIntegerField("Acessos", default=0)
+    last_access_at = models.DateTimeField("Último acesso", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Acessos por Dia"
+        verbose_name_plural = "Acessos por Dia"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["item", "day"], name="nft_access_daily_item_day"
+            )
+        ]
+        indexes = [models.Index(fields=["day"], name="nft_access_daily_day_idx")]
+
+
+class NFTPricePoint(models.Model):
+    """
+    Série histórica de preços (append-only): um ponto por item a cada
+    atualização de preço e um por venda registrada na Immutable.
+    """
+
+    KIND_CHOICES = [
+        ("price", "Preço anunciado"),
+        ("sale", "Venda"),
+    ]
+
+    item = models.ForeignKey(
+        NFTItem, on_delete=models.CASCADE, related_name="price_points"
+    )
+    kind = models.CharField("Tipo", max_length=5, choices=KIND_CHOICES)
+    recorded_at = models.DateTimeField("Horário", default=timezone.now)
+    price_brl = models.DecimalField("Preço (BRL)", max_digits=18, decimal_places=2)
+    # Id da ordem na Immutable (vendas); evita gravar a mesma venda duas vezes
+    order_id = models.CharField(max_length=100, blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Ponto de Preço"
+        verbose_name_plural = "Pontos de Preço"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["item", "order_id"],
+                condition=models.Q(order_id__isnull=False),
+                name="nft_price_point_item_order",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["item", "kind", "recorded_at"],
+                name="nft_price_point_series_idx",
+            ),
+            models.Index(fields=["recorded_at"], name="nft_price_point_time_idx"),
+        ]
+
+
+class NFTPriceHourly(models.Model):
+    """Preço (OHLC) e vendas por item e hora, consolidados de NFTPricePoint."""
+
+    item = models.ForeignKey(
+        NFTItem, on_delete=models.CASCADE, related_name="price_hourly"
+    )
+    hour = models.DateTimeField("Hora")
+    open_brl = models.DecimalField(
+        "Abertura", max_digits=18, decimal_places=2, null=True, blank=True
+    )
+    high_brl = models.DecimalField(
+        "Máxima", max_digits=18, decimal_places=2, null=True, blank=True
+    )
+    low_brl = models.DecimalField(
+        "Mínima", max_digits=18, decimal_places=2, null=True, blank=True
+    )
+    close_brl = models.DecimalField(
+        "Fechamento", max_digits=18, decimal_places=2, null=True, blank=True
+    )
+    sales_count = models.PositiveIntegerField("Vendas", default=0)
+    sales_volume_brl = models.DecimalField(
+        "Volume (BRL)", max_digits=18, decimal_places=2, default=0
+    )
+    last_sale_brl = models.DecimalField(
+        "Última venda", max_digits=18, decimal_places=2, null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name = "Preço por Hora"
+        verbose_name_plural = "Preços por Hora"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["item", "hour"], name="nft_price_hourly_item_hour"
+            )
+        ]
+        indexes = [models.Index(fields=["hour"], name="nft_price_hourly_hour_idx")]
+
+
+class NFTPriceDaily(models.Model):
+    """Preço (OHLC) e vendas por item e dia (fuso TIME_ZONE), base dos gráficos."""
+
+    item = models.ForeignKey(
+        NFTItem, on_delete=models.CASCADE, related_name="price_daily"
+    )
+    day = models.DateField("Dia")
+    open_brl = models.DecimalField(
+        "Abertura", max_digits=18, decimal_places=2, null=True, blank=True
+    )
+    high_brl = models.DecimalField(
+        "Máxima", max_digits=18, decimal_places=2, null=True, blank=True
+    )
+    low_brl = models.DecimalField(
+        "Mínima", max_digits=18, decimal_places=2, null=True, blank=True
+    )
+    close_brl = models.DecimalField(
+        "Fechamento", max_digits=18, decimal_places=2, null=True, blank=True
+    )
+    sales_count = models.PositiveIntegerField("Vendas", default=0)
+    sales_volume_brl = models.DecimalField(
+        "Volume (BRL)", max_digits=18, decimal_places=2, default=0
+    )
+    last_sale_brl = models.DecimalField(
+        "Última venda", max_digits=18, decimal_places=2, null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name = "Preço por Dia"
+        verbose_name_plural = "Preços por Dia"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["item", "day"], name="nft_price_daily_item_day"
+            )
+        ]
+        indexes = [models.Index(fields=["day"], name="nft_price_daily_day_idx")]
+
+
 class PricingConfig(models.Model):
     """Configuração global de preços (markup padrão)."""
 
@@ -241,3 +469,58 @@ class PricingConfig(models.Model):
 
     def __str__(self) -> str:  # type: ignore[override]
         return f"Markup Global: {self.global_markup_percent}%"
+
+
+class PriceRefreshRun(models.Model):
+    """Checkpoint de uma execução da rotina de atualização de preços em lote."""
+
+    STATUS_CHOICES = [
+        ("running", "Em execução"),
+        ("interrupted", "Interrompida"),
+        ("completed", "Concluída"),
+    ]
+
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default="running", db_index=True
+    )
+    # Último product_code gravado; a retomada continua a partir do próximo
+    last_product_code = models.CharField(max_length=120, blank=True, default="")
+    total_items = models.PositiveIntegerField(default=0)
+    processed_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Execução de Atualização de Preços"
+        verbose_name_plural = "Execuções de Atualização de Preços"
+        ordering = ["-started_at"]
+
+    def __str__(self) -> str:  # type: ignore[override]
+        return f"Atualização #{self.pk} - {self.get_status_display()}"
+
+
+class ExchangeRate(models.Model):
+    """Última cotação válida de cada par, usada quando as APIs externas falham."""
+
+    PAIR_CHOICES = [
+        ("ETH-USD", "ETH → USD"),
+        ("USD-BRL", "USD → BRL"),
+    ]
+
+    pair = models.CharField(max_length=10, choices=PAIR_CHOICES, unique=True)
+    rate = models.DecimalField(max_digits=20, decimal_places=8)
+    source = models.CharField(max_length=50, blank=True, default="")
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Cotação"
+        verbose_name_plural = "Cotações"
+        ordering = ["pair"]
+
+    def __str__(self) -> str:  # type: ignore[override]
+        return f"{self.pair}: {self.rate}"
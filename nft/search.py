@@ -0,0 +1,281 @@
+"""
+Busca textual indexada do catálogo (itens e coleções).
+
+Substitui os ``icontains`` (``LIKE '%q%'`` com varredura sequencial) por índices
+criados na migração ``0005_search_indexes``:
+
+- PostgreSQL: ``tsvector`` (config ``simple``) + trigramas (``pg_trgm``) sobre o
+  texto sem acentos (``nft_unaccent``), com ranking por ``ts_rank`` e
+  similaridade;
+- SQLite (dev): tabela virtual FTS5 ``<tabela>_fts`` mantida por triggers, com
+  ``remove_diacritics`` e ranking por ``bm25``.
+
+Todos os termos são buscados por prefixo ("couro ver" encontra "Couro Verde"),
+o que também atende o autocomplete. Sem os índices (extensões indisponíveis,
+FTS5 não compilado, triggers ausentes) a busca volta para ``icontains``; os
+triggers FTS descartados por migrações que reconstroem a tabela no SQLite são
+reinstalados no ``post_migrate`` (``repair_search_indexes``).
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+
+# Colunas indexadas por tabela (devem bater com a migração 0005_search_indexes)
+SEARCH_INDEXES: Dict[str, Tuple[str, ...]] = {
+    "nft_nftitem": ("name", "name_pt_br", "product_code"),
+    "nft_nftcollection": ("name", "description", "slug", "creator_name", "address"),
+}
+
+# Limite de termos por consulta (evita tsqueries/MATCH gigantes)
+MAX_TERMS = 8
+
+# "_" separa palavras tanto no parser do tsvector quanto no unicode61
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_available: Dict[Tuple[str, str], bool] = {}
+
+
+def normalize(text: str) -> str:
+    """Minúsculas, sem acentos e com espaços colapsados."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.lower().split())
+
+
+def query_terms(text: str) -> List[str]:
+    return _WORD_RE.findall(normalize(text))[:MAX_TERMS]
+
+
+# ---------------------------------------------------------------------------
+# Expressões SQL (idênticas às dos índices para que o planner os utilize)
+# ---------------------------------------------------------------------------
+
+
+def pg_document_sql(columns: Sequence[str]) -> str:
+    parts = " || ' ' || ".join(f"coalesce({col}, '')" for col in columns)
+    return f"nft_unaccent(lower({parts}))"
+
+
+def _qualified_document(table: str) -> str:
+    columns = [f'"{table}"."{col}"' for col in SEARCH_INDEXES[table]]
+    return pg_document_sql(columns)
+
+
+def fts_table(table: str) -> str:
+    return f"{table}_fts"
+
+
+def fts_triggers(table: str) -> Tuple[str, ...]:
+    fts = fts_table(table)
+    return tuple(f"{fts}_{suffix}" for suffix in ("ai", "ad", "au"))
+
+
+def _missing_sqlite_objects(cursor, table: str) -> List[str]:
+    """Tabela FTS e triggers de ``table`` que não existem no banco."""
+    names = (fts_table(table),) + fts_triggers(table)
+    placeholders = ", ".join(["%s"] * len(names))
+    cursor.execute(
+        f"SELECT name FROM sqlite_master WHERE name IN ({placeholders})",
+        list(names),
+    )
+    found = {row[0] for row in cursor.fetchall()}
+    return [name for name in names if name not in found]
+
+
+# ---------------------------------------------------------------------------
+# Disponibilidade
+# ---------------------------------------------------------------------------
+
+
+def search_backend(table: str, using: str = "default") -> Optional[str]:
+    """``"postgresql"``, ``"sqlite"`` ou None quando o índice não existe."""
+    connection = connections[using]
+    vendor = connection.vendor
+    if vendor not in ("postgresql", "sqlite") or table not in SEARCH_INDEXES:
+        return None
+    key = (using, table)
+    if key not in _available:
+        try:
+            with connection.cursor() as cursor:
+                if vendor == "postgresql":
+                    cursor.execute(
+                        "SELECT 1 FROM pg_proc WHERE proname = 'nft_unaccent'"
+                    )
+                    _available[key] = cursor.fetchone() is not None
+                else:
+                    # Sem os triggers a tabela FTS deixa de acompanhar as escritas
+                    # (um rebuild da tabela pelo SQLite os descarta)
+                    _available[key] = not _missing_sqlite_objects(cursor, table)
+        except Exception as e:  # noqa: BLE001 - banco indisponível/permissões
+            logger.warning("Não foi possível verificar o índice de busca: %s", e)
+            return None
+        if not _available[key]:
+            logger.warning(
+                "Índice de busca de %s indisponível; usando icontains", table
+            )
+    return vendor if _available[key] else None
+
+
+def reset_search_backend_cache() -> None:
+    _available.clear()
+
+
+def _install_sqlite_triggers(cursor, table: str) -> None:
+    """(Re)cria os triggers da tabela FTS de ``table`` e reindexa o conteúdo."""
+    columns = SEARCH_INDEXES[table]
+    fts = fts_table(table)
+    insert, delete, update = fts_triggers(table)
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{col}" for col in columns)
+    old_values = ", ".join(f"old.{col}" for col in columns)
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {insert} AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {delete} AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+        f"VALUES ('delete', old.id, {old_values}); END"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {update} AFTER UPDATE OF {cols} "
+        f"ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+        f"VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+    )
+    cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def repair_search_indexes(using: str = "default") -> List[str]:
+    """
+    Reinstala os triggers FTS ausentes no SQLite (ex.: após um rebuild da tabela
+    por uma migração) e reindexa as tabelas afetadas.
+
+    Retorna as tabelas reparadas. Tabelas sem a FTS (migração 0005 sem FTS5)
+    continuam no fallback ``icontains``.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return []
+    repaired = []
+    with connection.cursor() as cursor:
+        for table in SEARCH_INDEXES:
+            missing = _missing_sqlite_objects(cursor, table)
+            if not missing or fts_table(table) in missing:
+                continue
+            _install_sqlite_triggers(cursor, table)
+            repaired.append(table)
+    if repaired:
+        logger.warning(
+            "Triggers de busca reinstalados e índice reconstruído: %s",
+            ", ".join(repaired),
+        )
+        for table in repaired:
+            _available.pop((using, table), None)
+    return repaired
+
+
+# ---------------------------------------------------------------------------
+# Consultas
+# ---------------------------------------------------------------------------
+
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _postgres_search(qs: QuerySet, table: str, text: str, terms: List[str]):
+    document = _qualified_document(table)
+    tsquery = " & ".join(f"{term}:*" for term in terms)
+    needle = normalize(text)
+    # tsvector por prefixo, substring (índice de trigramas) ou similaridade de
+    # palavra para erros de digitação
+    condition = RawSQL(
+        f"(to_tsvector('simple'::regconfig, {document}) "
+        f"@@ to_tsquery('simple'::regconfig, %s) "
+        f"OR {document} LIKE %s "
+        f"OR %s <%% {document})",
+        [tsquery, f"%{_like_escape(needle)}%", needle],
+        output_field=BooleanField(),
+    )
+    rank = RawSQL(
+        f"ts_rank(to_tsvector('simple'::regconfig, {document}), "
+        f"to_tsquery('simple'::regconfig, %s)) "
+        f"+ word_similarity(%s, {document})",
+        [tsquery, needle],
+        output_field=FloatField(),
+    )
+    return qs.filter(condition).annotate(search_rank=rank)
+
+
+def _sqlite_search(qs: QuerySet, table: str, terms: List[str]):
+    fts = fts_table(table)
+    # Termos entre aspas (sem operadores) e por prefixo, combinados com AND
+    match = " ".join(f'"{term}"*' for term in terms)
+    condition = RawSQL(
+        f'"{table}"."id" IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)',
+        [match],
+        output_field=BooleanField(),
+    )
+    rank = RawSQL(
+        f"(SELECT -bm25({fts}) FROM {fts} "
+        f'WHERE {fts} MATCH %s AND rowid = "{table}"."id")',
+        [match],
+        output_field=FloatField(),
+    )
+    return qs.filter(condition).annotate(search_rank=rank)
+
+
+def _icontains_search(qs: QuerySet, fields: Iterable[str], text: str) -> QuerySet:
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f"{field}__icontains": text})
+    return qs.filter(condition)
+
+
+def search_queryset(
+    qs: QuerySet,
+    text: str,
+    *,
+    fields: Optional[Iterable[str]] = None,
+    order_by_rank: bool = True,
+) -> QuerySet:
+    """
+    Filtra ``qs`` pela busca indexada do modelo.
+
+    Args:
+        fields: Campos do fallback ``icontains`` (padrão: colunas indexadas)
+        order_by_rank: Ordena por relevância (anota ``search_rank``)
+    """
+    text = (text or "").strip()
+    terms = query_terms(text)
+    if not terms:
+        return qs
+    table = qs.model._meta.db_table
+    backend = search_backend(table, qs.db)
+    if backend == "postgresql":
+        qs = _postgres_search(qs, table, text, terms)
+    elif backend == "sqlite":
+        qs = _sqlite_search(qs, table, terms)
+    else:
+        return _icontains_search(qs, fields or SEARCH_INDEXES.get(table, ()), text)
+    if order_by_rank:
+        qs = qs.order_by("-search_rank", "-pk")
+    return qs
+
+
+def is_indexed(model, fields: Iterable[str]) -> bool:
+    """Se todos os ``fields`` estão cobertos pelo índice do modelo."""
+    columns = SEARCH_INDEXES.get(model._meta.db_table)
+    return bool(columns) and set(fields) <= set(columns)
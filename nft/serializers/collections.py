@@ -28,6 +28,8 @@ class NftCollectionSerializer(serializers.ModelSerializer):
             "floor_price_eth",
             "total_volume",
             "total_volume_eth",
+            "floor_price_brl",
+            "seven_day_volume_brl",
             "metadata_api_url",
             "project_id",
             "project_owner_address",
@@ -46,15 +48,13 @@ class NftCollectionSerializer(serializers.ModelSerializer):
             "floor_price_eth",
             "total_volume_eth",
             "items_count",
+            "floor_price_brl",
+            "seven_day_volume_brl",
         ]
 
     def get_items_count(self, obj):
-        """Calcula dinamicamente o número de itens na coleção"""
-        # Usa o valor annotado se disponível (mais eficiente)
-        if hasattr(obj, "items_count_calculated"):
-            return obj.items_count_calculated
-        # Fallback para contagem direta
-        return obj.items.count() if hasattr(obj, "items") else 0
+        """Número de itens do catálogo na coleção (mantido em nft_items_count)"""
+        return obj.nft_items_count
 
     def validate(self, attrs):
         """Garante que URLs vazias sejam string vazia ao invés de None"""
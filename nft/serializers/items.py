@@ -24,7 +24,8 @@ class NFTItemSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = NFTItem
-        fields = "__all__"
+        # Estado interno da atualização incremental das métricas de 7 dias
+        exclude = ["sales_watermark", "seven_day_window_start"]
         extra_fields = [
             "collection_slug",
             "collection_name",
@@ -67,6 +68,99 @@ class NFTItemSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class NFTItemListSerializer(serializers.ModelSerializer):
+    """
+    Representação compacta usada na listagem (sem ``blueprint``).
+
+    Aceita ``?fields=a,b,c`` para retornar apenas um subconjunto dos campos;
+    nomes desconhecidos são ignorados. ``columns_for()`` informa as colunas
+    necessárias para que a view carregue só o que será serializado.
+    """
+
+    name = serializers.SerializerMethodField(read_only=True)
+    original_name = serializers.CharField(source="name", read_only=True)
+    collection_slug = serializers.CharField(
+        source="collection.slug", default=None, read_only=True
+    )
+    collection_name = serializers.CharField(
+        source="collection.name", default=None, read_only=True
+    )
+
+    # Campos calculados -> colunas do modelo que eles leem
+    COMPUTED_COLUMNS = {
+        "name": ["name", "name_pt_br"],
+        "original_name": ["name"],
+        "collection_slug": ["collection", "collection__slug"],
+        "collection_name": ["collection", "collection__name"],
+    }
+
+    class Meta:
+        model = NFTItem
+        fields = [
+            "id",
+            "product_code",
+            "name",
+            "original_name",
+            "name_pt_br",
+            "image_url",
+            "type",
+            "source",
+            "rarity",
+            "item_type",
+            "item_sub_type",
+            "product_type",
+            "material",
+            "number",
+            "is_crafted_item",
+            "is_craft_material",
+            "collection",
+            "collection_slug",
+            "collection_name",
+            "last_price_eth",
+            "last_price_usd",
+            "last_price_brl",
+            "markup_percent",
+            "seven_day_volume_brl",
+            "seven_day_sales_count",
+            "seven_day_avg_price_brl",
+            "seven_day_last_sale_brl",
+            "seven_day_price_change_pct",
+            "updated_at",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        requested = self.requested_fields(request)
+        if requested:
+            for field_name in set(self.fields) - set(requested):
+                self.fields.pop(field_name)
+
+    @classmethod
+    def requested_fields(cls, request) -> list:
+        """Campos pedidos em ``?fields=`` (válidos e na ordem padrão)."""
+        raw = request.query_params.get("fields") if request is not None else None
+        if not raw:
+            return []
+        wanted = {f.strip() for f in raw.split(",") if f.strip()}
+        return [f for f in cls.Meta.fields if f in wanted]
+
+    @classmethod
+    def columns_for(cls, fields: list) -> list:
+        """Colunas para ``QuerySet.only()`` que cobrem os campos informados."""
+        columns = ["id"]
+        for field_name in fields or cls.Meta.fields:
+            for column in cls.COMPUTED_COLUMNS.get(field_name, [field_name]):
+                if column not in columns:
+                    columns.append(column)
+        return columns
+
+    def get_name(self, obj):
+        return obj.name_pt_br or obj.name
+
+
 class RecordAccessSerializer(serializers.Serializer):
     product_code = serializers.CharField(
         max_length=120, required=False, allow_blank=True
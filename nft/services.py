@@ -2,15 +2,15 @@ from __future__ import annotations
 
 import json
 import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta, timezone
 
-import requests
+from core import http_client
+from django.core.cache import cache
 from .models import PricingConfig, NFTItem
-import time
-from random import random
-
 
 logger = logging.getLogger(__name__)
 
@@ -19,34 +19,133 @@ IMMUTABLE_BASE_URL = "https://api.x.immutable.com/v3/orders"
 
 DEFAULT_MARKUP_MULTIPLIER = Decimal("1.30")
 
-# Simple in-process cache for rates to avoid frequent 429s and reduce latency
-_RATES_CACHE: Optional[Tuple[Decimal, Decimal, float]] = (
-    None  # (eth_usd, usd_brl, expires_at_epoch)
+
+# Snapshot of the markup table (global percent + per-item overrides) shared by
+# every process through Django's cache; invalidated by nft.signals.
+MARKUP_CACHE_KEY = "nft:markup:table"
+MARKUP_CACHE_TTL = 60 * 60
+
+_ACTIVE_MARKUP: ContextVar[Optional["MarkupResolver"]] = ContextVar(
+    "nft_active_markup", default=None
 )
-_RATES_TTL_SECONDS = 600.0  # 10 minutes - reduz chamadas à API e evita rate limiting
 
+# Last stored rates used by the implausible-BRL guard of _convert_order_to_prices.
+# The async pipeline loads them in a worker thread before converting, since the
+# ORM cannot be queried from the event loop.
+_FALLBACK_RATES: ContextVar[Optional[Tuple[Decimal, Decimal]]] = ContextVar(
+    "nft_fallback_rates", default=None
+)
+
+
+def _percent_to_multiplier(percent: Any) -> Decimal:
+    return Decimal("1") + (Decimal(percent) / Decimal("100"))
+
+
+def _load_markup_table() -> Dict[str, Any]:
+    """Load the global markup and every per-item override (two queries)."""
+    cfg = (
+        PricingConfig.objects.order_by("-updated_at")
+        .only("global_markup_percent")
+        .first()
+    )
+    overrides = dict(
+        NFTItem.objects.filter(markup_percent__isnull=False)
+        .exclude(product_code__isnull=True)
+        .exclude(product_code__exact="")
+        .values_list("product_code", "markup_percent")
+    )
+    return {
+        "global": (
+            cfg.global_markup_percent
+            if cfg and cfg.global_markup_percent is not None
+            else None
+        ),
+        "overrides": overrides,
+    }
+
+
+def invalidate_markup_cache() -> None:
+    """Drop the shared markup snapshot; the next pricing pass reloads it."""
+    cache.delete(MARKUP_CACHE_KEY)
+
+
+def markup_override_changed(product_code: Optional[str], markup_percent: Any) -> bool:
+    """Return True when the cached snapshot disagrees with an item's markup_percent."""
+    table = cache.get(MARKUP_CACHE_KEY)
+    if table is None or not product_code:
+        return False
+    cached = table["overrides"].get(product_code)
+    if cached is None or markup_percent is None:
+        return cached is not markup_percent
+    return Decimal(cached) != Decimal(markup_percent)
+
+
+class MarkupResolver:
+    """Resolve price multipliers from a preloaded markup snapshot.
 
-def _get_markup_multiplier_for(product_code: Optional[str]) -> Decimal:
-    """Return the price multiplier based on per-item or global markup.
     If an item has markup_percent (e.g., 30.00), uses (1 + 30/100).
     Else uses PricingConfig.global_markup_percent; fallback to DEFAULT_MARKUP_MULTIPLIER if none.
     """
-    try:
-        if product_code:
-            item = (
-                NFTItem.objects.filter(product_code=product_code)
-                .only("markup_percent")
-                .first()
-            )
-            if item and item.markup_percent is not None:
-                return Decimal("1") + (Decimal(item.markup_percent) / Decimal("100"))
-        cfg = (
-            PricingConfig.objects.order_by("-updated_at")
-            .only("global_markup_percent")
-            .first()
+
+    def __init__(
+        self, global_percent: Any = None, overrides: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self.global_multiplier = (
+            _percent_to_multiplier(global_percent)
+            if global_percent is not None
+            else DEFAULT_MARKUP_MULTIPLIER
         )
-        if cfg and cfg.global_markup_percent is not None:
-            return Decimal("1") + (Decimal(cfg.global_markup_percent) / Decimal("100"))
+        self.overrides = {
+            code: _percent_to_multiplier(pct) for code, pct in (overrides or {}).items()
+        }
+
+    @classmethod
+    def load(cls) -> "MarkupResolver":
+        """Build a resolver from the shared cache, querying the DB only on a miss."""
+        table = cache.get(MARKUP_CACHE_KEY)
+        if table is None:
+            table = _load_markup_table()
+            cache.set(MARKUP_CACHE_KEY, table, MARKUP_CACHE_TTL)
+        return cls(table["global"], table["overrides"])
+
+    def multiplier_for(self, product_code: Optional[str]) -> Decimal:
+        if product_code and product_code in self.overrides:
+            return self.overrides[product_code]
+        return self.global_multiplier
+
+
+@contextmanager
+def markup_pass() -> Iterator["MarkupResolver"]:
+    """Resolve markups from a single snapshot for the duration of a pricing pass.
+
+    Nested passes reuse the outer snapshot, so conversions inside a pass never
+    touch the database or the cache again.
+    """
+    active = _ACTIVE_MARKUP.get()
+    if active is not None:
+        yield active
+        return
+    try:
+        resolver = MarkupResolver.load()
+    except Exception:
+        logger.warning("Falha ao carregar markups; usando padrão", exc_info=True)
+        resolver = MarkupResolver()
+    token = _ACTIVE_MARKUP.set(resolver)
+    try:
+        yield resolver
+    finally:
+        _ACTIVE_MARKUP.reset(token)
+
+
+def _get_markup_multiplier_for(product_code: Optional[str]) -> Decimal:
+    """Return the price multiplier based on per-item or global markup.
+
+    Uses the resolver of the current pricing pass (see ``markup_pass``) when
+    there is one, otherwise the shared cached snapshot.
+    """
+    try:
+        resolver = _ACTIVE_MARKUP.get() or MarkupResolver.load()
+        return resolver.multiplier_for(product_code)
     except Exception:
         pass
     return DEFAULT_MARKUP_MULTIPLIER
@@ -65,71 +164,51 @@ def _get_json_with_retries(
     retries: int = 4,
     backoff_factor: float = 0.5,
     status_forcelist: Tuple[int, ...] = (429, 500, 502, 503, 504),
+    limiter: Optional[Any] = None,
 ) -> Optional[Any]:
-    """Perform GET with basic retries and exponential backoff.
-    Returns parsed JSON on success, or None on repeated failure.
+    """Perform GET through the shared HTTP client (pooled session per host,
+    retries with exponential backoff). Returns parsed JSON on success, or None
+    on repeated failure.
+
+    When a ``limiter`` is given (see ``services_refresh.TokenBucketLimiter``), every
+    attempt waits for a token first and 429 responses are reported back to it so
+    the shared request rate adapts.
     """
-    attempt = 0
-    # Perform up to `retries` attempts total
-    while attempt < retries:
+    try:
+        resp = http_client.get(
+            url,
+            params=params,
+            headers={"Accept": "application/json", **(headers or {})},
+            timeout=timeout,
+            retries=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=status_forcelist,
+            limiter=limiter,
+        )
+    except Exception as e:  # noqa: BLE001 - network exceptions are varied
+        logger.warning("GET failed %s after %d attempts: %s", url, retries, e)
+        return None
+
+    if resp.status_code == 200:
         try:
-            base_headers = {
-                "Accept": "application/json",
-                "User-Agent": "nft-portal/1.0",
-            }
-            merged_headers = {**base_headers, **(headers or {})}
-            resp = requests.get(
-                url, params=params, headers=merged_headers, timeout=timeout
-            )
-            if resp.status_code == 200:
-                try:
-                    return resp.json()
-                except Exception as je:  # malformed JSON
-                    logger.warning("JSON decode failed from %s: %s", url, je)
-                    return None
-            if resp.status_code in status_forcelist:
-                # Backoff and retry
-                sleep_s = backoff_factor * (2**attempt) + (random() * 0.1)
-                logger.warning(
-                    "HTTP %s from %s; retrying in %.2fs (attempt %d/%d)",
-                    resp.status_code,
-                    url,
-                    sleep_s,
-                    attempt + 1,
-                    retries,
-                )
-                time.sleep(sleep_s)
-                attempt += 1
-                continue
-            # HTTP 400 (Bad Request) - pode ser parâmetros inválidos, não retry
-            if resp.status_code == 400:
-                logger.warning(
-                    "HTTP 400 from %s; not retrying (bad request - check parameters)",
-                    url,
-                )
-                # Log response body for debugging
-                try:
-                    error_body = resp.text[:500]  # First 500 chars
-                    logger.debug("HTTP 400 response body: %s", error_body)
-                except Exception:
-                    pass
-                return None
-            # Non-retriable status
-            logger.warning("HTTP %s from %s; not retrying", resp.status_code, url)
+            return resp.json()
+        except Exception as je:  # malformed JSON
+            logger.warning("JSON decode failed from %s: %s", url, je)
             return None
-        except Exception as e:
-            # Network error; retry with backoff
-            sleep_s = backoff_factor * (2**attempt) + (random() * 0.1)
-            logger.warning(
-                "GET failed %s: %s; retrying in %.2fs (attempt %d/%d)",
-                url,
-                e,
-                sleep_s,
-                attempt + 1,
-                retries,
-            )
-            time.sleep(sleep_s)
-            attempt += 1
+    # HTTP 400 (Bad Request) - pode ser parâmetros inválidos, não retry
+    if resp.status_code == 400:
+        logger.warning(
+            "HTTP 400 from %s; not retrying (bad request - check parameters)",
+            url,
+        )
+        # Log response body for debugging
+        try:
+            error_body = resp.text[:500]  # First 500 chars
+            logger.debug("HTTP 400 response body: %s", error_body)
+        except Exception:
+            pass
+        return None
+    logger.warning("HTTP %s from %s; giving up", resp.status_code, url)
     return None
 
 
@@ -137,57 +216,12 @@ def get_current_rates() -> Tuple[Decimal, Decimal]:
     """
     Fetch current conversion rates.
 
-    Returns tuple (eth_usd, usd_brl) as Decimals.
-    On failure, returns fallback values.
+    Returns tuple (eth_usd, usd_brl) as Decimals, served from the shared cache
+    maintained by nft.services_rates.
     """
-    # Serve from cache if valid
-    global _RATES_CACHE
-    now = time.time()
-    if _RATES_CACHE is not None:
-        eth_usd_cached, usd_brl_cached, exp = _RATES_CACHE
-        if now < exp:
-            return eth_usd_cached, usd_brl_cached
-    eth_usd: Optional[Decimal] = None
-    usd_brl: Optional[Decimal] = None
+    from .services_rates import get_current_rates as _get_shared_rates
 
-    try:
-        data = _get_json_with_retries(
-            "https://api.coingecko.com/api/v3/simple/price",
-            params={"ids": "ethereum", "vs_currencies": "usd"},
-            timeout=10,
-            retries=3,
-            backoff_factor=0.6,
-        )
-        if isinstance(data, dict):
-            val = (data.get("ethereum") or {}).get("usd")
-            if val is not None:
-                eth_usd = Decimal(str(val))
-    except Exception as e:  # noqa: BLE001 - network exceptions are varied
-        logger.warning("CoinGecko fetch failed: %s", e)
-
-    # AwesomeAPI USD -> BRL
-    try:
-        data = _get_json_with_retries(
-            "https://economia.awesomeapi.com.br/json/last/USD-BRL",
-            timeout=10,
-            retries=5,
-            backoff_factor=0.6,
-        )
-        if isinstance(data, dict):
-            bid = (data.get("USDBRL") or {}).get("bid")
-            if bid is not None:
-                usd_brl = Decimal(str(bid))
-    except Exception as e:  # noqa: BLE001
-        logger.warning("AwesomeAPI fetch failed: %s", e)
-
-    # Fallbacks if any are missing
-    if eth_usd is None:
-        eth_usd = Decimal("4713.59")
-    if usd_brl is None:
-        usd_brl = Decimal("5.42")
-    # Update cache
-    _RATES_CACHE = (eth_usd, usd_brl, now + _RATES_TTL_SECONDS)
-    return eth_usd, usd_brl
+    return _get_shared_rates()
 
 
 def _wei_to_eth(wei: int) -> Decimal:
@@ -213,18 +247,31 @@ def _extract_buy_info(order: Dict[str, Any]) -> Tuple[str, int, int, Optional[st
     return buy_type, quantity_int, decimals, token_address
 
 
+def _fallback_rates() -> Tuple[Decimal, Decimal]:
+    rates = _FALLBACK_RATES.get()
+    if rates is None:
+        from .services_rates import last_known_rates
+
+        rates = last_known_rates()
+    return rates
+
+
 def _convert_order_to_prices(
     order: Dict[str, Any],
     eth_usd: Decimal,
     usd_brl: Decimal,
     *,
     product_code: Optional[str] = None,
+    multiplier: Optional[Decimal] = None,
 ) -> Optional[Tuple[Decimal, Decimal, Decimal]]:
     """Return last_price_eth, last_price_usd, last_price_brl (all with markup applied) for the given order.
     Supports:
       - ETH-denominated orders (18 decimals, convert via eth_usd)
       - ERC20 stablecoins with 6 decimals (treated as USD directly)
     Returns None when token type is unsupported.
+
+    Callers converting many orders of the same product should resolve the markup
+    once and pass it as ``multiplier``; otherwise it is resolved per call.
     """
     try:
         buy_type, qty_int, decimals, _ = _extract_buy_info(order)
@@ -246,8 +293,7 @@ def _convert_order_to_prices(
             # recompute BRL using fallback rates so we never show R$ 0,xx for ~0.07 ETH.
             try:
                 if eth_raw > Decimal("0.01") and price_brl_pre < Decimal("10"):
-                    fallback_eth_usd = Decimal("4713.59")
-                    fallback_usd_brl = Decimal("5.42")
+                    fallback_eth_usd, fallback_usd_brl = _fallback_rates()
                     brl_fb = (
                         float(eth_raw)
                         * float(fallback_eth_usd)
@@ -279,7 +325,11 @@ def _convert_order_to_prices(
             return None
 
         # Apply markup using admin-configured multiplier (round after applying)
-        mult = _get_markup_multiplier_for(product_code)
+        mult = (
+            multiplier
+            if multiplier is not None
+            else _get_markup_multiplier_for(product_code)
+        )
         # ETH: apply markup to raw ETH then quantize to 8 decimals for output
         if buy_type == "ETH":
             price_eth_out = (eth_raw * mult).quantize(
@@ -318,6 +368,7 @@ def pick_best_bid_order(
     best_order: Optional[Dict[str, Any]] = None
     best_prices: Optional[Tuple[Decimal, Decimal, Decimal]] = None
     best_brl: Optional[Decimal] = None
+    mult = _get_markup_multiplier_for(product_code)
 
     for order in orders:
         try:
@@ -328,7 +379,7 @@ def pick_best_bid_order(
             # Skip non-ETH orders to avoid inconsistencies with listing display
             continue
         prices = _convert_order_to_prices(
-            order, eth_usd, usd_brl, product_code=product_code
+            order, eth_usd, usd_brl, product_code=product_code, multiplier=mult
         )
         if prices is None:
             continue
@@ -342,7 +393,7 @@ def pick_best_bid_order(
     if best_order is None:
         for order in orders:
             prices = _convert_order_to_prices(
-                order, eth_usd, usd_brl, product_code=product_code
+                order, eth_usd, usd_brl, product_code=product_code, multiplier=mult
             )
             if prices is None:
                 continue
@@ -404,7 +455,8 @@ def map_order_to_item_fields(
     if override_prices is not None:
         price_eth, price_usd, price_brl = override_prices
     else:
-        price_eth = Decimal("0")
+        # No order (product without listings): prices stay zeroed
+        price_eth = price_usd = price_brl = Decimal("0")
         if order:
             # Try to convert based on buy leg; fallback to ETH path
             conv = _convert_order_to_prices(
@@ -465,8 +517,14 @@ def _paginate_immutable(
     headers: Dict[str, str],
     max_pages: int = 50,
     timeout: int = 30,
+    limiter: Optional[Any] = None,
+    strict: bool = False,
 ) -> List[Dict[str, Any]]:
-    """Fetch all pages from Immutable orders endpoint using cursor."""
+    """Fetch all pages from Immutable orders endpoint using cursor.
+
+    With ``strict`` a page that cannot be fetched raises ImmutableAPIError instead
+    of silently returning the pages collected so far.
+    """
     all_results: List[Dict[str, Any]] = []
     cursor: Optional[str] = None
     for _ in range(max_pages):
@@ -479,8 +537,11 @@ def _paginate_immutable(
             headers=headers,
             timeout=timeout,
             retries=2 if timeout < 10 else 4,  # Menos retries se timeout curto
+            limiter=limiter,
         )
         if not isinstance(data, dict):
+            if strict:
+                raise ImmutableAPIError("Falha ao paginar ordens da Immutable")
             break
         items = data.get("result") or []
         all_results.extend(items)
@@ -503,78 +564,95 @@ def _paginate_immutable(
     return all_results
 
 
-def fetch_7d_sales_stats(product_code: str) -> Dict[str, Any]:
+def _order_timestamp(order: Dict[str, Any]) -> Optional[datetime]:
+    """Best-effort timestamp of an order (epoch seconds or ISO string)."""
+    for key in (
+        "updated_timestamp",
+        "timestamp",
+        "created_timestamp",
+        "filled_timestamp",
+    ):
+        val = order.get(key)
+        if val is None:
+            continue
+        if isinstance(val, (int, float)):
+            return datetime.fromtimestamp(float(val), tz=timezone.utc)
+        # string: numeric seconds or ISO
+        s = str(val)
+        if s.isdigit():
+            return datetime.fromtimestamp(float(s), tz=timezone.utc)
+        try:
+            return datetime.fromisoformat(s.replace("Z", "+00:00"))
+        except Exception:
+            continue
+    return None
+
+
+def fetch_filled_sales(
+    product_code: str, since: datetime, strict: bool = False
+) -> List[Tuple[str, datetime, Decimal]]:
     """
-    Compute 7-day sales stats (volume, count, avg, last sale, change %) for a product_code
-    using filled orders from Immutable.
+    Filled orders (sales) of a product_code from Immutable newer than ``since``.
+
+    Pages are requested oldest update first, so a fetch cut short by the page
+    limit still covers everything up to its newest sale. With ``strict`` a page
+    that cannot be fetched raises ImmutableAPIError instead of returning the
+    sales collected so far.
+
+    Returns (order_id, timestamp, price_brl_with_markup) sorted by timestamp.
     """
-    now = datetime.now(timezone.utc)
-    seven_days_ago = now - timedelta(days=7)
     headers = {"Accept": "application/json", "Content-Type": "application/json"}
     params = {
         "status": "filled",
         # Do not restrict buy token type; we will normalize to BRL
         "sell_metadata": json.dumps({"productCode": [product_code]}),
-        "order_by": "buy_quantity",
+        "order_by": "updated_timestamp",
         "direction": "asc",
         "page_size": 200,
         # Not all deployments may support this filter; we add but still filter client-side
-        "updated_min_timestamp": int(seven_days_ago.timestamp()),
+        "updated_min_timestamp": int(since.timestamp()),
     }
 
     try:
-        results = _paginate_immutable(params, headers)
+        results = _paginate_immutable(params, headers, strict=strict)
     except Exception:
+        if strict:
+            raise
         results = []
 
-    # Rates for conversion
+    # Rates and markup for conversion (resolved once for every order)
     eth_usd, usd_brl = get_current_rates()
+    mult = _get_markup_multiplier_for(product_code)
 
-    sales: List[Tuple[datetime, Decimal]] = []  # (timestamp, price_brl_with_markup)
+    sales: List[Tuple[str, datetime, Decimal]] = []
     for o in results:
         try:
-            # Try to derive a timestamp from fields
-            ts = None
-            for key in (
-                "updated_timestamp",
-                "timestamp",
-                "created_timestamp",
-                "filled_timestamp",
-            ):
-                val = o.get(key)
-                if val is None:
-                    continue
-                if isinstance(val, (int, float)):
-                    ts_candidate = datetime.fromtimestamp(float(val), tz=timezone.utc)
-                else:
-                    # string: numeric seconds or ISO
-                    s = str(val)
-                    if s.isdigit():
-                        ts_candidate = datetime.fromtimestamp(float(s), tz=timezone.utc)
-                    else:
-                        try:
-                            ts_candidate = datetime.fromisoformat(
-                                s.replace("Z", "+00:00")
-                            )
-                        except Exception:
-                            continue
-                ts = ts_candidate
-                break
-            if not ts or ts < seven_days_ago:
+            ts = _order_timestamp(o)
+            if not ts or ts < since:
                 continue
 
             conv = _convert_order_to_prices(
-                o, eth_usd, usd_brl, product_code=product_code
+                o, eth_usd, usd_brl, product_code=product_code, multiplier=mult
             )
             if conv is None:
                 continue
             _, _, price_brl = conv
-            sales.append((ts, price_brl))
+            order_id = str(o.get("id") or o.get("order_id") or "")
+            if not order_id:
+                # Sem id: chave estável para não gravar a mesma venda duas vezes
+                order_id = f"{int(ts.timestamp())}:{price_brl}"
+            sales.append((order_id, ts, price_brl))
         except Exception:
             continue
 
-    sales.sort(key=lambda x: x[0])
+    sales.sort(key=lambda x: x[1])
+    return sales
 
+
+def summarize_sales(
+    sales: List[Tuple[datetime, Decimal]], now: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """7-day metrics from (timestamp, price_brl) sales sorted by timestamp."""
     count = len(sales)
     volume_brl = sum((p for _, p in sales), Decimal("0")) if count else Decimal("0")
     avg_brl = (
@@ -595,12 +673,27 @@ def fetch_7d_sales_stats(product_code: str) -> Dict[str, Any]:
         "seven_day_avg_price_brl": avg_brl,
         "seven_day_last_sale_brl": last_brl,
         "seven_day_price_change_pct": change_pct,
-        "seven_day_updated_at": now,
+        "seven_day_updated_at": now or datetime.now(timezone.utc),
     }
 
 
+def fetch_7d_sales_stats(product_code: str) -> Dict[str, Any]:
+    """
+    Compute 7-day sales stats (volume, count, avg, last sale, change %) for a product_code
+    using filled orders from Immutable.
+
+    Pages through the whole window upstream; for stored items prefer
+    nft.services_history.refresh_seven_day_stats, which only fetches new sales.
+    """
+    now = datetime.now(timezone.utc)
+    sales = fetch_filled_sales(product_code, now - timedelta(days=7))
+    return summarize_sales([(ts, price) for _, ts, price in sales], now)
+
+
 def fetch_item_from_immutable(
     product_code: str,
+    *,
+    limiter: Optional[Any] = None,
 ) -> Tuple[Dict[str, Any], Optional[str]]:
     """
     Orchestrates fetching orders for the given product_code from Immutable,
@@ -628,12 +721,17 @@ def fetch_item_from_immutable(
     last_err: Optional[Exception] = None
     for pp in try_variants:
         try:
-            results = _paginate_immutable(pp, headers)
+            results = _paginate_immutable(pp, headers, limiter=limiter)
             if results:
                 break
             # Even if empty list, confirm the call works by doing a single page fetch
             data = _get_json_with_retries(
-                IMMUTABLE_BASE_URL, params=pp, headers=headers, timeout=30, retries=4
+                IMMUTABLE_BASE_URL,
+                params=pp,
+                headers=headers,
+                timeout=30,
+                retries=4,
+                limiter=limiter,
             )
             if isinstance(data, dict):
                 results = data.get("result") or []
@@ -646,30 +744,10 @@ def fetch_item_from_immutable(
         raise ImmutableAPIError("Erro ao consultar a Immutable") from last_err
 
     eth_usd, usd_brl = get_current_rates()
-    best, prices = pick_best_bid_order(
-        results, eth_usd, usd_brl, product_code=product_code
-    )
-    mapped = map_order_to_item_fields(
-        best, product_code, eth_usd, usd_brl, override_prices=prices
+    mapped, collection_address = _item_fields_from_orders(
+        product_code, results, eth_usd, usd_brl
     )
 
-    # Extract possible collection contract address from the best order
-    collection_address: Optional[str] = None
-    try:
-        if best:
-            sell_data = best.get("sell", {}).get("data", {})
-            addr = (
-                sell_data.get("token_address")
-                or sell_data.get("contract_address")
-                or sell_data.get("token_address_hex")
-            )
-            if not addr:
-                addr = _get_prop(best, "collectionAddress", default="")
-            if isinstance(addr, str) and addr:
-                collection_address = addr
-    except Exception:
-        collection_address = None
-
     logger.info(
         "fetch_item: product_code=%s status=200 orders=%s eth=%s usd=%s brl=%s",
         product_code,
@@ -685,59 +763,43 @@ def fetch_item_from_immutable(
 def fetch_min_listing_prices(
     product_code: str,
     timeout: int = 5,
+    *,
+    limiter: Optional[Any] = None,
 ) -> Optional[Tuple[Decimal, Decimal, Decimal]]:
     """Fetch all active orders and return the minimum (eth, usd, brl) with markup applied,
     mirroring frontend listing conversions.
 
     This uses the same pagination, conversion, and pick_best_bid_order logic as
     fetch_item_from_immutable, ensuring parity with the product page's displayed price.
+    Thin wrapper over ``services_async.afetch_min_listing_prices``.
 
     Args:
         product_code: Código do produto NFT
         timeout: Timeout em segundos para a requisição (padrão: 5s para não bloquear criação de pedido)
+        limiter: Limitador de taxa compartilhado (usado pelas rotinas em lote)
     """
+    from .services_async import afetch_min_listing_prices, run_sync
+
     if not product_code or not str(product_code).strip():
         return None
+    return run_sync(afetch_min_listing_prices(product_code, timeout, limiter=limiter))
 
-    params = {
-        "status": "active",
-        "sell_metadata": json.dumps({"productCode": [product_code]}),
-        "order_by": "buy_quantity",
-        "direction": "asc",
-        "page_size": 200,
-    }
-    headers = {"Accept": "application/json", "Content-Type": "application/json"}
 
-    try_variants = [
-        params,
-        {k: v for k, v in params.items() if k not in ("order_by", "direction")},
-    ]
-    results: List[Dict[str, Any]] = []
-    for pp in try_variants:
-        try:
-            # Usa timeout reduzido e menos retries para não bloquear criação de pedido
-            results = _paginate_immutable(pp, headers, timeout=timeout)
-            if results:
-                break
-            data = _get_json_with_retries(
-                IMMUTABLE_BASE_URL,
-                params=pp,
-                headers=headers,
-                timeout=timeout,
-                retries=2,
-            )
-            if isinstance(data, dict):
-                results = data.get("result") or []
-                break
-        except Exception:
-            continue
-
-    eth_usd, usd_brl = get_current_rates()
+def _min_prices_from_orders(
+    product_code: str,
+    orders: List[Dict[str, Any]],
+    eth_usd: Decimal,
+    usd_brl: Decimal,
+) -> Optional[Tuple[Decimal, Decimal, Decimal]]:
+    """Minimum (eth, usd, brl) with markup across all supported orders, by BRL."""
+    mult = _get_markup_multiplier_for(product_code)
     # Compute minimum across all supported orders by BRL (with markup), mirroring frontend listing map
     best_prices: Optional[Tuple[Decimal, Decimal, Decimal]] = None
     best_brl: Optional[Decimal] = None
-    for o in results:
-        conv = _convert_order_to_prices(o, eth_usd, usd_brl, product_code=product_code)
+    for o in orders:
+        conv = _convert_order_to_prices(
+            o, eth_usd, usd_brl, product_code=product_code, multiplier=mult
+        )
         if conv is None:
             continue
         _, _, brl = conv
@@ -745,3 +807,114 @@ def fetch_min_listing_prices(
             best_brl = brl
             best_prices = conv
     return best_prices
+
+
+def _item_fields_from_orders(
+    product_code: str,
+    orders: List[Dict[str, Any]],
+    eth_usd: Decimal,
+    usd_brl: Decimal,
+) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Pick the best order of a product and map it to NFTItem fields.
+
+    Returns (mapped_fields, collection_address).
+    """
+    best, prices = pick_best_bid_order(
+        orders, eth_usd, usd_brl, product_code=product_code
+    )
+    mapped = map_order_to_item_fields(
+        best, product_code, eth_usd, usd_brl, override_prices=prices
+    )
+
+    # Extract possible collection contract address from the best order
+    collection_address: Optional[str] = None
+    try:
+        if best:
+            sell_data = best.get("sell", {}).get("data", {})
+            addr = (
+                sell_data.get("token_address")
+                or sell_data.get("contract_address")
+                or sell_data.get("token_address_hex")
+            )
+            if not addr:
+                addr = _get_prop(best, "collectionAddress", default="")
+            if isinstance(addr, str) and addr:
+                collection_address = addr
+    except Exception:
+        collection_address = None
+
+    return mapped, collection_address
+
+
+def _chunks(values: List[str], size: int) -> Iterator[List[str]]:
+    for i in range(0, len(values), size):
+        yield values[i : i + size]
+
+
+def fetch_active_orders_by_product(
+    product_codes: List[str],
+    *,
+    chunk_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    timeout: int = 30,
+    limiter: Optional[Any] = None,
+) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, str]]:
+    """
+    Fetch the active orders of many products at once, grouped by productCode.
+
+    The ``sell_metadata`` filter accepts a list of product codes, so each chunk of
+    ``chunk_size`` codes (default: NFT_IMMUTABLE_CODES_PER_REQUEST) is paginated
+    once instead of once per product and per caller; up to ``concurrency`` chunks
+    (default: NFT_PRICE_REFRESH_CONCURRENCY) are fetched at the same time.
+
+    Chunks are ordered by ``buy_quantity`` like the single-product query. When a
+    chunk fails, its codes are fetched one by one (with the ordered and unordered
+    variants), so one bad page does not fail the whole chunk.
+
+    Returns (orders_by_code, errors_by_code). Every requested code that could be
+    fetched is present in ``orders_by_code`` (possibly with an empty list); codes
+    that failed even on their own are reported in ``errors_by_code`` instead.
+    """
+    from .services_async import afetch_active_orders_by_product, run_sync
+
+    return run_sync(
+        afetch_active_orders_by_product(
+            product_codes,
+            chunk_size=chunk_size,
+            concurrency=concurrency,
+            timeout=timeout,
+            limiter=limiter,
+        ),
+        max_workers=concurrency,
+    )
+
+
+def fetch_items_from_immutable(
+    product_codes: List[str],
+    *,
+    chunk_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    timeout: int = 30,
+    limiter: Optional[Any] = None,
+) -> Tuple[Dict[str, Tuple[Dict[str, Any], Optional[str]]], Dict[str, str]]:
+    """
+    Batched equivalent of fetch_item_from_immutable + fetch_min_listing_prices.
+
+    Active orders are downloaded once per chunk of products; for each product the
+    mapped NFTItem fields come from the best order and the price fields are
+    overridden by the minimum listing, exactly as the single-product callers do.
+
+    Returns ({product_code: (mapped_fields, collection_address)}, errors_by_code).
+    """
+    from .services_async import afetch_items_from_immutable, run_sync
+
+    return run_sync(
+        afetch_items_from_immutable(
+            product_codes,
+            chunk_size=chunk_size,
+            concurrency=concurrency,
+            timeout=timeout,
+            limiter=limiter,
+        ),
+        max_workers=concurrency,
+    )
@@ -0,0 +1,276 @@
+"""
+Registro de acessos aos NFTs em buffer, gravado em lote.
+
+A view de registro de acesso só empilha o evento bruto (id/product_code, IP,
+user agent e horário) e responde; toda a parte cara fica para o flush:
+
+- com ``REDIS_URL`` os eventos vão para uma lista no Redis (limitada a
+  ``NFT_ACCESS_BUFFER_MAX``), esvaziada pela task periódica
+  ``nft.tasks.flush_nft_accesses``;
+- sem Redis (dev) ficam num ring buffer em memória do processo, esvaziado por
+  uma thread do próprio processo quando enche ou envelhece;
+- no flush os itens são resolvidos em uma consulta, IP/UA viram hashes, acessos
+  repetidos do mesmo IP ao mesmo item dentro de ``NFT_ACCESS_DEDUP_WINDOW``
+  são descartados e o restante é gravado com um ``bulk_create``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Deque, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .models import NFTItem, NFTItemAccess
+
+logger = logging.getLogger(__name__)
+
+
+ACCESS_BUFFER_KEY = "nft:access:buffer"
+SEEN_KEY_PREFIX = "nft:access:seen"
+
+
+def _setting(name: str, default: Any) -> Any:
+    return getattr(settings, name, default)
+
+
+def _hash(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest() if value else ""
+
+
+# ---------------------------------------------------------------------------
+# Buffers
+# ---------------------------------------------------------------------------
+
+
+class RedisAccessBuffer:
+    """Lista no Redis compartilhada por todos os processos."""
+
+    def __init__(self, url: str) -> None:
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def push(self, event: Dict[str, Any]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.rpush(ACCESS_BUFFER_KEY, json.dumps(event, separators=(",", ":")))
+        # Ring buffer: sob carga extrema descarta os eventos mais antigos
+        pipe.ltrim(
+            ACCESS_BUFFER_KEY, -int(_setting("NFT_ACCESS_BUFFER_MAX", 100000)), -1
+        )
+        pipe.execute()
+
+    def pop(self, count: int) -> List[Dict[str, Any]]:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.lrange(ACCESS_BUFFER_KEY, 0, count - 1)
+        pipe.ltrim(ACCESS_BUFFER_KEY, count, -1)
+        raw, _ = pipe.execute()
+        return [json.loads(item) for item in raw]
+
+    def requeue(self, events: List[Dict[str, Any]]) -> None:
+        if events:
+            self.client.lpush(
+                ACCESS_BUFFER_KEY,
+                *[json.dumps(e, separators=(",", ":")) for e in reversed(events)],
+            )
+
+    def size(self) -> int:
+        return int(self.client.llen(ACCESS_BUFFER_KEY))
+
+
+class MemoryAccessBuffer:
+    """Ring buffer do processo atual (dev); o próprio processo faz o flush."""
+
+    def __init__(self) -> None:
+        self.events: Deque[Dict[str, Any]] = deque(
+            maxlen=int(_setting("NFT_ACCESS_BUFFER_MAX", 100000))
+        )
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+        self.flushing = False
+
+    def push(self, event: Dict[str, Any]) -> None:
+        with self.lock:
+            self.events.append(event)
+            due = len(self.events) >= int(
+                _setting("NFT_ACCESS_FLUSH_BATCH", 1000)
+            ) or time.monotonic() - self.last_flush >= float(
+                _setting("NFT_ACCESS_MEMORY_FLUSH_INTERVAL", 30)
+            )
+            if not due or self.flushing:
+                return
+            self.flushing = True
+        threading.Thread(
+            target=self._flush_in_background, name="nft-access-flush", daemon=True
+        ).start()
+
+    def _flush_in_background(self) -> None:
+        try:
+            flush_access_buffer()
+        except Exception as e:  # noqa: BLE001 - thread de background
+            logger.error("Falha no flush dos acessos em memória: %s", e)
+        finally:
+            with self.lock:
+                self.flushing = False
+                self.last_flush = time.monotonic()
+            connections.close_all()
+
+    def pop(self, count: int) -> List[Dict[str, Any]]:
+        with self.lock:
+            return [self.events.popleft() for _ in range(min(count, len(self.events)))]
+
+    def requeue(self, events: List[Dict[str, Any]]) -> None:
+        with self.lock:
+            self.events.extendleft(reversed(events))
+
+    def size(self) -> int:
+        return len(self.events)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_access_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                url = _setting("REDIS_URL", None)
+                _buffer = RedisAccessBuffer(url) if url else MemoryAccessBuffer()
+    return _buffer
+
+
+# ---------------------------------------------------------------------------
+# Ingestão
+# ---------------------------------------------------------------------------
+
+
+def record_access(
+    *,
+    item_id: Optional[int] = None,
+    product_code: Optional[str] = None,
+    ip: str = "",
+    user_agent: str = "",
+) -> None:
+    """Enfileira um acesso (sem consultas ao banco nem hashing)."""
+    event = {
+        "i": item_id,
+        "p": product_code or None,
+        "ip": ip,
+        "ua": user_agent,
+        "t": time.time(),
+    }
+    try:
+        get_access_buffer().push(event)
+    except Exception as e:  # noqa: BLE001 - Redis indisponível não quebra a página
+        logger.warning("Não foi possível enfileirar o acesso: %s", e)
+
+
+# ---------------------------------------------------------------------------
+# Flush
+# ---------------------------------------------------------------------------
+
+
+def _resolve_items(events: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Mapa "i:<id>"/"p:<product_code>" -> id dos itens existentes."""
+    ids = {e["i"] for e in events if e.get("i")}
+    codes = {e["p"] for e in events if not e.get("i") and e.get("p")}
+    resolved: Dict[str, int] = {}
+    if ids:
+        for pk in NFTItem.objects.filter(id__in=ids).values_list("id", flat=True):
+            resolved[f"i:{pk}"] = pk
+    if codes:
+        for code, pk in NFTItem.objects.filter(product_code__in=codes).values_list(
+            "product_code", "id"
+        ):
+            resolved[f"p:{code}"] = pk
+    return resolved
+
+
+def _write_events(events: List[Dict[str, Any]]) -> Dict[str, int]:
+    window = int(_setting("NFT_ACCESS_DEDUP_WINDOW", 30 * 60))
+    resolved = _resolve_items(events)
+
+    rows: Dict[str, NFTItemAccess] = {}
+    anonymous: List[NFTItemAccess] = []
+    unknown = duplicates = 0
+    for event in events:
+        ref = f"i:{event['i']}" if event.get("i") else f"p:{event.get('p')}"
+        item_id = resolved.get(ref)
+        if item_id is None:
+            unknown += 1
+            continue
+        ip_hash = _hash(event.get("ip") or "")
+        access = NFTItemAccess(
+            item_id=item_id,
+            ip_hash=ip_hash,
+            user_agent_hash=_hash(event.get("ua") or ""),
+            accessed_at=datetime.fromtimestamp(event["t"], tz=dt_timezone.utc),
+        )
+        if not ip_hash:
+            # Sem IP não há como deduplicar
+            anonymous.append(access)
+            continue
+        bucket = int(event["t"] // window)
+        key = f"{SEEN_KEY_PREFIX}:{item_id}:{ip_hash[:32]}:{bucket}"
+        if key in rows:
+            duplicates += 1
+            continue
+        rows[key] = access
+
+    # Acessos já gravados em flushes anteriores na mesma janela
+    if rows:
+        seen = cache.get_many(list(rows.keys()))
+        for key in seen:
+            rows.pop(key)
+            duplicates += 1
+
+    to_create = list(rows.values()) + anonymous
+    if to_create:
+        NFTItemAccess.objects.bulk_create(to_create, batch_size=500)
+    if rows:
+        cache.set_many(dict.fromkeys(rows.keys(), 1), timeout=window * 2)
+    return {"written": len(to_create), "duplicates": duplicates, "unknown": unknown}
+
+
+def flush_access_buffer(max_events: Optional[int] = None) -> Dict[str, int]:
+    """
+    Grava os acessos pendentes em lotes de ``NFT_ACCESS_FLUSH_BATCH``.
+
+    Em caso de erro no banco o lote atual volta para o início do buffer.
+    """
+    batch_size = int(_setting("NFT_ACCESS_FLUSH_BATCH", 1000))
+    max_events = max_events or batch_size * 20
+    buffer = get_access_buffer()
+    totals = {"received": 0, "written": 0, "duplicates": 0, "unknown": 0}
+    while totals["received"] < max_events:
+        events = buffer.pop(min(batch_size, max_events - totals["received"]))
+        if not events:
+            break
+        try:
+            result = _write_events(events)
+        except Exception:
+            buffer.requeue(events)
+            raise
+        totals["received"] += len(events)
+        for key, value in result.items():
+            totals[key] += value
+    if totals["received"]:
+        logger.info(
+            "Acessos gravados: %d recebidos, %d gravados, %d duplicados, "
+            "%d de itens inexistentes",
+            totals["received"],
+            totals["written"],
+            totals["duplicates"],
+            totals["unknown"],
+        )
+    return totals
@@ -0,0 +1,488 @@
+"""
+Variante assíncrona do pipeline de preços da Immutable.
+
+Permite que rotinas em lote (atualização noturna, ações do admin, comando
+``nft_tasks``) disparem centenas de consultas a partir de um único worker sob um
+limite de concorrência. As requisições usam as sessões com pool de
+``core.http_client`` em threads (``asyncio.to_thread``) e os backoffs entre
+tentativas são ``asyncio.sleep``, sem bloquear as demais consultas.
+
+As funções síncronas de ``nft.services`` (``fetch_min_listing_prices``,
+``fetch_active_orders_by_product``, ``fetch_items_from_immutable``) são wrappers
+finos destas via ``run_sync``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from random import random
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from django.conf import settings
+from django.db import connections
+
+from core import http_client
+
+from .services import (
+    _ACTIVE_MARKUP,
+    _FALLBACK_RATES,
+    IMMUTABLE_BASE_URL,
+    ImmutableAPIError,
+    MarkupResolver,
+    _chunks,
+    _get_prop,
+    _item_fields_from_orders,
+    _min_prices_from_orders,
+    get_current_rates,
+)
+from .services_rates import bootstrap_rates, last_known_rates
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+Prices = Tuple[Decimal, Decimal, Decimal]
+
+IMMUTABLE_HEADERS = {"Accept": "application/json", "Content-Type": "application/json"}
+
+
+def _default_concurrency() -> int:
+    return int(getattr(settings, "NFT_PRICE_REFRESH_CONCURRENCY", 8))
+
+
+def run_sync(coro: Awaitable[T], *, max_workers: Optional[int] = None) -> T:
+    """Executa uma corrotina a partir de código síncrono.
+
+    O contexto atual (ex.: o snapshot de ``markup_pass``) é propagado. Quando já
+    existe um event loop na thread, a corrotina roda em uma thread auxiliar.
+    ``max_workers`` dimensiona o executor usado pelas chamadas bloqueantes.
+    """
+
+    async def _main() -> T:
+        if max_workers:
+            asyncio.get_running_loop().set_default_executor(
+                ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix="nft-async"
+                )
+            )
+        return await coro
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_main())
+
+    ctx = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(ctx.run, asyncio.run, _main()).result()
+
+
+async def _get_json_with_retries(
+    url: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: int = 30,
+    retries: int = 4,
+    backoff_factor: float = 0.5,
+    status_forcelist: Tuple[int, ...] = http_client.RETRY_STATUSES,
+    limiter: Optional[Any] = None,
+) -> Optional[Any]:
+    """Async counterpart of ``nft.services._get_json_with_retries``.
+
+    Each attempt runs in a worker thread; the backoff between attempts yields to
+    the event loop. Returns parsed JSON on success, or None on repeated failure.
+    """
+    merged_headers = {"Accept": "application/json", **(headers or {})}
+    for attempt in range(max(1, retries)):
+        last_attempt = attempt + 1 >= retries
+        if limiter is not None:
+            await limiter.aacquire()
+        try:
+            resp = await asyncio.to_thread(
+                http_client.request,
+                "GET",
+                url,
+                params=params,
+                headers=merged_headers,
+                timeout=timeout,
+                retries=1,
+            )
+        except Exception as e:  # noqa: BLE001 - network exceptions are varied
+            if last_attempt:
+                logger.warning("GET failed %s after %d attempts: %s", url, retries, e)
+                return None
+            sleep_s = backoff_factor * (2**attempt) + (random() * 0.1)
+            logger.warning(
+                "GET failed %s: %s; retrying in %.2fs (attempt %d/%d)",
+                url,
+                e,
+                sleep_s,
+                attempt + 1,
+                retries,
+            )
+            await asyncio.sleep(sleep_s)
+            continue
+
+        if resp.status_code == 200:
+            if limiter is not None:
+                limiter.on_success()
+            try:
+                return resp.json()
+            except Exception as je:  # malformed JSON
+                logger.warning("JSON decode failed from %s: %s", url, je)
+                return None
+        if resp.status_code in status_forcelist:
+            if resp.status_code == 429 and limiter is not None:
+                limiter.on_throttled()
+            if last_attempt:
+                break
+            sleep_s = backoff_factor * (2**attempt) + (random() * 0.1)
+            logger.warning(
+                "HTTP %s from %s; retrying in %.2fs (attempt %d/%d)",
+                resp.status_code,
+                url,
+                sleep_s,
+                attempt + 1,
+                retries,
+            )
+            await asyncio.sleep(sleep_s)
+            continue
+        logger.warning("HTTP %s from %s; not retrying", resp.status_code, url)
+        return None
+    return None
+
+
+async def _paginate_immutable(
+    params: Dict[str, Any],
+    headers: Dict[str, str],
+    max_pages: int = 50,
+    timeout: int = 30,
+    limiter: Optional[Any] = None,
+    strict: bool = False,
+) -> List[Dict[str, Any]]:
+    """Async counterpart of ``nft.services._paginate_immutable``."""
+    all_results: List[Dict[str, Any]] = []
+    cursor: Optional[str] = None
+    for _ in range(max_pages):
+        page_params = params.copy()
+        if cursor:
+            page_params["cursor"] = cursor
+        data = await _get_json_with_retries(
+            IMMUTABLE_BASE_URL,
+            params=page_params,
+            headers=headers,
+            timeout=timeout,
+            retries=2 if timeout < 10 else 4,  # Menos retries se timeout curto
+            limiter=limiter,
+        )
+        if not isinstance(data, dict):
+            if strict:
+                raise ImmutableAPIError("Falha ao paginar ordens da Immutable")
+            break
+        all_results.extend(data.get("result") or [])
+
+        def _nc(obj: Any) -> Optional[str]:
+            if isinstance(obj, dict):
+                return obj.get("next_cursor")
+            return None
+
+        cursor = (
+            data.get("next_cursor")
+            or _nc(data.get("cursor"))
+            or _nc(data.get("page_cursor"))
+            or _nc(data.get("page"))
+        )
+        if not cursor:
+            break
+    return all_results
+
+
+def _orm_call(func: Callable[[], T]) -> T:
+    """Executa ``func`` (que usa o ORM) numa thread do executor.
+
+    As conexões do Django são por thread: as abertas aqui são fechadas ao final
+    para não ficarem penduradas nas threads do pool.
+    """
+    try:
+        return func()
+    finally:
+        connections.close_all()
+
+
+async def aget_current_rates() -> Tuple[Decimal, Decimal]:
+    """(eth_usd, usd_brl) do cache compartilhado, sem bloquear o event loop."""
+    return await asyncio.to_thread(_orm_call, get_current_rates)
+
+
+async def _enter_markup_pass() -> (
+    List[Tuple[contextvars.ContextVar, contextvars.Token]]
+):
+    """Garante na task atual os snapshots de markups e da cotação de fallback.
+
+    Ambos usam o ORM e são carregados numa thread: a conversão dos preços roda
+    no event loop, onde uma consulta levantaria ``SynchronousOnlyOperation``.
+    """
+    tokens: List[Tuple[contextvars.ContextVar, contextvars.Token]] = []
+    if _ACTIVE_MARKUP.get() is None:
+        try:
+            resolver = await asyncio.to_thread(_orm_call, MarkupResolver.load)
+        except Exception:
+            logger.warning("Falha ao carregar markups; usando padrão", exc_info=True)
+            resolver = MarkupResolver()
+        tokens.append((_ACTIVE_MARKUP, _ACTIVE_MARKUP.set(resolver)))
+    if _FALLBACK_RATES.get() is None:
+        try:
+            rates = await asyncio.to_thread(_orm_call, last_known_rates)
+        except Exception:
+            logger.warning("Falha ao carregar a cotação de fallback", exc_info=True)
+            rates = bootstrap_rates()
+        tokens.append((_FALLBACK_RATES, _FALLBACK_RATES.set(rates)))
+    return tokens
+
+
+def _exit_markup_pass(
+    tokens: List[Tuple[contextvars.ContextVar, contextvars.Token]],
+) -> None:
+    for var, token in reversed(tokens):
+        var.reset(token)
+
+
+async def _fetch_active_orders(
+    product_code: str,
+    timeout: int,
+    limiter: Optional[Any],
+    *,
+    strict: bool = False,
+) -> List[Dict[str, Any]]:
+    """Ordens ativas de um produto (com e sem ordenação, como na versão síncrona).
+
+    Com ``strict`` levanta ``ImmutableAPIError`` quando nenhuma variante da
+    consulta respondeu, em vez de devolver a lista vazia de "sem listagens".
+    """
+    params = {
+        "status": "active",
+        "sell_metadata": json.dumps({"productCode": [product_code]}),
+        "order_by": "buy_quantity",
+        "direction": "asc",
+        "page_size": 200,
+    }
+    try_variants = [
+        params,
+        {k: v for k, v in params.items() if k not in ("order_by", "direction")},
+    ]
+    results: List[Dict[str, Any]] = []
+    fetched = False
+    for pp in try_variants:
+        try:
+            results = await _paginate_immutable(
+                pp, IMMUTABLE_HEADERS, timeout=timeout, limiter=limiter
+            )
+            if results:
+                fetched = True
+                break
+            data = await _get_json_with_retries(
+                IMMUTABLE_BASE_URL,
+                params=pp,
+                headers=IMMUTABLE_HEADERS,
+                timeout=timeout,
+                retries=2,
+                limiter=limiter,
+            )
+            if isinstance(data, dict):
+                results = data.get("result") or []
+                fetched = True
+                break
+        except Exception:
+            continue
+    if strict and not fetched:
+        raise ImmutableAPIError(f"Falha ao consultar ordens de {product_code}")
+    return results
+
+
+async def afetch_min_listing_prices(
+    product_code: str,
+    timeout: int = 5,
+    *,
+    limiter: Optional[Any] = None,
+    rates: Optional[Tuple[Decimal, Decimal]] = None,
+) -> Optional[Prices]:
+    """Async counterpart of ``nft.services.fetch_min_listing_prices``."""
+    if not product_code or not str(product_code).strip():
+        return None
+    results = await _fetch_active_orders(product_code, timeout, limiter)
+    eth_usd, usd_brl = rates or await aget_current_rates()
+    tokens = await _enter_markup_pass()
+    try:
+        return _min_prices_from_orders(product_code, results, eth_usd, usd_brl)
+    finally:
+        _exit_markup_pass(tokens)
+
+
+async def afetch_min_listing_prices_many(
+    product_codes: List[str],
+    *,
+    timeout: int = 5,
+    concurrency: Optional[int] = None,
+    limiter: Optional[Any] = None,
+) -> Dict[str, Optional[Prices]]:
+    """Menor preço de listagem de vários produtos, até ``concurrency`` por vez."""
+    codes = list(dict.fromkeys(c for c in product_codes if c and str(c).strip()))
+    rates = await aget_current_rates()
+    tokens = await _enter_markup_pass()
+    semaphore = asyncio.Semaphore(max(1, concurrency or _default_concurrency()))
+
+    async def _one(code: str) -> Optional[Prices]:
+        async with semaphore:
+            try:
+                return await afetch_min_listing_prices(
+                    code, timeout, limiter=limiter, rates=rates
+                )
+            except Exception as e:  # noqa: BLE001 - cada produto falha isoladamente
+                logger.warning("Falha ao buscar menor preço de %s: %s", code, e)
+                return None
+
+    try:
+        prices = await asyncio.gather(*(_one(code) for code in codes))
+    finally:
+        _exit_markup_pass(tokens)
+    return dict(zip(codes, prices))
+
+
+async def afetch_active_orders_by_product(
+    product_codes: List[str],
+    *,
+    chunk_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    timeout: int = 30,
+    limiter: Optional[Any] = None,
+) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, str]]:
+    """Async counterpart of ``nft.services.fetch_active_orders_by_product``.
+
+    Chunks of ``chunk_size`` product codes are paginated concurrently, at most
+    ``concurrency`` at a time.
+    """
+    codes = list(
+        dict.fromkeys(str(c).strip() for c in product_codes if c and str(c).strip())
+    )
+    size = chunk_size or int(getattr(settings, "NFT_IMMUTABLE_CODES_PER_REQUEST", 20))
+    semaphore = asyncio.Semaphore(max(1, concurrency or _default_concurrency()))
+
+    async def _one(code: str) -> Tuple[Dict[str, List], Dict[str, str]]:
+        async with semaphore:
+            try:
+                orders = await _fetch_active_orders(code, timeout, limiter, strict=True)
+            except Exception as e:  # noqa: BLE001 - cada produto falha isoladamente
+                return {}, {code: str(e)}
+        return {code: orders}, {}
+
+    async def _chunk(chunk: List[str]) -> Tuple[Dict[str, List], Dict[str, str]]:
+        # Mesma ordenação da consulta individual: com a paginação truncada
+        # (max_pages) as listagens mais baratas continuam dentro do resultado
+        params = {
+            "status": "active",
+            "sell_metadata": json.dumps({"productCode": chunk}),
+            "order_by": "buy_quantity",
+            "direction": "asc",
+            "page_size": 200,
+        }
+        results: Optional[List[Dict[str, Any]]]
+        async with semaphore:
+            try:
+                results = await _paginate_immutable(
+                    params,
+                    IMMUTABLE_HEADERS,
+                    # Same page budget per product as the single-product fetch
+                    max_pages=50 * len(chunk),
+                    timeout=timeout,
+                    limiter=limiter,
+                    strict=True,
+                )
+            except Exception as e:  # noqa: BLE001 - refeito produto a produto
+                results = None
+                logger.warning(
+                    "Immutable batch fetch failed for %d products: %s; "
+                    "retrying one product at a time",
+                    len(chunk),
+                    e,
+                )
+
+        if results is None:
+            # Uma página com falha não derruba o lote inteiro: cada produto é
+            # consultado sozinho (com as variantes com e sem ordenação)
+            by_code: Dict[str, List[Dict[str, Any]]] = {}
+            chunk_errors: Dict[str, str] = {}
+            for orders, code_errors in await asyncio.gather(
+                *(_one(code) for code in chunk)
+            ):
+                by_code.update(orders)
+                chunk_errors.update(code_errors)
+            return by_code, chunk_errors
+
+        bucket: Dict[str, List[Dict[str, Any]]] = {code: [] for code in chunk}
+        for order in results:
+            code = str(_get_prop(order, "productCode", default="") or "")
+            if code in bucket:
+                bucket[code].append(order)
+        logger.info(
+            "fetch_active_orders_by_product: %d products, %d orders",
+            len(chunk),
+            len(results),
+        )
+        return bucket, {}
+
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    errors: Dict[str, str] = {}
+    for bucket, chunk_errors in await asyncio.gather(
+        *(_chunk(chunk) for chunk in _chunks(codes, max(1, size)))
+    ):
+        grouped.update(bucket)
+        errors.update(chunk_errors)
+    return grouped, errors
+
+
+async def afetch_items_from_immutable(
+    product_codes: List[str],
+    *,
+    chunk_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    timeout: int = 30,
+    limiter: Optional[Any] = None,
+) -> Tuple[Dict[str, Tuple[Dict[str, Any], Optional[str]]], Dict[str, str]]:
+    """Async counterpart of ``nft.services.fetch_items_from_immutable``."""
+    rates_task = asyncio.ensure_future(aget_current_rates())
+    orders_by_code, errors = await afetch_active_orders_by_product(
+        product_codes,
+        chunk_size=chunk_size,
+        concurrency=concurrency,
+        timeout=timeout,
+        limiter=limiter,
+    )
+    eth_usd, usd_brl = await rates_task
+
+    items: Dict[str, Tuple[Dict[str, Any], Optional[str]]] = {}
+    tokens = await _enter_markup_pass()
+    try:
+        for code, orders in orders_by_code.items():
+            try:
+                mapped, collection_address = _item_fields_from_orders(
+                    code, orders, eth_usd, usd_brl
+                )
+                min_prices = _min_prices_from_orders(code, orders, eth_usd, usd_brl)
+                if min_prices is not None:
+                    pe, pu, pb = min_prices
+                    mapped["last_price_eth"] = pe
+                    mapped["last_price_usd"] = pu
+                    mapped["last_price_brl"] = pb
+                items[code] = (mapped, collection_address)
+            except Exception as e:  # noqa: BLE001 - isolated per product
+                logger.warning("Failed to map Immutable orders for %s: %s", code, e)
+                errors[code] = str(e)
+    finally:
+        _exit_markup_pass(tokens)
+    return items, errors
@@ -0,0 +1,163 @@
+"""
+Revalidação de preços dos NFTs na criação de pedidos.
+
+O menor preço de listagem de cada produto fica num cache curto
+(``NFT_CHECKOUT_PRICE_TTL``) compartilhado com a página do produto: o upsert por
+``product_code`` grava ali o preço que acabou de exibir, então um checkout logo
+depois não volta à Immutable.
+
+Os produtos sem preço em cache são consultados em paralelo num pool de threads
+dedicado, todos sob um único prazo (``NFT_CHECKOUT_PRICE_DEADLINE``). O que não
+responder dentro do prazo volta como ``None`` e o chamador usa o preço do banco:
+consultas que ainda esperavam na fila do pool são canceladas e as que estão em
+andamento param (timeouts, retries e backoff) no que resta do prazo, para não
+ocupar o pool dos próximos checkouts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from decimal import Decimal
+from threading import Lock
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+CHECKOUT_PRICE_PREFIX = "nft:checkout-price"
+
+Prices = Tuple[Decimal, Decimal, Decimal]
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = Lock()
+
+
+def _setting(name: str, default: Any) -> Any:
+    return getattr(settings, name, default)
+
+
+def _price_key(product_code: str) -> str:
+    return f"{CHECKOUT_PRICE_PREFIX}:{product_code}"
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Pool do processo, reaproveitado entre requisições."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(_setting("NFT_CHECKOUT_PRICE_CONCURRENCY", 8)),
+                thread_name_prefix="nft-checkout",
+            )
+        return _executor
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+
+def store_listing_price(product_code: str, prices: Optional[Prices]) -> None:
+    """
+    Guarda o menor preço (eth, usd, brl) de um produto para o checkout.
+
+    Preços não positivos (produto sem listagens) não são guardados: o checkout
+    volta ao preço do banco em vez de cobrar zero.
+    """
+    if not product_code or not prices or prices[2] is None or prices[2] <= 0:
+        return
+    cache.set(
+        _price_key(product_code),
+        tuple(prices),
+        timeout=int(_setting("NFT_CHECKOUT_PRICE_TTL", 60)),
+    )
+
+
+def get_cached_listing_prices(
+    product_codes: Iterable[str],
+) -> Dict[str, Prices]:
+    """Preços em cache dos produtos informados (ausentes ficam de fora)."""
+    codes = [c for c in dict.fromkeys(product_codes) if c]
+    if not codes:
+        return {}
+    found = cache.get_many([_price_key(c) for c in codes])
+    return {c: found[_price_key(c)] for c in codes if _price_key(c) in found}
+
+
+# ---------------------------------------------------------------------------
+# Consulta com prazo
+# ---------------------------------------------------------------------------
+
+
+def _fetch_and_store(product_code: str, expires_at: float) -> Optional[Prices]:
+    from .services_async import afetch_min_listing_prices, run_sync
+
+    try:
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0:
+            # Saiu da fila depois do prazo: o checkout já seguiu com o banco
+            return None
+        # Timeouts, retries e backoff limitados ao que resta do prazo
+        prices = run_sync(
+            asyncio.wait_for(
+                afetch_min_listing_prices(product_code, max(1.0, remaining)),
+                timeout=remaining,
+            )
+        )
+        store_listing_price(product_code, prices)
+        return prices
+    finally:
+        # Conexões abertas pelo markup nesta thread do pool
+        connections.close_all()
+
+
+def get_checkout_prices(
+    product_codes: Iterable[str],
+    deadline: Optional[float] = None,
+) -> Dict[str, Optional[Prices]]:
+    """
+    Menor preço de listagem atual de cada produto, em até ``deadline`` segundos.
+
+    Preços em cache são usados direto; os demais são buscados em paralelo. Um
+    produto que falhou ou não respondeu no prazo vem como ``None``.
+    """
+    codes = [c for c in dict.fromkeys(product_codes) if c and str(c).strip()]
+    if deadline is None:
+        deadline = float(_setting("NFT_CHECKOUT_PRICE_DEADLINE", 4))
+    started = time.monotonic()
+
+    prices: Dict[str, Optional[Prices]] = dict.fromkeys(codes)
+    prices.update(get_cached_listing_prices(codes))
+    missing = [c for c in codes if prices[c] is None]
+    if not missing:
+        return prices
+
+    expires_at = started + deadline
+    executor = _get_executor()
+    futures: Dict[Future, str] = {
+        executor.submit(_fetch_and_store, code, expires_at): code for code in missing
+    }
+    done, pending = wait(futures, timeout=max(0.0, expires_at - time.monotonic()))
+    for future in done:
+        code = futures[future]
+        try:
+            prices[code] = future.result()
+        except Exception as e:  # noqa: BLE001 - cada produto falha isoladamente
+            logger.warning("Falha ao revalidar preço de %s: %s", code, e)
+    for future in pending:
+        # Só cancela o que ainda não começou; as em andamento param no prazo
+        future.cancel()
+    if pending:
+        logger.warning(
+            "Prazo de %.1fs excedido na revalidação de preços: %s",
+            deadline,
+            ", ".join(sorted(futures[f] for f in pending)),
+        )
+    return prices
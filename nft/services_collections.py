@@ -0,0 +1,118 @@
+"""
+Agregados das coleções derivados dos NFTs do catálogo.
+
+``NftCollection`` guarda quantidade de itens, floor (menor ``last_price_brl``)
+e volume de 7 dias dos seus ``NFTItem``. Os valores são recalculados só para
+as coleções tocadas por cada gravação (lote da atualização de preços, sync da
+SecureHabbo, métricas de 7 dias, save/delete de itens) com uma consulta
+agrupada que localiza os itens pelo índice ``nft_item_coll_price_idx``.
+
+As estatísticas globais das coleções saem de um único snapshot em cache,
+invalidado junto com o version stamp do catálogo.
+"""
+
+from __future__ import annotations
+
+import logging
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, Min, Q, Sum
+from django.utils import timezone
+
+from .cache import get_catalog_version
+from .models import NFTItem, NftCollection
+
+logger = logging.getLogger(__name__)
+
+
+STATS_CACHE_PREFIX = "nft:collections:stats"
+STATS_CACHE_TTL = 10 * 60
+AGGREGATE_FIELDS = [
+    "nft_items_count",
+    "floor_price_brl",
+    "seven_day_volume_brl",
+    "aggregates_updated_at",
+]
+CHUNK_SIZE = 500
+
+
+def _refresh_chunk(collection_ids: List[int]) -> int:
+    rows = {
+        row["collection_id"]: row
+        for row in NFTItem.objects.filter(collection_id__in=collection_ids)
+        .values("collection_id")
+        .annotate(
+            count=Count("id"),
+            floor=Min("last_price_brl", filter=Q(last_price_brl__gt=0)),
+            volume=Sum("seven_day_volume_brl"),
+        )
+        .order_by()
+    }
+    now = timezone.now()
+    collections = []
+    for collection_id in collection_ids:
+        row = rows.get(collection_id, {})
+        collections.append(
+            NftCollection(
+                id=collection_id,
+                nft_items_count=row.get("count") or 0,
+                floor_price_brl=row.get("floor"),
+                seven_day_volume_brl=row.get("volume") or Decimal("0"),
+                aggregates_updated_at=now,
+            )
+        )
+    # bulk_update não dispara post_save (nem o save() que gera o slug)
+    NftCollection.objects.bulk_update(collections, AGGREGATE_FIELDS)
+    return len(collections)
+
+
+def refresh_collection_aggregates(
+    collection_ids: Optional[Iterable[Optional[int]]] = None,
+) -> int:
+    """
+    Recalcula os agregados das coleções informadas (None = todas).
+
+    Retorna quantas coleções foram atualizadas.
+    """
+    if collection_ids is None:
+        ids = list(NftCollection.objects.values_list("id", flat=True))
+    else:
+        wanted = {pk for pk in collection_ids if pk}
+        ids = list(
+            NftCollection.objects.filter(id__in=wanted).values_list("id", flat=True)
+        )
+    updated = 0
+    for start in range(0, len(ids), CHUNK_SIZE):
+        updated += _refresh_chunk(ids[start : start + CHUNK_SIZE])
+    return updated
+
+
+def get_collection_stats() -> Dict[str, Any]:
+    """Estatísticas globais das coleções (um aggregate, servido do cache)."""
+    key = f"{STATS_CACHE_PREFIX}:{get_catalog_version()['version']}"
+    stats = cache.get(key)
+    if stats is not None:
+        return stats
+
+    totals = NftCollection.objects.aggregate(
+        total_collections=Count("id"),
+        total_items=Sum("items_count"),
+        total_owners=Sum("owners_count"),
+        average_floor_price=Avg("floor_price"),
+        total_volume=Sum("total_volume"),
+        total_catalog_items=Sum("nft_items_count"),
+        seven_day_volume_brl=Sum("seven_day_volume_brl"),
+    )
+    stats = {
+        "total_collections": totals["total_collections"] or 0,
+        "total_items": totals["total_items"] or 0,
+        "total_owners": totals["total_owners"] or 0,
+        "average_floor_price": float(totals["average_floor_price"] or 0),
+        "total_volume": float(totals["total_volume"] or 0),
+        "total_catalog_items": totals["total_catalog_items"] or 0,
+        "seven_day_volume_brl": float(totals["seven_day_volume_brl"] or 0),
+    }
+    cache.set(key, stats, timeout=STATS_CACHE_TTL)
+    return stats
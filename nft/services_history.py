@@ -0,0 +1,488 @@
+"""
+Série histórica de preços e vendas dos NFTs.
+
+``NFTPricePoint`` é append-only: cada atualização de preço grava um ponto
+``price`` por item e as vendas da Immutable viram pontos ``sale`` (uma por id
+de ordem). Os pontos são consolidados de forma incremental em
+``NFTPriceHourly`` e ``NFTPriceDaily`` (OHLC do preço anunciado + vendas);
+cada balde é recalculado por inteiro a partir do nível abaixo e gravado com
+upsert, então a consolidação é idempotente.
+
+As métricas de 7 dias do ``NFTItem`` são mantidas de forma incremental: o item
+guarda o maior ``updated_timestamp`` de venda já lido (``sales_watermark``) e o
+início da janela já aplicado (``seven_day_window_start``). Cada atualização
+busca na Immutable só as vendas posteriores ao watermark, soma as novas e
+desconta as que saíram da janela, então o custo por produto é proporcional às
+vendas novas e não a todas as vendas da semana.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Sum
+from django.utils import timezone
+
+from core.maintenance import delete_in_chunks
+
+from .cache import bump_catalog_version
+from .models import NFTItem, NFTPriceDaily, NFTPriceHourly, NFTPricePoint
+from .services import ImmutableAPIError, fetch_filled_sales
+from .services_collections import refresh_collection_aggregates
+
+logger = logging.getLogger(__name__)
+
+
+# Horas recalculadas a cada execução da consolidação
+ROLLUP_LOOKBACK = timedelta(hours=2)
+# Sobreposição na busca incremental de vendas (ordens atualizadas fora de ordem)
+SALES_FETCH_OVERLAP = timedelta(hours=1)
+SEVEN_DAYS = timedelta(days=7)
+
+BUCKET_FIELDS = [
+    "open_brl",
+    "high_brl",
+    "low_brl",
+    "close_brl",
+    "sales_count",
+    "sales_volume_brl",
+    "last_sale_brl",
+]
+
+
+def _setting(name: str, default: Any) -> Any:
+    return getattr(settings, name, default)
+
+
+def _local_midnight(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _hour_of(ts: datetime) -> datetime:
+    return timezone.localtime(ts).replace(minute=0, second=0, microsecond=0)
+
+
+# ---------------------------------------------------------------------------
+# Gravação
+# ---------------------------------------------------------------------------
+
+
+def record_price_points(
+    prices: Dict[int, Optional[Decimal]], at: Optional[datetime] = None
+) -> int:
+    """
+    Grava um ponto ``price`` por item (id -> preço em BRL). None e preços não
+    positivos (produto sem listagens, gravado com preço zerado) são ignorados.
+    """
+    at = at or timezone.now()
+    points = [
+        NFTPricePoint(item_id=item_id, kind="price", recorded_at=at, price_brl=price)
+        for item_id, price in prices.items()
+        if price is not None and price > 0
+    ]
+    if points:
+        NFTPricePoint.objects.bulk_create(points, batch_size=1000)
+    return len(points)
+
+
+def _new_sales(
+    item_id: int, sales: List[Tuple[str, datetime, Decimal]]
+) -> List[Tuple[str, datetime, Decimal]]:
+    """Vendas ainda não gravadas (a busca incremental tem sobreposição)."""
+    unique = {
+        order_id[:100]: (order_id[:100], ts, price) for order_id, ts, price in sales
+    }
+    known = set(
+        NFTPricePoint.objects.filter(
+            item_id=item_id, order_id__in=list(unique.keys())
+        ).values_list("order_id", flat=True)
+    )
+    return [sale for order_id, sale in unique.items() if order_id not in known]
+
+
+def record_sales(
+    item_id: int, sales: Iterable[Tuple[str, datetime, Decimal]], rollup: bool = True
+) -> List[Tuple[str, datetime, Decimal]]:
+    """
+    Grava as vendas (order_id, horário, preço) ainda não conhecidas do item e
+    reconsolida os baldes que elas tocam. Retorna as vendas gravadas.
+    """
+    new = _new_sales(item_id, list(sales))
+    if not new:
+        return []
+    NFTPricePoint.objects.bulk_create(
+        [
+            NFTPricePoint(
+                item_id=item_id,
+                kind="sale",
+                recorded_at=ts,
+                price_brl=price,
+                order_id=order_id,
+            )
+            for order_id, ts, price in new
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    if rollup:
+        rollup_sales(item_id, new)
+    return new
+
+
+def rollup_sales(item_id: int, sales: List[Tuple[str, datetime, Decimal]]) -> None:
+    """Reconsolida os baldes tocados por vendas gravadas depois do fato."""
+    # A consolidação periódica só olha as últimas horas
+    if sales:
+        rollup_price_history(
+            since=min(ts for _, ts, _ in sales),
+            until=timezone.now(),
+            item_ids=[item_id],
+        )
+
+
+# ---------------------------------------------------------------------------
+# Consolidação
+# ---------------------------------------------------------------------------
+
+
+def _empty_bucket() -> Dict[str, Any]:
+    return {
+        "open_brl": None,
+        "high_brl": None,
+        "low_brl": None,
+        "close_brl": None,
+        "sales_count": 0,
+        "sales_volume_brl": Decimal("0"),
+        "last_sale_brl": None,
+    }
+
+
+def _add_price(bucket: Dict[str, Any], price: Optional[Decimal]) -> None:
+    if price is None:
+        return
+    if bucket["open_brl"] is None:
+        bucket["open_brl"] = price
+    bucket["close_brl"] = price
+    bucket["high_brl"] = (
+        price if bucket["high_brl"] is None else max(bucket["high_brl"], price)
+    )
+    bucket["low_brl"] = (
+        price if bucket["low_brl"] is None else min(bucket["low_brl"], price)
+    )
+
+
+def _rollup_hours(
+    start: datetime, end: datetime, item_ids: Optional[List[int]] = None
+) -> int:
+    points = NFTPricePoint.objects.filter(recorded_at__gte=start, recorded_at__lt=end)
+    if item_ids is not None:
+        points = points.filter(item_id__in=item_ids)
+    buckets: Dict[Tuple[int, datetime], Dict[str, Any]] = {}
+    for item_id, kind, recorded_at, price in (
+        points.order_by("item_id", "recorded_at")
+        .values_list("item_id", "kind", "recorded_at", "price_brl")
+        .iterator(chunk_size=2000)
+    ):
+        bucket = buckets.setdefault((item_id, _hour_of(recorded_at)), _empty_bucket())
+        if kind == "sale":
+            bucket["sales_count"] += 1
+            bucket["sales_volume_brl"] += price
+            bucket["last_sale_brl"] = price
+        else:
+            _add_price(bucket, price)
+
+    rows = [
+        NFTPriceHourly(item_id=item_id, hour=hour, **values)
+        for (item_id, hour), values in buckets.items()
+    ]
+    if rows:
+        NFTPriceHourly.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["item", "hour"],
+            update_fields=BUCKET_FIELDS,
+        )
+    return len(rows)
+
+
+def _rollup_day(day: date, item_ids: Optional[List[int]] = None) -> int:
+    start = _local_midnight(day)
+    hours = NFTPriceHourly.objects.filter(
+        hour__gte=start, hour__lt=start + timedelta(days=1)
+    )
+    if item_ids is not None:
+        hours = hours.filter(item_id__in=item_ids)
+    buckets: Dict[int, Dict[str, Any]] = {}
+    for hour in hours.order_by("item_id", "hour"):
+        bucket = buckets.setdefault(hour.item_id, _empty_bucket())
+        if hour.open_brl is not None:
+            _add_price(bucket, hour.open_brl)
+            _add_price(bucket, hour.high_brl)
+            _add_price(bucket, hour.low_brl)
+            _add_price(bucket, hour.close_brl)
+        bucket["sales_count"] += hour.sales_count
+        bucket["sales_volume_brl"] += hour.sales_volume_brl
+        if hour.last_sale_brl is not None:
+            bucket["last_sale_brl"] = hour.last_sale_brl
+
+    rows = [
+        NFTPriceDaily(item_id=item_id, day=day, **values)
+        for item_id, values in buckets.items()
+    ]
+    if rows:
+        NFTPriceDaily.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["item", "day"],
+            update_fields=BUCKET_FIELDS,
+        )
+    return len(rows)
+
+
+def rollup_price_history(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    item_ids: Optional[List[int]] = None,
+) -> Dict[str, int]:
+    """
+    Recalcula as horas de ``since`` (padrão: agora - ROLLUP_LOOKBACK) até
+    ``until`` e os dias que elas tocam, opcionalmente só de alguns itens.
+    """
+    until = until or timezone.now()
+    since = since or (until - ROLLUP_LOOKBACK)
+    start = _hour_of(since)
+    hours = _rollup_hours(start, until, item_ids)
+
+    days = 0
+    day = timezone.localdate(start)
+    last_day = timezone.localdate(until)
+    while day <= last_day:
+        days += _rollup_day(day, item_ids)
+        day += timedelta(days=1)
+    return {"hourly_rows": hours, "daily_rows": days}
+
+
+# ---------------------------------------------------------------------------
+# Métricas de 7 dias e séries
+# ---------------------------------------------------------------------------
+
+
+def _window_totals(item_id: int, start: datetime, end: Optional[datetime] = None):
+    """(quantidade, volume) das vendas gravadas do item em [start, end)."""
+    sales = NFTPricePoint.objects.filter(
+        item_id=item_id, kind="sale", recorded_at__gte=start
+    )
+    if end is not None:
+        sales = sales.filter(recorded_at__lt=end)
+    totals = sales.aggregate(count=Count("id"), volume=Sum("price_brl"))
+    return totals["count"] or 0, totals["volume"] or Decimal("0")
+
+
+def _edge_sale(item_id: int, start: datetime, last: bool) -> Optional[Decimal]:
+    """Primeira/última venda da janela (busca pontual no índice da série)."""
+    sales = NFTPricePoint.objects.filter(
+        item_id=item_id, kind="sale", recorded_at__gte=start
+    ).order_by("-recorded_at" if last else "recorded_at")
+    return sales.values_list("price_brl", flat=True).first()
+
+
+def _stats_from_totals(
+    item_id: int, start: datetime, count: int, volume: Decimal, now: datetime
+) -> Dict[str, Any]:
+    stats: Dict[str, Any] = {
+        "seven_day_sales_count": count,
+        "seven_day_volume_brl": volume,
+        "seven_day_avg_price_brl": Decimal("0"),
+        "seven_day_last_sale_brl": Decimal("0"),
+        "seven_day_price_change_pct": Decimal("0"),
+        "seven_day_updated_at": now,
+    }
+    if count:
+        stats["seven_day_avg_price_brl"] = (volume / count).quantize(
+            Decimal("0.01"), rounding=ROUND_HALF_UP
+        )
+        last = _edge_sale(item_id, start, last=True) or Decimal("0")
+        stats["seven_day_last_sale_brl"] = last
+        first = _edge_sale(item_id, start, last=False)
+        if count >= 2 and first:
+            stats["seven_day_price_change_pct"] = (
+                (last - first) / first * Decimal("100")
+            ).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    return stats
+
+
+STATS_STATE_FIELDS = [
+    "seven_day_sales_count",
+    "seven_day_volume_brl",
+    "seven_day_avg_price_brl",
+    "seven_day_last_sale_brl",
+    "seven_day_price_change_pct",
+    "seven_day_updated_at",
+    "sales_watermark",
+    "seven_day_window_start",
+]
+
+
+def _advance_window(
+    item: NFTItem,
+    fetched: List[Tuple[str, datetime, Decimal]],
+    now: datetime,
+) -> Tuple[Dict[str, Any], List[Tuple[str, datetime, Decimal]]]:
+    """
+    Aplica as vendas buscadas e a expiração da janela às somas do item.
+
+    Deve rodar com a linha do item travada (``select_for_update``).
+    """
+    start = now - SEVEN_DAYS
+    new = record_sales(item.pk, fetched, rollup=False)
+
+    previous_start = item.seven_day_window_start
+    if previous_start is None or previous_start > start:
+        # Estado ainda não inicializado: soma a janela uma única vez
+        count, volume = _window_totals(item.pk, start)
+    else:
+        count = item.seven_day_sales_count or 0
+        volume = item.seven_day_volume_brl or Decimal("0")
+        # Só as vendas que saíram da janela desde a última atualização
+        evicted_count, evicted_volume = _window_totals(item.pk, previous_start, start)
+        count -= evicted_count
+        volume -= evicted_volume
+        for _, ts, price in new:
+            if ts >= start:
+                count += 1
+                volume += price
+    if count <= 0:
+        count, volume = 0, Decimal("0")
+
+    stats = _stats_from_totals(item.pk, start, count, volume, now)
+    watermark = max((ts for _, ts, _ in fetched), default=None)
+    if item.sales_watermark and (watermark is None or watermark < item.sales_watermark):
+        watermark = item.sales_watermark
+    stats["sales_watermark"] = watermark
+    stats["seven_day_window_start"] = start
+    return stats, new
+
+
+def refresh_seven_day_stats(
+    item: NFTItem, fetch: bool = True, propagate: bool = True
+) -> Dict[str, Any]:
+    """
+    Atualiza as métricas de 7 dias do item de forma incremental.
+
+    Com ``fetch`` busca na Immutable só as vendas atualizadas depois do
+    ``sales_watermark`` (com uma pequena sobreposição); sem ``fetch``, ou se a
+    busca falhar, apenas desconta as vendas que saíram da janela. Com ``propagate`` atualiza os
+    agregados da coleção e invalida o cache do catálogo.
+    """
+    now = timezone.now()
+    fetched: List[Tuple[str, datetime, Decimal]] = []
+    if fetch:
+        since = now - SEVEN_DAYS
+        if item.sales_watermark is not None:
+            since = max(since, item.sales_watermark - SALES_FETCH_OVERLAP)
+        # Fora da transação: a chamada à Immutable não segura o lock do item
+        try:
+            fetched = fetch_filled_sales(item.product_code, since, strict=True)
+        except ImmutableAPIError as e:
+            # Busca incompleta: só a janela anda, o watermark fica onde estava
+            logger.warning("Vendas de %s não atualizadas: %s", item.product_code, e)
+
+    with transaction.atomic():
+        locked = (
+            NFTItem.objects.select_for_update()
+            .only("id", "collection_id", *STATS_STATE_FIELDS)
+            .get(pk=item.pk)
+        )
+        stats, new = _advance_window(locked, fetched, now)
+        NFTItem.objects.filter(pk=item.pk).update(**stats)
+    rollup_sales(item.pk, new)
+
+    for field, value in stats.items():
+        setattr(item, field, value)
+    if propagate:
+        refresh_collection_aggregates([locked.collection_id])
+        # QuerySet.update não dispara post_save
+        bump_catalog_version()
+    return stats
+
+
+def expire_seven_day_windows(max_items: Optional[int] = None) -> Dict[str, int]:
+    """
+    Desconta das métricas as vendas que saíram da janela de 7 dias, sem
+    consultar a Immutable (itens com vendas cuja janela não anda há 1 hora).
+    """
+    stale = timezone.now() - timedelta(hours=1)
+    items = NFTItem.objects.filter(
+        seven_day_sales_count__gt=0, seven_day_window_start__lt=stale - SEVEN_DAYS
+    ).only("id", "product_code", "collection_id", *STATS_STATE_FIELDS)
+    if max_items:
+        items = items[:max_items]
+    updated = 0
+    collection_ids = set()
+    for item in items.iterator(chunk_size=500):
+        refresh_seven_day_stats(item, fetch=False, propagate=False)
+        collection_ids.add(item.collection_id)
+        updated += 1
+    if updated:
+        refresh_collection_aggregates(collection_ids)
+        bump_catalog_version()
+    return {"updated": updated}
+
+
+def get_price_series(
+    item_id: int, days: int = 30, resolution: str = "day"
+) -> List[Dict[str, Any]]:
+    """Série OHLC + vendas do item para gráficos (``resolution``: hour/day)."""
+    now = timezone.now()
+    if resolution == "hour":
+        rows = NFTPriceHourly.objects.filter(
+            item_id=item_id, hour__gte=now - timedelta(days=days)
+        ).order_by("hour")
+        key = "hour"
+    else:
+        rows = NFTPriceDaily.objects.filter(
+            item_id=item_id, day__gte=timezone.localdate(now) - timedelta(days=days)
+        ).order_by("day")
+        key = "day"
+    return list(rows.values(key, *BUCKET_FIELDS))
+
+
+# ---------------------------------------------------------------------------
+# Retenção
+# ---------------------------------------------------------------------------
+
+
+def prune_price_history() -> Dict[str, int]:
+    """
+    Remove pontos brutos e horas antigos (os dias ficam para os gráficos).
+
+    Os pontos brutos nunca saem antes de 7 dias (base das métricas de 7 dias)
+    e são reconsolidados antes de sair.
+    """
+    today = timezone.localdate()
+    raw_days = max(int(_setting("NFT_PRICE_RAW_RETENTION_DAYS", 30)), 8)
+    raw_cutoff = _local_midnight(today - timedelta(days=raw_days))
+    hourly_cutoff = _local_midnight(
+        today - timedelta(days=int(_setting("NFT_PRICE_HOURLY_RETENTION_DAYS", 90)))
+    )
+
+    expired = NFTPricePoint.objects.filter(recorded_at__lt=raw_cutoff)
+    oldest = expired.aggregate(oldest=Min("recorded_at"))["oldest"]
+    if oldest is not None:
+        rollup_price_history(since=max(oldest, hourly_cutoff), until=raw_cutoff)
+
+    result = {
+        "raw_deleted": delete_in_chunks(expired),
+        "hourly_deleted": delete_in_chunks(
+            NFTPriceHourly.objects.filter(hour__lt=hourly_cutoff)
+        ),
+    }
+    logger.info("Retenção do histórico de preços: %s", result)
+    return result
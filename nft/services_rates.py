@@ -0,0 +1,216 @@
+"""
+Cotações ETH/USD e USD/BRL compartilhadas entre processos.
+
+As cotações ficam no cache do Django (Redis em produção), então todos os workers
+web e Celery enxergam o mesmo valor e as APIs externas (CoinGecko/AwesomeAPI)
+recebem no máximo uma atualização por vez:
+
+- dentro de ``NFT_FX_FRESH_TTL`` o valor é servido direto do cache;
+- depois disso é servido "stale" enquanto uma task Celery revalida em background;
+- um lock no cache (``cache.add``) garante uma única atualização em andamento;
+- cada cotação obtida é gravada em ``ExchangeRate``, usada quando as APIs falham.
+
+A task periódica ``nft.tasks.refresh_fx_rates`` revalida antes do valor expirar,
+de modo que requisições normalmente nunca esperam pelas APIs externas.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import ExchangeRate
+from .services import _get_json_with_retries
+
+logger = logging.getLogger(__name__)
+
+
+RATES_CACHE_KEY = "nft:fx:rates"
+REFRESH_LOCK_KEY = "nft:fx:refresh-lock"
+# Maior que o pior caso das chamadas com retry às duas APIs
+REFRESH_LOCK_TTL = 120
+# Quando a atualização só conseguiu cotações antigas, tenta de novo mais cedo
+DEGRADED_FRESH_TTL = 60
+# Quanto um processo sem cotação no cache espera pela atualização de outro
+MISS_WAIT_SECONDS = 3.0
+MISS_POLL_INTERVAL = 0.2
+
+PAIR_ETH_USD = "ETH-USD"
+PAIR_USD_BRL = "USD-BRL"
+
+
+def _fresh_ttl() -> int:
+    return int(getattr(settings, "NFT_FX_FRESH_TTL", 600))
+
+
+def _stale_ttl() -> int:
+    return int(getattr(settings, "NFT_FX_STALE_TTL", 60 * 60 * 24))
+
+
+def bootstrap_rates() -> Tuple[Decimal, Decimal]:
+    """Cotações configuradas para quando ainda não há nenhuma gravada."""
+    return (
+        Decimal(str(getattr(settings, "NFT_FX_BOOTSTRAP_ETH_USD", "4713.59"))),
+        Decimal(str(getattr(settings, "NFT_FX_BOOTSTRAP_USD_BRL", "5.42"))),
+    )
+
+
+def _fetch_eth_usd() -> Optional[Decimal]:
+    try:
+        data = _get_json_with_retries(
+            "https://api.coingecko.com/api/v3/simple/price",
+            params={"ids": "ethereum", "vs_currencies": "usd"},
+            timeout=10,
+            retries=3,
+            backoff_factor=0.6,
+        )
+        if isinstance(data, dict):
+            val = (data.get("ethereum") or {}).get("usd")
+            if val is not None:
+                return Decimal(str(val))
+    except Exception as e:  # noqa: BLE001 - network exceptions are varied
+        logger.warning("CoinGecko fetch failed: %s", e)
+    return None
+
+
+def _fetch_usd_brl() -> Optional[Decimal]:
+    try:
+        data = _get_json_with_retries(
+            "https://economia.awesomeapi.com.br/json/last/USD-BRL",
+            timeout=10,
+            retries=5,
+            backoff_factor=0.6,
+        )
+        if isinstance(data, dict):
+            bid = (data.get("USDBRL") or {}).get("bid")
+            if bid is not None:
+                return Decimal(str(bid))
+    except Exception as e:  # noqa: BLE001
+        logger.warning("AwesomeAPI fetch failed: %s", e)
+    return None
+
+
+def last_known_rates() -> Tuple[Decimal, Decimal]:
+    """Última cotação válida gravada de cada par (ou a de bootstrap)."""
+    eth_usd, usd_brl = bootstrap_rates()
+    stored = dict(ExchangeRate.objects.values_list("pair", "rate"))
+    if PAIR_ETH_USD in stored:
+        eth_usd = stored[PAIR_ETH_USD]
+    else:
+        logger.error("Nenhuma cotação ETH-USD gravada; usando valor de bootstrap")
+    if PAIR_USD_BRL in stored:
+        usd_brl = stored[PAIR_USD_BRL]
+    else:
+        logger.error("Nenhuma cotação USD-BRL gravada; usando valor de bootstrap")
+    return eth_usd, usd_brl
+
+
+def _store_snapshot(eth_usd: Decimal, usd_brl: Decimal, fresh_for: int) -> None:
+    snapshot = {
+        "eth_usd": str(eth_usd),
+        "usd_brl": str(usd_brl),
+        "fresh_until": time.time() + fresh_for,
+    }
+    cache.set(RATES_CACHE_KEY, snapshot, timeout=_stale_ttl())
+
+
+def _from_snapshot(snapshot: Dict[str, Any]) -> Tuple[Decimal, Decimal]:
+    return Decimal(snapshot["eth_usd"]), Decimal(snapshot["usd_brl"])
+
+
+def refresh_rates() -> Tuple[Decimal, Decimal]:
+    """
+    Busca as cotações nas APIs externas, grava as obtidas e publica no cache.
+
+    Pares que falharem usam a última cotação gravada; nesse caso o snapshot
+    fica "fresh" por menos tempo para que a próxima atualização venha logo.
+    Não adquire o lock: quem chama é responsável pela exclusão mútua.
+    """
+    fetched = {
+        PAIR_ETH_USD: _fetch_eth_usd(),
+        PAIR_USD_BRL: _fetch_usd_brl(),
+    }
+    now = timezone.now()
+    sources = {PAIR_ETH_USD: "coingecko", PAIR_USD_BRL: "awesomeapi"}
+    for pair, rate in fetched.items():
+        if rate is not None and rate > 0:
+            ExchangeRate.objects.update_or_create(
+                pair=pair,
+                defaults={"rate": rate, "source": sources[pair], "fetched_at": now},
+            )
+
+    eth_usd = fetched[PAIR_ETH_USD]
+    usd_brl = fetched[PAIR_USD_BRL]
+    degraded = not eth_usd or not usd_brl
+    if degraded:
+        known_eth_usd, known_usd_brl = last_known_rates()
+        eth_usd = eth_usd or known_eth_usd
+        usd_brl = usd_brl or known_usd_brl
+        logger.warning(
+            "Atualização de cotações incompleta; usando últimas conhecidas "
+            "(ETH-USD=%s, USD-BRL=%s)",
+            eth_usd,
+            usd_brl,
+        )
+
+    _store_snapshot(eth_usd, usd_brl, DEGRADED_FRESH_TTL if degraded else _fresh_ttl())
+    return eth_usd, usd_brl
+
+
+def acquire_refresh_lock() -> bool:
+    return bool(cache.add(REFRESH_LOCK_KEY, 1, timeout=REFRESH_LOCK_TTL))
+
+
+def release_refresh_lock() -> None:
+    cache.delete(REFRESH_LOCK_KEY)
+
+
+def _schedule_background_refresh() -> None:
+    """Dispara a revalidação em background se ninguém estiver atualizando."""
+    if not acquire_refresh_lock():
+        return
+    try:
+        from .tasks import refresh_fx_rates
+
+        # A task herda o lock e o libera ao terminar
+        refresh_fx_rates.delay(lock_held=True)
+    except Exception as e:  # noqa: BLE001 - broker indisponível, etc.
+        release_refresh_lock()
+        logger.warning("Não foi possível agendar a atualização de cotações: %s", e)
+
+
+def get_current_rates() -> Tuple[Decimal, Decimal]:
+    """
+    Retorna (eth_usd, usd_brl) como Decimals.
+
+    Nunca bloqueia em APIs externas quando há uma cotação no cache, mesmo
+    antiga; só o processo que vence o lock busca de forma síncrona quando o
+    cache está vazio, e os demais aguardam brevemente ou usam a última
+    cotação gravada.
+    """
+    snapshot = cache.get(RATES_CACHE_KEY)
+    if snapshot is not None:
+        if time.time() >= snapshot.get("fresh_until", 0):
+            _schedule_background_refresh()
+        return _from_snapshot(snapshot)
+
+    if acquire_refresh_lock():
+        try:
+            return refresh_rates()
+        finally:
+            release_refresh_lock()
+
+    # Outro processo está atualizando: espera pelo resultado dele
+    deadline = time.monotonic() + MISS_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(MISS_POLL_INTERVAL)
+        snapshot = cache.get(RATES_CACHE_KEY)
+        if snapshot is not None:
+            return _from_snapshot(snapshot)
+    return last_known_rates()
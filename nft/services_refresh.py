@@ -0,0 +1,381 @@
+"""
+Rotina concorrente de atualização de preços dos NFTs (Immutable).
+
+Dispara as consultas de cada lote de forma assíncrona (``services_async``) sob um
+limite de concorrência e atrás de um token bucket compartilhado, grava os
+resultados em lote e registra checkpoints em ``PriceRefreshRun`` para que uma
+execução interrompida continue de onde parou.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.http_client import get_http_metrics
+
+from .cache import bump_catalog_version
+from .models import NFTItem, PriceRefreshRun
+from .services import fetch_items_from_immutable, markup_pass
+from .services_collections import refresh_collection_aggregates
+from .services_history import record_price_points
+
+logger = logging.getLogger(__name__)
+
+
+# Campos gravados pela rotina (mesmos da task individual update_nft_price)
+PRICE_REFRESH_FIELDS = [
+    "last_price_eth",
+    "last_price_usd",
+    "last_price_brl",
+    "name",
+    "image_url",
+    "blueprint",
+    "type",
+    "rarity",
+    "item_type",
+    "item_sub_type",
+    "product_type",
+    "material",
+    "is_crafted_item",
+    "is_craft_material",
+    "number",
+    "updated_at",
+]
+
+# Uma execução "running" sem checkpoint há mais tempo que isso é considerada morta
+STALE_RUN_SECONDS = 15 * 60
+
+
+class TokenBucketLimiter:
+    """Thread-safe token bucket shared by every worker of a refresh run.
+
+    ``rate`` is the sustained requests/second and ``burst`` the bucket size.
+    Each 429 halves the effective rate (never below ``min_rate``) and successful
+    responses slowly bring it back to the configured rate.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        min_rate: Optional[float] = None,
+        recovery_step: Optional[float] = None,
+    ) -> None:
+        self.max_rate = max(float(rate), 0.1)
+        self.rate = self.max_rate
+        self.burst = float(burst) if burst else max(1.0, self.max_rate)
+        self.min_rate = float(min_rate) if min_rate else max(0.1, self.max_rate / 10)
+        self.recovery_step = (
+            float(recovery_step) if recovery_step else self.max_rate / 20
+        )
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.throttled_count = 0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def acquire(self) -> None:
+        """Block until a token is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        """Async variant of acquire(): waits without blocking the event loop."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            await asyncio.sleep(wait)
+
+    def on_throttled(self) -> None:
+        """Upstream answered 429: back off multiplicatively and drain the bucket."""
+        with self._lock:
+            self.throttled_count += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0
+            self._updated = time.monotonic()
+            logger.warning(
+                "Rate limit da Immutable; taxa reduzida para %.2f req/s", self.rate
+            )
+
+    def on_success(self) -> None:
+        """Recover the rate additively after successful responses."""
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.recovery_step)
+
+
+def _setting(name: str, default: Any) -> Any:
+    return getattr(settings, name, default)
+
+
+def _iter_batches(codes: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch: List[str] = []
+    for code in codes:
+        batch.append(code)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _fetch_batch(
+    product_codes: List[str],
+    limiter: TokenBucketLimiter,
+    concurrency: int,
+    chunk_size: int,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """Busca um lote de produtos em paralelo (grupos de ``chunk_size`` por consulta).
+
+    Retorna (campos por product_code, erro por product_code).
+    """
+    try:
+        items, errors = fetch_items_from_immutable(
+            product_codes,
+            chunk_size=chunk_size,
+            concurrency=concurrency,
+            limiter=limiter,
+        )
+    except Exception as e:  # noqa: BLE001 - o lote inteiro falha junto
+        return {}, {code: str(e) for code in product_codes}
+    return {code: mapped for code, (mapped, _) in items.items()}, errors
+
+
+def refresh_prices_for(
+    product_codes: List[str],
+    *,
+    rate: Optional[float] = None,
+    concurrency: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Atualiza os preços de um conjunto de produtos (ex.: ação do admin)."""
+    rate = rate or float(_setting("NFT_PRICE_REFRESH_RATE", 5.0))
+    concurrency = concurrency or int(_setting("NFT_PRICE_REFRESH_CONCURRENCY", 8))
+    chunk_size = int(_setting("NFT_IMMUTABLE_CODES_PER_REQUEST", 20))
+    limiter = TokenBucketLimiter(rate)
+    with markup_pass():
+        results, errors = _fetch_batch(
+            list(product_codes), limiter, concurrency, chunk_size
+        )
+    for code, error in errors.items():
+        logger.warning("Falha ao atualizar %s: %s", code, error)
+    return {"updated_count": _write_batch(results), "failed_count": len(errors)}
+
+
+def _write_batch(results: Dict[str, Dict[str, Any]]) -> int:
+    """Grava os campos atualizados de um lote com um único bulk_update."""
+    if not results:
+        return 0
+    now = timezone.now()
+    items = list(
+        NFTItem.objects.filter(product_code__in=list(results.keys())).only(
+            "id", "product_code", "collection_id"
+        )
+    )
+    for item in items:
+        mapped = results[item.product_code]
+        for field in PRICE_REFRESH_FIELDS:
+            if field in mapped:
+                setattr(item, field, mapped[field])
+        # bulk_update não aplica auto_now
+        item.updated_at = now
+    NFTItem.objects.bulk_update(items, PRICE_REFRESH_FIELDS, batch_size=200)
+    record_price_points(
+        {item.pk: results[item.product_code].get("last_price_brl") for item in items},
+        at=now,
+    )
+    # bulk_update não dispara post_save
+    if items:
+        refresh_collection_aggregates({item.collection_id for item in items})
+        bump_catalog_version()
+    return len(items)
+
+
+def _start_or_resume_run() -> Optional[PriceRefreshRun]:
+    """Retoma a última execução interrompida ou inicia uma nova.
+
+    Retorna None quando outra execução ainda está ativa.
+    """
+    latest = PriceRefreshRun.objects.filter(
+        status__in=["running", "interrupted"]
+    ).first()
+    if latest is not None:
+        age = (timezone.now() - latest.updated_at).total_seconds()
+        if latest.status == "running" and age < STALE_RUN_SECONDS:
+            return None
+        latest.status = "running"
+        latest.save(update_fields=["status", "updated_at"])
+        logger.info(
+            "Retomando atualização de preços #%s a partir de %r",
+            latest.pk,
+            latest.last_product_code,
+        )
+        return latest
+    return PriceRefreshRun.objects.create(status="running")
+
+
+def refresh_all_nft_prices(
+    *,
+    rate: Optional[float] = None,
+    concurrency: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    time_budget: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Atualiza os preços de todo o catálogo de forma concorrente.
+
+    Args:
+        rate: Requisições por segundo à Immutable (padrão: NFT_PRICE_REFRESH_RATE)
+        concurrency: Número de requisições simultâneas (padrão: NFT_PRICE_REFRESH_CONCURRENCY)
+        batch_size: Itens por lote/checkpoint (padrão: NFT_PRICE_REFRESH_BATCH_SIZE)
+        time_budget: Segundos antes de pausar a execução como "interrupted"
+            (padrão: NFT_PRICE_REFRESH_TIME_BUDGET; 0 desativa)
+
+    Returns:
+        Dicionário com o status e os contadores da execução
+    """
+    rate = rate or float(_setting("NFT_PRICE_REFRESH_RATE", 5.0))
+    concurrency = concurrency or int(_setting("NFT_PRICE_REFRESH_CONCURRENCY", 8))
+    batch_size = batch_size or int(_setting("NFT_PRICE_REFRESH_BATCH_SIZE", 100))
+    chunk_size = int(_setting("NFT_IMMUTABLE_CODES_PER_REQUEST", 20))
+    if time_budget is None:
+        time_budget = float(_setting("NFT_PRICE_REFRESH_TIME_BUDGET", 25 * 60))
+
+    run = _start_or_resume_run()
+    if run is None:
+        logger.warning("Outra atualização de preços já está em execução; ignorando")
+        return {"status": "skipped", "reason": "Execução já em andamento"}
+
+    codes_qs = (
+        NFTItem.objects.filter(product_code__isnull=False)
+        .exclude(product_code__exact="")
+        .order_by("product_code")
+    )
+    if not run.total_items:
+        run.total_items = codes_qs.count()
+    if run.last_product_code:
+        codes_qs = codes_qs.filter(product_code__gt=run.last_product_code)
+
+    limiter = TokenBucketLimiter(rate)
+    started = time.monotonic()
+    deadline = started + time_budget if time_budget else None
+    logger.info(
+        "Atualização de preços #%s: %d itens, %.1f req/s, concorrência %d, "
+        "lotes de %d (%d produtos por consulta)",
+        run.pk,
+        run.total_items,
+        rate,
+        concurrency,
+        batch_size,
+        chunk_size,
+    )
+
+    try:
+        codes = list(codes_qs.values_list("product_code", flat=True))
+        for batch in _iter_batches(codes, batch_size):
+            if deadline is not None and time.monotonic() >= deadline:
+                run.status = "interrupted"
+                run.save(update_fields=["status", "updated_at"])
+                logger.info(
+                    "Atualização #%s pausada após %.1fmin em %r; será retomada",
+                    run.pk,
+                    (time.monotonic() - started) / 60,
+                    run.last_product_code,
+                )
+                return _summary(run, started, limiter)
+
+            # Markups carregados uma vez por lote e compartilhados pelas
+            # consultas concorrentes (o snapshot segue no contexto)
+            with markup_pass():
+                results, errors = _fetch_batch(batch, limiter, concurrency, chunk_size)
+            failed = len(errors)
+            for code, error in errors.items():
+                logger.warning("Falha ao atualizar %s: %s", code, error)
+
+            written = _write_batch(results)
+
+            run.last_product_code = batch[-1]
+            run.processed_count += len(batch)
+            run.updated_count += written
+            run.failed_count += failed
+            run.save(
+                update_fields=[
+                    "last_product_code",
+                    "processed_count",
+                    "updated_count",
+                    "failed_count",
+                    "total_items",
+                    "updated_at",
+                ]
+            )
+            logger.info(
+                "Progresso #%s: %d/%d (%d falhas, taxa atual %.2f req/s)",
+                run.pk,
+                run.processed_count,
+                run.total_items,
+                run.failed_count,
+                limiter.rate,
+            )
+    except Exception as e:
+        # Mantém o checkpoint para que a próxima execução continue deste ponto
+        run.status = "interrupted"
+        run.error = str(e)
+        run.save(update_fields=["status", "error", "updated_at"])
+        logger.error("Atualização de preços #%s falhou: %s", run.pk, e, exc_info=True)
+        raise
+
+    run.status = "completed"
+    run.finished_at = timezone.now()
+    run.save(update_fields=["status", "finished_at", "updated_at"])
+    return _summary(run, started, limiter)
+
+
+def _summary(
+    run: PriceRefreshRun, started: float, limiter: TokenBucketLimiter
+) -> Dict[str, Any]:
+    elapsed = time.monotonic() - started
+    logger.info(
+        "Atualização de preços #%s %s: %d processados, %d atualizados, %d falhas em %.1fmin",
+        run.pk,
+        run.status,
+        run.processed_count,
+        run.updated_count,
+        run.failed_count,
+        elapsed / 60,
+    )
+    # Latência/erros por host acumulados neste worker
+    logger.info("Métricas HTTP: %s", get_http_metrics())
+    return {
+        "status": run.status,
+        "run_id": run.pk,
+        "total_items": run.total_items,
+        "processed_count": run.processed_count,
+        "updated_count": run.updated_count,
+        "failed_count": run.failed_count,
+        "throttled_count": limiter.throttled_count,
+        "elapsed_minutes": elapsed / 60,
+    }
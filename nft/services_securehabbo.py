@@ -6,15 +6,35 @@ import logging
 import requests
 import hashlib
 from decimal import Decimal
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from django.db import transaction
+from django.utils import timezone
+from core import http_client
+from .cache import bump_catalog_version
 from .models import NFTItem, NftCollection
 from .services import get_current_rates
+from .services_collections import refresh_collection_aggregates
 
 logger = logging.getLogger(__name__)
 
 SECUREHABBO_API_URL = "https://turbo.securehabbo.com/market/items"
 
+# Itens por lote de leitura/gravação; cada lote é gravado em sua própria transação
+SYNC_CHUNK_SIZE = 500
+
+# Campos gravados pela sincronização (além de collection)
+SYNC_FIELDS = [
+    "name",
+    "image_url",
+    "last_price_eth",
+    "last_price_brl",
+    "rarity",
+    "item_type",
+    "source",
+    "is_crafted_item",
+    "is_craft_material",
+]
+
 SECUREHABBO_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36",
     "Accept": "*/*",
@@ -34,7 +54,7 @@ def fetch_securehabbo_items() -> List[Dict[str, Any]]:
         requests.RequestException: Se houver erro na requisição
     """
     try:
-        response = requests.get(
+        response = http_client.get(
             SECUREHABBO_API_URL, headers=SECUREHABBO_HEADERS, timeout=30
         )
         response.raise_for_status()
@@ -87,18 +107,43 @@ def get_or_create_collection(collection_name: str) -> Optional[NftCollection]:
     return collection
 
 
-def convert_eth_to_brl(eth_price: Decimal) -> Decimal:
+def resolve_collections(names: Iterable[str]) -> Dict[str, NftCollection]:
+    """
+    Obtém ou cria as coleções de vários nomes de uma vez
+
+    Args:
+        names: Nomes das coleções (vazios são ignorados)
+
+    Returns:
+        Dicionário nome -> NftCollection
+    """
+    wanted = {name for name in names if name}
+    collections: Dict[str, NftCollection] = {}
+    for collection in NftCollection.objects.filter(name__in=wanted).order_by("id"):
+        collections.setdefault(collection.name, collection)
+    # Coleções novas são raras; get_or_create mantém a geração de slug do save()
+    for name in wanted - collections.keys():
+        collection = get_or_create_collection(name)
+        if collection is not None:
+            collections[name] = collection
+    return collections
+
+
+def convert_eth_to_brl(
+    eth_price: Decimal, rates: Optional[Tuple[Decimal, Decimal]] = None
+) -> Decimal:
     """
     Converte preço de ETH para BRL
 
     Args:
         eth_price: Preço em ETH
+        rates: Cotações (eth_usd, usd_brl) já obtidas; busca as atuais se omitido
 
     Returns:
         Preço em BRL
     """
     try:
-        eth_usd, usd_brl = get_current_rates()
+        eth_usd, usd_brl = rates or get_current_rates()
         if eth_usd and usd_brl:
             usd_price = eth_price * eth_usd
             brl_price = usd_price * usd_brl
@@ -109,12 +154,15 @@ def convert_eth_to_brl(eth_price: Decimal) -> Decimal:
     return Decimal("0.00")
 
 
-def map_securehabbo_item_to_nft(item_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def map_securehabbo_item_to_nft(
+    item_data: Dict[str, Any], rates: Optional[Tuple[Decimal, Decimal]] = None
+) -> Optional[Dict[str, Any]]:
     """
     Mapeia dados da API securehabbo para formato NFTItem
 
     Args:
         item_data: Dados do item da API
+        rates: Cotações (eth_usd, usd_brl) compartilhadas por toda a sincronização
 
     Returns:
         Dicionário com campos para criar/atualizar NFTItem ou None se dados inválidos
@@ -125,7 +173,7 @@ def map_securehabbo_item_to_nft(item_data: Dict[str, Any]) -> Optional[Dict[str,
 
     # Converter preço de ETH para BRL
     current_price_eth = Decimal(str(item_data.get("current_price", 0)))
-    current_price_brl = convert_eth_to_brl(current_price_eth)
+    current_price_brl = convert_eth_to_brl(current_price_eth, rates)
 
     # Mapear raridade
     rarity = "Common"
@@ -168,10 +216,87 @@ def map_securehabbo_item_to_nft(item_data: Dict[str, Any]) -> Optional[Dict[str,
     return mapped
 
 
-@transaction.atomic
+def _chunks(values: List[Any], size: int) -> Iterable[List[Any]]:
+    for i in range(0, len(values), size):
+        yield values[i : i + size]
+
+
+def _sync_chunk(
+    codes: List[str],
+    mapped_by_code: Dict[str, Dict[str, Any]],
+    collection_by_code: Dict[str, Optional[NftCollection]],
+) -> Tuple[int, int, int]:
+    """
+    Grava um lote: cria os itens novos e atualiza só os campos alterados
+
+    Returns:
+        (novos, atualizados, inalterados)
+    """
+    existing = {
+        item.product_code: item
+        for item in NFTItem.objects.filter(product_code__in=codes).only(
+            "id", "product_code", "collection_id", *SYNC_FIELDS
+        )
+    }
+
+    to_create: List[NFTItem] = []
+    to_update: List[NFTItem] = []
+    changed_fields: set = set()
+    # Coleções cujos agregados mudam (inclusive a antiga de itens movidos)
+    collection_ids: set = set()
+    now = timezone.now()
+
+    for code in codes:
+        mapped = mapped_by_code[code]
+        collection = collection_by_code.get(code)
+        item = existing.get(code)
+        if item is None:
+            to_create.append(NFTItem(**mapped, collection=collection))
+            collection_ids.add(collection.pk if collection is not None else None)
+            continue
+
+        changed = [
+            field for field in SYNC_FIELDS if getattr(item, field) != mapped[field]
+        ]
+        for field in changed:
+            setattr(item, field, mapped[field])
+        # Mantém a coleção atual quando o item não informa uma
+        if collection is not None and item.collection_id != collection.pk:
+            collection_ids.add(item.collection_id)
+            item.collection = collection
+            changed.append("collection")
+        if changed:
+            collection_ids.add(item.collection_id)
+            # bulk_update não aplica auto_now
+            item.updated_at = now
+            changed_fields.update(changed)
+            to_update.append(item)
+
+    with transaction.atomic():
+        if to_create:
+            NFTItem.objects.bulk_create(to_create, batch_size=SYNC_CHUNK_SIZE)
+        if to_update:
+            NFTItem.objects.bulk_update(
+                to_update,
+                sorted(changed_fields) + ["updated_at"],
+                batch_size=SYNC_CHUNK_SIZE,
+            )
+    # Gravações em lote não disparam post_save
+    if to_create or to_update:
+        refresh_collection_aggregates(collection_ids)
+        bump_catalog_version()
+
+    unchanged = len(existing) - len(to_update)
+    return len(to_create), len(to_update), unchanged
+
+
 def sync_new_nfts_from_securehabbo() -> Dict[str, Any]:
     """
-    Sincroniza novos NFTs da API securehabbo que ainda não estão cadastrados
+    Sincroniza os NFTs da API securehabbo com o banco em lote
+
+    Cotações e coleções são resolvidas uma única vez; cada lote de
+    SYNC_CHUNK_SIZE itens é comparado com as linhas existentes e gravado com
+    bulk_create/bulk_update (apenas campos alterados) em sua própria transação.
 
     Returns:
         Dicionário com estatísticas da sincronização
@@ -187,80 +312,74 @@ def sync_new_nfts_from_securehabbo() -> Dict[str, Any]:
                 "total_api": 0,
                 "new_items": 0,
                 "updated_items": 0,
+                "unchanged_items": 0,
                 "errors": [],
             }
 
-        # Buscar product_codes já cadastrados
-        existing_codes = set(
-            NFTItem.objects.filter(product_code__isnull=False)
-            .exclude(product_code__exact="")
-            .values_list("product_code", flat=True)
-        )
-
-        new_items_count = 0
-        updated_items_count = 0
         errors = []
+        rates = get_current_rates()
 
-        # Processar cada item da API
+        # Mapear todos os itens (o último registro de cada product_code prevalece)
+        mapped_by_code: Dict[str, Dict[str, Any]] = {}
+        collection_name_by_code: Dict[str, str] = {}
         for item_data in api_items:
             try:
-                product_code = item_data.get("id", "").strip()
-                if not product_code:
-                    continue
-
-                # Mapear dados
-                mapped_data = map_securehabbo_item_to_nft(item_data)
+                mapped_data = map_securehabbo_item_to_nft(item_data, rates)
                 if not mapped_data:
                     continue
-
-                # Verificar se já existe
-                exists = product_code in existing_codes
-
-                # Obter ou criar coleção
-                collection_name = item_data.get("collection_name", "").strip()
-                collection = None
-                if collection_name:
-                    collection = get_or_create_collection(collection_name)
-
-                if exists:
-                    # Atualizar item existente
-                    nft_item = NFTItem.objects.get(product_code=product_code)
-                    for key, value in mapped_data.items():
-                        if key != "product_code":  # Não atualizar product_code
-                            setattr(nft_item, key, value)
-                    if collection:
-                        nft_item.collection = collection
-                    nft_item.save()
-                    updated_items_count += 1
-                else:
-                    # Criar novo item
-                    mapped_data["collection"] = collection
-                    NFTItem.objects.create(**mapped_data)
-                    new_items_count += 1
-                    existing_codes.add(
-                        product_code
-                    )  # Adicionar ao set para evitar duplicatas
-
+                code = mapped_data["product_code"]
+                mapped_by_code[code] = mapped_data
+                collection_name_by_code[code] = (
+                    item_data.get("collection_name", "") or ""
+                ).strip()
             except Exception as e:
                 error_msg = (
                     f"Erro ao processar item {item_data.get('id', 'unknown')}: {str(e)}"
                 )
                 logger.error(error_msg, exc_info=True)
                 errors.append(error_msg)
+
+        collections = resolve_collections(collection_name_by_code.values())
+        collection_by_code = {
+            code: collections.get(name)
+            for code, name in collection_name_by_code.items()
+        }
+
+        new_items_count = 0
+        updated_items_count = 0
+        unchanged_items_count = 0
+        for chunk in _chunks(list(mapped_by_code), SYNC_CHUNK_SIZE):
+            try:
+                created, updated, unchanged = _sync_chunk(
+                    chunk, mapped_by_code, collection_by_code
+                )
+            except Exception as e:
+                error_msg = f"Erro ao gravar lote de {len(chunk)} itens: {str(e)}"
+                logger.error(error_msg, exc_info=True)
+                errors.append(error_msg)
                 continue
+            new_items_count += created
+            updated_items_count += updated
+            unchanged_items_count += unchanged
 
         result = {
             "status": "success",
             "total_api": len(api_items),
             "new_items": new_items_count,
             "updated_items": updated_items_count,
+            "unchanged_items": unchanged_items_count,
             "errors": errors,
-            "message": f"Sincronização concluída: {new_items_count} novos, {updated_items_count} atualizados",
+            "message": (
+                f"Sincronização concluída: {new_items_count} novos, "
+                f"{updated_items_count} atualizados, "
+                f"{unchanged_items_count} sem alteração"
+            ),
         }
 
         logger.info(
             f"Sincronização securehabbo concluída: {new_items_count} novos, "
-            f"{updated_items_count} atualizados de {len(api_items)} itens da API"
+            f"{updated_items_count} atualizados, {unchanged_items_count} sem "
+            f"alteração de {len(api_items)} itens da API"
         )
 
         return result
@@ -273,5 +392,6 @@ def sync_new_nfts_from_securehabbo() -> Dict[str, Any]:
             "total_api": 0,
             "new_items": 0,
             "updated_items": 0,
+            "unchanged_items": 0,
             "errors": [str(e)],
         }
@@ -0,0 +1,231 @@
+"""
+Consolidação dos acessos aos NFTs e ranking de itens em alta.
+
+``NFTItemAccess`` (um registro por acesso) é consolidado de forma incremental
+em ``NFTItemAccessHourly`` e ``NFTItemAccessDaily``: a cada execução só as
+horas recentes (``ROLLUP_LOOKBACK``) são recalculadas a partir dos registros
+brutos e os dias que elas tocam são recalculados a partir das horas. Como cada
+balde é recalculado por inteiro e gravado com upsert, a rotina é idempotente e
+pode rodar em paralelo com o flush dos acessos.
+
+O trending lê somente os totais diários; os top-K das janelas mais usadas ficam
+pré-calculados no cache. Registros brutos e horários antigos são removidos por
+``prune_access_data`` depois de garantidamente consolidados.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from core.maintenance import delete_in_chunks
+
+from .models import NFTItemAccess, NFTItemAccessDaily, NFTItemAccessHourly
+
+logger = logging.getLogger(__name__)
+
+
+TRENDING_CACHE_PREFIX = "nft:trending"
+ROLLUP_LOCK_KEY = "nft:trending:rollup-lock"
+ROLLUP_LOCK_TTL = 10 * 60
+# Horas recalculadas a cada execução (cobre o atraso do flush dos acessos)
+ROLLUP_LOOKBACK = timedelta(hours=2)
+# Janelas (dias) com top-K pré-calculado a cada consolidação
+PRECOMPUTED_WINDOWS = (1, 7, 30)
+
+
+def _setting(name: str, default: Any) -> Any:
+    return getattr(settings, name, default)
+
+
+def _top_k() -> int:
+    return int(_setting("NFT_TRENDING_TOP_K", 50))
+
+
+def _local_midnight(day) -> datetime:
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+# ---------------------------------------------------------------------------
+# Consolidação
+# ---------------------------------------------------------------------------
+
+
+def _rollup_hours(start: datetime, end: datetime) -> int:
+    rows = (
+        NFTItemAccess.objects.filter(accessed_at__gte=start, accessed_at__lt=end)
+        .annotate(bucket=TruncHour("accessed_at"))
+        .values("item_id", "bucket")
+        .annotate(total=Count("id"), last=Max("accessed_at"))
+        .order_by()
+    )
+    hourly = [
+        NFTItemAccessHourly(
+            item_id=row["item_id"],
+            hour=row["bucket"],
+            access_count=row["total"],
+            last_access_at=row["last"],
+        )
+        for row in rows
+    ]
+    if hourly:
+        NFTItemAccessHourly.objects.bulk_create(
+            hourly,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["item", "hour"],
+            update_fields=["access_count", "last_access_at"],
+        )
+    return len(hourly)
+
+
+def _rollup_day(day) -> int:
+    start = _local_midnight(day)
+    rows = (
+        NFTItemAccessHourly.objects.filter(
+            hour__gte=start, hour__lt=start + timedelta(days=1)
+        )
+        .values("item_id")
+        .annotate(total=Sum("access_count"), last=Max("last_access_at"))
+        .order_by()
+    )
+    daily = [
+        NFTItemAccessDaily(
+            item_id=row["item_id"],
+            day=day,
+            access_count=row["total"],
+            last_access_at=row["last"],
+        )
+        for row in rows
+    ]
+    if daily:
+        NFTItemAccessDaily.objects.bulk_create(
+            daily,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["item", "day"],
+            update_fields=["access_count", "last_access_at"],
+        )
+    return len(daily)
+
+
+def rollup_accesses(
+    since: Optional[datetime] = None, until: Optional[datetime] = None
+) -> Dict[str, int]:
+    """
+    Recalcula as horas de ``since`` (padrão: agora - ROLLUP_LOOKBACK) até
+    ``until`` e os dias que elas tocam.
+    """
+    until = until or timezone.now()
+    since = since or (until - ROLLUP_LOOKBACK)
+    # Horas sempre inteiras: o balde é recalculado do zero
+    start = since.replace(minute=0, second=0, microsecond=0)
+    hours = _rollup_hours(start, until)
+
+    days = 0
+    day = timezone.localdate(start)
+    last_day = timezone.localdate(until)
+    while day <= last_day:
+        days += _rollup_day(day)
+        day += timedelta(days=1)
+    return {"hourly_rows": hours, "daily_rows": days}
+
+
+def refresh_trending() -> Dict[str, Any]:
+    """Consolida os acessos recentes e pré-calcula o top-K das janelas padrão."""
+    if not cache.add(ROLLUP_LOCK_KEY, 1, timeout=ROLLUP_LOCK_TTL):
+        return {"status": "skipped", "reason": "Consolidação já em andamento"}
+    try:
+        result = rollup_accesses()
+        for days in PRECOMPUTED_WINDOWS:
+            _store_trending(days, compute_trending(days, _top_k()))
+    finally:
+        cache.delete(ROLLUP_LOCK_KEY)
+    return {"status": "success", **result}
+
+
+# ---------------------------------------------------------------------------
+# Leitura
+# ---------------------------------------------------------------------------
+
+
+def _trending_key(days: int) -> str:
+    return f"{TRENDING_CACHE_PREFIX}:{days}"
+
+
+def _store_trending(days: int, entries: List[Dict[str, Any]]) -> None:
+    # Sobrevive a algumas execuções perdidas da consolidação (a cada 5 min)
+    cache.set(_trending_key(days), entries, timeout=15 * 60)
+
+
+def compute_trending(days: int, limit: int) -> List[Dict[str, Any]]:
+    """Itens mais acessados desde o dia de (agora - ``days``), pelos totais diários."""
+    first_day = timezone.localdate(timezone.now() - timedelta(days=days))
+    rows = (
+        NFTItemAccessDaily.objects.filter(day__gte=first_day)
+        .values("item_id")
+        .annotate(total=Sum("access_count"), last=Max("last_access_at"))
+        .filter(total__gt=0)
+        .order_by("-total", "-last")[:limit]
+    )
+    return [{"item_id": row["item_id"], "access_count": row["total"]} for row in rows]
+
+
+def get_trending(days: int, limit: int) -> List[Dict[str, Any]]:
+    """Top ``limit`` itens da janela, do cache sempre que possível."""
+    if limit > _top_k():
+        return compute_trending(days, limit)
+    entries = cache.get(_trending_key(days))
+    if entries is None:
+        entries = compute_trending(days, _top_k())
+        _store_trending(days, entries)
+    return entries[:limit]
+
+
+# ---------------------------------------------------------------------------
+# Retenção
+# ---------------------------------------------------------------------------
+
+
+def prune_access_data() -> Dict[str, int]:
+    """
+    Aplica a retenção de acessos brutos, horários e diários.
+
+    Os cortes caem à meia-noite local, então nenhuma hora/dia fica parcialmente
+    removido; os registros brutos são reconsolidados antes de sair.
+    """
+    today = timezone.localdate()
+    raw_cutoff = _local_midnight(
+        today - timedelta(days=int(_setting("NFT_ACCESS_RAW_RETENTION_DAYS", 7)))
+    )
+    hourly_cutoff = _local_midnight(
+        today - timedelta(days=int(_setting("NFT_ACCESS_HOURLY_RETENTION_DAYS", 30)))
+    )
+    daily_cutoff = today - timedelta(
+        days=int(_setting("NFT_ACCESS_DAILY_RETENTION_DAYS", 400))
+    )
+
+    expired = NFTItemAccess.objects.filter(accessed_at__lt=raw_cutoff)
+    oldest = expired.aggregate(oldest=Min("accessed_at"))["oldest"]
+    if oldest is not None:
+        # Garante que nada some sem ter sido consolidado (ex.: beat parado)
+        rollup_accesses(since=max(oldest, hourly_cutoff), until=raw_cutoff)
+
+    result = {
+        "raw_deleted": delete_in_chunks(expired),
+        "hourly_deleted": delete_in_chunks(
+            NFTItemAccessHourly.objects.filter(hour__lt=hourly_cutoff)
+        ),
+        "daily_deleted": delete_in_chunks(
+            NFTItemAccessDaily.objects.filter(day__lt=daily_cutoff)
+        ),
+    }
+    logger.info("Retenção de acessos: %s", result)
+    return result
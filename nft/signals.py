@@ -0,0 +1,70 @@
+"""
+Sinais do app NFT (invalidação de caches derivados dos modelos)
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_catalog_version
+from .models import NFTItem, NftCollection, PricingConfig
+from .services import invalidate_markup_cache, markup_override_changed
+from .services_collections import refresh_collection_aggregates
+
+# Campos do item que entram nos agregados da coleção
+AGGREGATED_FIELDS = {
+    "collection",
+    "collection_id",
+    "last_price_brl",
+    "seven_day_volume_brl",
+}
+COLLECTION_FIELDS = {"collection", "collection_id"}
+
+
+@receiver(post_save, sender=PricingConfig)
+@receiver(post_delete, sender=PricingConfig)
+def pricing_config_changed(sender, **kwargs):
+    invalidate_markup_cache()
+    bump_catalog_version()
+
+
+@receiver(pre_save, sender=NFTItem)
+def nft_item_saving(sender, instance, update_fields=None, raw=False, **kwargs):
+    # Coleção anterior: um item movido também sai dos agregados da antiga
+    instance._previous_collection_id = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not COLLECTION_FIELDS & set(update_fields):
+        return
+    instance._previous_collection_id = (
+        NFTItem.objects.filter(pk=instance.pk)
+        .values_list("collection_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=NFTItem)
+def nft_item_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or AGGREGATED_FIELDS & set(update_fields):
+        refresh_collection_aggregates(
+            [instance.collection_id, getattr(instance, "_previous_collection_id", None)]
+        )
+    bump_catalog_version()
+    if update_fields is not None and "markup_percent" not in update_fields:
+        return
+    if markup_override_changed(instance.product_code, instance.markup_percent):
+        invalidate_markup_cache()
+
+
+@receiver(post_delete, sender=NFTItem)
+def nft_item_deleted(sender, instance, **kwargs):
+    refresh_collection_aggregates([instance.collection_id])
+    bump_catalog_version()
+    if instance.markup_percent is not None:
+        invalidate_markup_cache()
+
+
+@receiver(post_save, sender=NftCollection)
+@receiver(post_delete, sender=NftCollection)
+def collection_changed(sender, **kwargs):
+    # A listagem exibe nome/slug da coleção de cada item
+    bump_catalog_version()
@@ -32,19 +32,16 @@ def update_nft_price(self, product_code):
 
         # Busca dados atualizados da Immutable
         try:
-            from .services import fetch_item_from_immutable, fetch_min_listing_prices
-
-            # Buscar dados básicos do item
-            mapped_data, _ = fetch_item_from_immutable(product_code)
-
-            # Buscar o menor preço da Immutable (com markup aplicado)
-            min_prices = fetch_min_listing_prices(product_code)
-            if min_prices is not None:
-                pe, pu, pb = min_prices
-                # Sobrescrever preços com o menor valor da Immutable
-                mapped_data["last_price_eth"] = pe
-                mapped_data["last_price_usd"] = pu
-                mapped_data["last_price_brl"] = pb
+            from .services import fetch_items_from_immutable
+
+            # Dados básicos do item e menor preço da Immutable (com markup
+            # aplicado) a partir de uma única paginação das ordens ativas
+            items, errors = fetch_items_from_immutable([product_code])
+            if product_code not in items:
+                raise ImmutableAPIError(
+                    errors.get(product_code) or "Erro ao consultar a Immutable"
+                )
+            mapped_data, _ = items[product_code]
 
         except ImmutableAPIError as e:
             logger.error("Erro da API Immutable para %s: %s", product_code, e)
@@ -81,6 +78,10 @@ def update_nft_price(self, product_code):
 
             nft_item.save(update_fields=update_fields)
 
+            from .services_history import record_price_points
+
+            record_price_points({nft_item.pk: nft_item.last_price_brl})
+
         logger.info(
             "Preço atualizado com sucesso para %s: ETH=%s, USD=%s, BRL=%s",
             product_code,
@@ -173,121 +174,132 @@ def update_all_nft_prices_nightly():
         return {"status": "failed", "error": str(e)}
 
 
+@shared_task(bind=True)
+def update_all_nft_prices_sequential(self):
+    """
+    Task para atualizar todos os preços dos NFTs durante a madrugada.
+
+    Usa a rotina concorrente de services_refresh: um pool limitado de requisições
+    atrás de um token bucket compartilhado, gravação em lote e checkpoint por lote.
+    Quando o orçamento de tempo (NFT_PRICE_REFRESH_TIME_BUDGET) se esgota antes do
+    CELERY_TASK_TIME_LIMIT, a execução é pausada e a task se reagenda para
+    continuar a partir do último checkpoint.
+    """
+    from .services_refresh import refresh_all_nft_prices
+
+    try:
+        logger.info("Iniciando atualização concorrente de preços dos NFTs")
+        result = refresh_all_nft_prices()
+
+        if result.get("status") == "interrupted":
+            logger.info(
+                "Atualização #%s pausada em %d/%d itens; reagendando continuação",
+                result.get("run_id"),
+                result.get("processed_count", 0),
+                result.get("total_items", 0),
+            )
+            self.apply_async(countdown=5)
+
+        return result
+
+    except Exception as e:
+        logger.error("Erro na atualização de preços: %s", str(e), exc_info=True)
+        return {"status": "failed", "error": str(e)}
+
+
 @shared_task
-def update_all_nft_prices_sequential():
+def refresh_fx_rates(lock_held=False):
     """
-    Task para atualizar todos os preços dos NFTs sequencialmente.
-    Processa um item a cada 3.5 segundos de forma sequencial (não paralela).
+    Task para revalidar as cotações ETH/USD e USD/BRL no cache compartilhado.
+
+    Roda periodicamente pelo beat e também é disparada por get_current_rates
+    quando a cotação em cache fica antiga (nesse caso o lock já foi adquirido
+    por quem agendou, sinalizado por ``lock_held``).
     """
-    import time
+    from .services_rates import (
+        acquire_refresh_lock,
+        refresh_rates,
+        release_refresh_lock,
+    )
+
+    if not lock_held and not acquire_refresh_lock():
+        logger.info("Atualização de cotações já em andamento; ignorando")
+        return {"status": "skipped", "reason": "Atualização já em andamento"}
 
     try:
-        logger.info("Iniciando atualização sequencial de preços dos NFTs")
+        eth_usd, usd_brl = refresh_rates()
+        return {"status": "success", "eth_usd": str(eth_usd), "usd_brl": str(usd_brl)}
+    except Exception as e:
+        logger.error("Erro ao atualizar cotações: %s", str(e), exc_info=True)
+        return {"status": "failed", "error": str(e)}
+    finally:
+        release_refresh_lock()
 
-        # Busca todos os produtos que têm product_code válido
-        nft_items = (
-            NFTItem.objects.filter(product_code__isnull=False)
-            .exclude(product_code__exact="")
-            .values_list("product_code", flat=True)
-        )
 
-        total_items = len(nft_items)
-        logger.info("Total de produtos para atualizar: %d", total_items)
+@shared_task
+def flush_nft_accesses():
+    """Grava em lote os acessos enfileirados por RecordNFTAccessAPI."""
+    from .services_access import flush_access_buffer
 
-        if total_items == 0:
-            logger.warning("Nenhum produto encontrado para atualização")
-            return {"status": "skipped", "reason": "Nenhum produto encontrado"}
+    return flush_access_buffer()
 
-        # Processa sequencialmente, um item a cada 3.5 segundos
-        updated_count = 0
-        failed_count = 0
-        start_time = time.time()
 
-        for i, product_code in enumerate(nft_items):
-            try:
-                logger.info(
-                    "Processando item %d/%d: %s", i + 1, total_items, product_code
-                )
+@shared_task
+def refresh_nft_trending():
+    """Consolida os acessos recentes em horas/dias e recalcula o trending."""
+    from .services_trending import refresh_trending
 
-                # Chama a task de atualização de forma síncrona usando .apply()
-                # Isso executa a task imediatamente e retorna o resultado
-                task_result = update_nft_price.apply(args=[product_code])
-                result = (
-                    task_result.result
-                    if hasattr(task_result, "result")
-                    else task_result
-                )
+    return refresh_trending()
 
-                if result and result.get("status") == "success":
-                    updated_count += 1
-                else:
-                    failed_count += 1
-                    logger.warning("Falha ao atualizar %s: %s", product_code, result)
-
-                # Aguarda 3.5 segundos antes do próximo item (exceto no último)
-                if i < total_items - 1:
-                    time.sleep(3.5)
-
-                # Log a cada 50 itens
-                if (i + 1) % 50 == 0:
-                    elapsed = time.time() - start_time
-                    remaining = (total_items - (i + 1)) * 3.5
-                    logger.info(
-                        "Progresso: %d/%d atualizados (%.1f%%). Tempo decorrido: %.1fmin. Tempo restante estimado: %.1fmin",
-                        i + 1,
-                        total_items,
-                        (i + 1) / total_items * 100,
-                        elapsed / 60,
-                        remaining / 60,
-                    )
-
-            except Exception as e:
-                failed_count += 1
-                logger.error(
-                    "Erro ao processar %s: %s", product_code, str(e), exc_info=True
-                )
-                # Continua para o próximo item mesmo em caso de erro
-                if i < total_items - 1:
-                    time.sleep(3.5)
 
-        elapsed_time = time.time() - start_time
+@shared_task
+def rollup_nft_price_history():
+    """Consolida os pontos recentes do histórico de preços em horas/dias."""
+    from .services_history import rollup_price_history
 
-        logger.info(
-            "Atualização sequencial concluída! %d atualizados, %d falhas. Tempo total: %.1f minutos",
-            updated_count,
-            failed_count,
-            elapsed_time / 60,
-        )
+    return {"status": "success", **rollup_price_history()}
 
-        return {
-            "status": "success",
-            "total_items": total_items,
-            "updated_count": updated_count,
-            "failed_count": failed_count,
-            "elapsed_minutes": elapsed_time / 60,
-        }
 
-    except Exception as e:
-        logger.error("Erro na atualização sequencial: %s", str(e), exc_info=True)
-        return {"status": "failed", "error": str(e)}
+@shared_task
+def refresh_nft_collection_aggregates():
+    """Recalcula os agregados de todas as coleções (rede de segurança diária)."""
+    from .cache import bump_catalog_version
+    from .services_collections import refresh_collection_aggregates
+
+    updated = refresh_collection_aggregates()
+    bump_catalog_version()
+    return {"status": "success", "collections": updated}
+
+
+@shared_task
+def expire_nft_sales_windows():
+    """Desconta das métricas de 7 dias as vendas que saíram da janela."""
+    from .services_history import expire_seven_day_windows
+
+    return {"status": "success", **expire_seven_day_windows()}
 
 
 @shared_task
 def cleanup_old_price_updates():
     """
-    Task para limpar logs antigos e otimizar o banco de dados.
-    Esta task pode ser executada periodicamente para manter o sistema limpo.
+    Task semanal de retenção e manutenção do banco (core.maintenance).
+
+    Remove em lotes os dados vencidos (acessos, validações do Habbo, dados
+    transitórios de pedidos cancelados, tokens JWT expirados) e roda
+    VACUUM/ANALYZE nas tabelas afetadas. Retorna linhas e tempo por etapa.
     """
     try:
         logger.info("Iniciando limpeza de dados antigos")
 
-        # Aqui você pode adicionar lógica para limpar logs antigos,
-        # otimizar índices, etc.
+        from core.maintenance import run_maintenance
 
-        # Por enquanto, apenas loga que a limpeza foi executada
-        logger.info("Limpeza concluída")
+        report = run_maintenance()
 
-        return {"status": "success", "message": "Limpeza concluída"}
+        return {
+            "message": f"Limpeza concluída: {report['rows']} linhas "
+            f"em {report['seconds']:.1f}s",
+            **report,
+        }
 
     except Exception as e:
         logger.error("Erro na limpeza: %s", str(e))
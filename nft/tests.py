@@ -0,0 +1,317 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+import requests
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import search, services_async, services_checkout
+from .models import ExchangeRate, NFTItem, NFTPricePoint, NftCollection
+from .services import ImmutableAPIError, MarkupResolver, map_order_to_item_fields
+from .services_history import refresh_seven_day_stats
+
+
+class CollectionListOrderingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        now = timezone.now()
+        # Nomes em ordem alfabética inversa à data de criação
+        for i, name in enumerate(["Alpha", "Bravo", "Charlie"]):
+            collection = NftCollection.objects.create(
+                name=name, address=f"0x{i + 1:040x}"
+            )
+            # auto_now_add ignora o valor informado no create
+            NftCollection.objects.filter(pk=collection.pk).update(
+                created_at=now - timedelta(days=3 - i)
+            )
+
+    def _names(self, **params):
+        response = self.client.get(reverse("collections-list-create"), params)
+        self.assertEqual(response.status_code, 200)
+        return [row["name"] for row in response.json()]
+
+    def test_default_list_is_newest_first(self):
+        self.assertEqual(self._names(), ["Charlie", "Bravo", "Alpha"])
+
+
+class AsyncPricingFallbackRatesTests(TransactionTestCase):
+    """Checagem de BRL implausível pelo pipeline assíncrono (rates no event loop)."""
+
+    def setUp(self):
+        now = timezone.now()
+        ExchangeRate.objects.create(
+            pair="ETH-USD", rate=Decimal("4000"), source="test", fetched_at=now
+        )
+        ExchangeRate.objects.create(
+            pair="USD-BRL", rate=Decimal("5"), source="test", fetched_at=now
+        )
+
+    def _order(self, product_code):
+        return {
+            "buy": {
+                "type": "ETH",
+                # 0.07 ETH
+                "data": {"quantity": str(7 * 10**16), "decimals": 18},
+            },
+            "sell": {"data": {"properties": {"productCode": product_code}}},
+        }
+
+    def test_implausible_brl_uses_stored_rates(self):
+        code = "fallback-test"
+
+        async def orders_by_product(product_codes, **kwargs):
+            return {code: [self._order(code)]}, {}
+
+        async def broken_rates():
+            # Cotação corrompida: 0.07 ETH sairia por R$ 0,07
+            return Decimal("1"), Decimal("1")
+
+        with mock.patch.object(
+            services_async, "afetch_active_orders_by_product", orders_by_product
+        ), mock.patch.object(services_async, "aget_current_rates", broken_rates):
+            items, errors = services_async.run_sync(
+                services_async.afetch_items_from_immutable([code])
+            )
+
+        self.assertEqual(errors, {})
+        mapped, _ = items[code]
+        multiplier = MarkupResolver.load().multiplier_for(code)
+        # 0.07 ETH * 4000 USD * 5 BRL = R$ 1400,00 antes do markup
+        self.assertEqual(
+            mapped["last_price_brl"],
+            (Decimal("1400.00") * multiplier).quantize(Decimal("0.01")),
+        )
+
+
+class ActiveOrdersBatchFallbackTests(SimpleTestCase):
+    """Um lote com página falhando é refeito produto a produto."""
+
+    def test_failed_chunk_falls_back_per_product(self):
+        async def paginate(params, headers, **kwargs):
+            codes = json.loads(params["sell_metadata"])["productCode"]
+            if len(codes) > 1 or codes == ["broken"]:
+                raise ImmutableAPIError("página com falha")
+            self.assertEqual(params.get("order_by"), "buy_quantity")
+            return [{"sell": {"data": {"properties": {"productCode": codes[0]}}}}]
+
+        async def single_page(*args, **kwargs):
+            return None
+
+        with mock.patch.object(
+            services_async, "_paginate_immutable", paginate
+        ), mock.patch.object(services_async, "_get_json_with_retries", single_page):
+            orders, errors = services_async.run_sync(
+                services_async.afetch_active_orders_by_product(
+                    ["ok-1", "broken", "ok-2"], chunk_size=3
+                )
+            )
+
+        self.assertEqual(set(orders), {"ok-1", "ok-2"})
+        self.assertEqual(len(orders["ok-1"]), 1)
+        self.assertEqual(set(errors), {"broken"})
+
+
+class NFTItemUpsertTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.collection = NftCollection.objects.create(
+            name="Coleção", address="0x" + "a" * 40
+        )
+
+    def _post(self, **patches):
+        with mock.patch("nft.views.items.refresh_seven_day_stats"), mock.patch(
+            "nft.views.items.fetch_items_from_immutable", **patches
+        ):
+            return self.client.post(
+                reverse("nft-items-upsert"), {"product_code": "sem-listagem"}
+            )
+
+    def test_product_without_listings_is_upserted_with_zero_prices(self):
+        mapped = map_order_to_item_fields(
+            None, "sem-listagem", Decimal("4000"), Decimal("5")
+        )
+        response = self._post(
+            return_value=({"sem-listagem": (mapped, self.collection.address)}, {})
+        )
+
+        self.assertEqual(response.status_code, 201)
+        item = NFTItem.objects.get(product_code="sem-listagem")
+        self.assertEqual(item.last_price_brl, 0)
+        self.assertEqual(item.collection_id, self.collection.pk)
+        # Preço zerado não entra no histórico
+        self.assertFalse(NFTPricePoint.objects.filter(item=item).exists())
+        self.assertNotIn("sales_watermark", response.data)
+        self.assertNotIn("seven_day_window_start", response.data)
+
+    def test_transport_error_is_bad_gateway(self):
+        response = self._post(side_effect=requests.ConnectionError("offline"))
+        self.assertEqual(response.status_code, 502)
+
+    def test_failed_product_is_bad_gateway(self):
+        response = self._post(return_value=({}, {"sem-listagem": "erro"}))
+        self.assertEqual(response.status_code, 502)
+
+
+class SevenDayStatsRefreshTests(TestCase):
+    def setUp(self):
+        self.watermark = timezone.now() - timedelta(hours=3)
+        self.item = NFTItem.objects.create(
+            name="Item",
+            type="weapon",
+            product_code="com-vendas",
+            last_price_eth=Decimal("0"),
+            last_price_usd=Decimal("0"),
+            last_price_brl=Decimal("0"),
+            sales_watermark=self.watermark,
+        )
+
+    def test_failed_fetch_keeps_the_watermark(self):
+        with mock.patch(
+            "nft.services._paginate_immutable",
+            side_effect=ImmutableAPIError("página com falha"),
+        ) as paginate:
+            refresh_seven_day_stats(self.item)
+
+        params = paginate.call_args.args[0]
+        self.assertEqual(params["order_by"], "updated_timestamp")
+        self.assertEqual(params["direction"], "asc")
+        self.assertTrue(paginate.call_args.kwargs["strict"])
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.sales_watermark, self.watermark)
+        self.assertIsNotNone(self.item.seven_day_window_start)
+
+
+class CollectionAggregatesSignalTests(TestCase):
+    def test_moving_an_item_refreshes_both_collections(self):
+        old, new = (
+            NftCollection.objects.create(name=name, address=f"0x{i + 1:040x}")
+            for i, name in enumerate(["Antiga", "Nova"])
+        )
+        item = NFTItem.objects.create(
+            name="Item",
+            type="weapon",
+            product_code="movido",
+            last_price_eth=Decimal("0.01"),
+            last_price_usd=Decimal("40"),
+            last_price_brl=Decimal("200"),
+            collection=old,
+        )
+        old.refresh_from_db()
+        self.assertEqual(old.nft_items_count, 1)
+
+        item.collection = new
+        item.save()
+
+        old.refresh_from_db()
+        new.refresh_from_db()
+        self.assertEqual(old.nft_items_count, 0)
+        self.assertIsNone(old.floor_price_brl)
+        self.assertEqual(new.nft_items_count, 1)
+        self.assertEqual(new.floor_price_brl, Decimal("200"))
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        search.reset_search_backend_cache()
+        self.addCleanup(search.reset_search_backend_cache)
+
+    def _create_item(self, name):
+        return NFTItem.objects.create(
+            name=name,
+            type="weapon",
+            product_code=f"code-{name}",
+            last_price_eth=Decimal("0"),
+            last_price_usd=Decimal("0"),
+            last_price_brl=Decimal("0"),
+        )
+
+    def test_finds_items_and_collections_by_accent_folded_prefix(self):
+        item = self._create_item("Espada Flamejante do Dragão")
+        collection = NftCollection.objects.create(
+            name="Coleção Relíquias Ancestrais", address="0x" + "b" * 40
+        )
+
+        self.assertEqual(search.search_backend(NFTItem._meta.db_table), "sqlite")
+        self.assertEqual(
+            list(search.search_queryset(NFTItem.objects.all(), "dragao flam")),
+            [item],
+        )
+        self.assertEqual(
+            list(search.search_queryset(NftCollection.objects.all(), "colecao reli")),
+            [collection],
+        )
+
+    def test_missing_triggers_fall_back_and_are_repaired(self):
+        table = NFTItem._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER {search.fts_table(table)}_ai")
+
+        self.assertIsNone(search.search_backend(table))
+        self.assertEqual(search.repair_search_indexes(), [table])
+        self.assertEqual(search.search_backend(table), "sqlite")
+
+        item = self._create_item("Poção Mágica")
+        self.assertEqual(
+            list(search.search_queryset(NFTItem.objects.all(), "pocao")), [item]
+        )
+
+
+class CheckoutPricesDeadlineTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.started = []
+        self.cancelled = []
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown, wait=True)
+        patcher = mock.patch(
+            "nft.services_checkout._get_executor", return_value=executor
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _slow_fetch(self, product_code, timeout):
+        self.started.append(product_code)
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            self.cancelled.append(product_code)
+            raise
+
+    def test_deadline_stops_running_and_cancels_queued_lookups(self):
+        with mock.patch(
+            "nft.services_async.afetch_min_listing_prices", self._slow_fetch
+        ):
+            started = time.monotonic()
+            prices = services_checkout.get_checkout_prices(["a", "b"], deadline=0.3)
+            elapsed = time.monotonic() - started
+            # O pool (1 worker) fica livre logo após o prazo
+            services_checkout._get_executor().submit(lambda: None).result(timeout=2)
+
+        self.assertEqual(prices, {"a": None, "b": None})
+        self.assertLess(elapsed, 2)
+        self.assertEqual(self.started, ["a"])
+        self.assertEqual(self.cancelled, ["a"])
+
+    def test_zero_price_is_not_cached(self):
+        services_checkout.store_listing_price(
+            "sem-listagem", (Decimal("0"), Decimal("0"), Decimal("0"))
+        )
+        services_checkout.store_listing_price(
+            "listado", (Decimal("0.01"), Decimal("40"), Decimal("200"))
+        )
+
+        self.assertEqual(
+            list(
+                services_checkout.get_cached_listing_prices(["sem-listagem", "listado"])
+            ),
+            ["listado"],
+        )
@@ -3,6 +3,7 @@ from django.urls import path
 from .views.items import (
     NFTItemUpsertAPI,
     NFTItemListAPI,
+    NFTItemAutocompleteAPI,
     TrendingByAccessAPI,
     PricingConfigAPI,
 )
@@ -21,6 +22,12 @@ urlpatterns = [
     path("nft/", NFTItemUpsertAPI.as_view(), name="nft-items-upsert"),
     # GET list with filters/search/order/pagination
     path("nft/items/", NFTItemListAPI.as_view(), name="nft-items-list"),
+    # GET prefix suggestions for the search box
+    path(
+        "nft/items/autocomplete/",
+        NFTItemAutocompleteAPI.as_view(),
+        name="nft-items-autocomplete",
+    ),
     # POST record access to an item
     path("nft/items/view/", RecordNFTAccessAPI.as_view(), name="nft-items-record-view"),
     # GET top by access (last N days), default limit=4
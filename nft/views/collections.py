@@ -2,11 +2,14 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
 from rest_framework.permissions import AllowAny, IsAdminUser
 from decimal import Decimal
 
+from core.pagination import HybridPagination
+
 from ..models import NftCollection
+from ..search import search_queryset
+from ..services_collections import get_collection_stats
 from ..serializers.collections import NftCollectionSerializer
 from ..docs.collections import (
     collection_list_schema,
@@ -31,21 +34,24 @@ class CollectionListCreateAPIView(APIView):
     @collection_list_schema
     def get(self, request):
         """Lista todas as coleções NFT com suporte a busca."""
-        from django.db.models import Count
-
         q = request.query_params.get("q")
-        qs = NftCollection.objects.annotate(items_count_calculated=Count("items"))
+        # items_count vem de nft_items_count (sem COUNT por requisição)
+        qs = NftCollection.objects.all()
 
         if q:
-            qs = qs.filter(
-                Q(name__icontains=q)
-                | Q(description__icontains=q)
-                | Q(address__icontains=q)
-                | Q(slug__icontains=q)
-                | Q(creator_name__icontains=q)
-            )
-
-        qs = qs.order_by("-created_at")
+            # Busca indexada (nft.search), ordenada por relevância
+            qs = search_queryset(qs, q)
+        # Meta.ordering (name) deixa qs.ordered verdadeiro; só a ordenação
+        # explícita por relevância da busca substitui a padrão
+        if not qs.query.order_by:
+            qs = qs.order_by("-created_at")
+
+        # Paginação opcional: sem ?page/?cursor a resposta continua sendo a lista
+        paginator = HybridPagination()
+        if {"page", paginator.cursor_query_param} & set(request.query_params):
+            page = paginator.paginate_queryset(qs, request, view=self)
+            serializer = NftCollectionSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
         serializer = NftCollectionSerializer(qs, many=True)
         return Response(serializer.data)
 
@@ -77,27 +83,7 @@ class CollectionStatsAPIView(APIView):
     @collection_stats_schema
     def get(self, request):
         """Retorna estatísticas agregadas de todas as coleções."""
-        from django.db.models import Sum, Avg
-
-        collections = NftCollection.objects.all()
-
-        stats = {
-            "total_collections": collections.count(),
-            "total_items": collections.aggregate(Sum("items_count"))["items_count__sum"]
-            or 0,
-            "total_owners": collections.aggregate(Sum("owners_count"))[
-                "owners_count__sum"
-            ]
-            or 0,
-            "average_floor_price": float(
-                collections.aggregate(Avg("floor_price"))["floor_price__avg"] or 0
-            ),
-            "total_volume": float(
-                collections.aggregate(Sum("total_volume"))["total_volume__sum"] or 0
-            ),
-        }
-
-        return Response(stats)
+        return Response(get_collection_stats())
 
 
 class CollectionTrendingAPIView(APIView):
@@ -1,28 +1,34 @@
+import hashlib
+
+import requests
+
 from rest_framework import permissions, status, generics, filters as drf_filters
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
-from ..docs.items import nft_item_upsert_schema, nft_item_list_schema
-
-from django.db.models import Count, Max
-from django.utils import timezone
-from datetime import timedelta
+from ..docs.items import (
+    nft_item_autocomplete_schema,
+    nft_item_list_schema,
+    nft_item_upsert_schema,
+)
+from django.core.cache import cache
 from ..models import NFTItem, PricingConfig
 from ..serializers.items import (
     NFTItemSerializer,
+    NFTItemListSerializer,
     FetchByProductCodeSerializer,
     PricingConfigSerializer,
 )
-from ..services import (
-    fetch_item_from_immutable,
-    ImmutableAPIError,
-    fetch_7d_sales_stats,
-    fetch_min_listing_prices,
-)
+from ..services import ImmutableAPIError, fetch_items_from_immutable
+from ..services_checkout import store_listing_price
+from ..services_history import record_price_points, refresh_seven_day_stats
 from rest_framework.permissions import AllowAny
-from ..filters import NFTItemFilter
+from ..filters import IndexedSearchFilter, NFTItemFilter
+from ..cache import CachedListMixin, get_catalog_version
+from ..search import normalize, search_queryset
+from ..services_trending import get_trending
 from nft.models import NftCollection
 
 
@@ -39,20 +45,37 @@ class NFTItemUpsertAPI(APIView):
         serializer.is_valid(raise_exception=True)
         product_code = serializer.validated_data["product_code"]
 
+        if not str(product_code).strip():
+            return Response(
+                {"detail": "product_code inválido"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Uma única paginação das ordens ativas fornece os dados do item e o menor
+        # preço de listagem (mesma lógica exibida na página do produto)
         try:
-            mapped, collection_address = fetch_item_from_immutable(product_code)
-        except ValueError as e:
-            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        except ImmutableAPIError:
+            items, errors = fetch_items_from_immutable([product_code])
+        except (ImmutableAPIError, requests.RequestException):
             return Response(
                 {"detail": "Falha ao consultar a Immutable"},
                 status=status.HTTP_502_BAD_GATEWAY,
             )
-        except Exception:
+        if product_code in errors or product_code not in items:
             return Response(
                 {"detail": "Falha ao consultar a Immutable"},
                 status=status.HTTP_502_BAD_GATEWAY,
             )
+        # Sem listagens ativas o item é gravado com preços zerados
+        mapped, collection_address = items[product_code]
+        # O checkout logo em seguida reaproveita o preço exibido na página
+        store_listing_price(
+            product_code,
+            (
+                mapped.get("last_price_eth"),
+                mapped.get("last_price_usd"),
+                mapped.get("last_price_brl"),
+            ),
+        )
 
         # Resolve the collection: by contract address if available, or from existing item
         existing_item = (
@@ -84,46 +107,35 @@ class NFTItemUpsertAPI(APIView):
                 )
             return Response({"detail": msg}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Compute 7d sales metrics (best-effort)
-        try:
-            seven_d = fetch_7d_sales_stats(product_code)
-        except Exception:
-            seven_d = {}
-
-        # Ensure the saved price matches the product page display logic (minimum listing)
-        try:
-            min_prices = fetch_min_listing_prices(product_code)
-        except Exception:
-            min_prices = None
-
-        if min_prices is not None:
-            pe, pu, pb = min_prices
-            # override only price fields to mirror frontend
-            mapped["last_price_eth"] = pe
-            mapped["last_price_usd"] = pu
-            mapped["last_price_brl"] = pb
-
-        # Proceed with upsert, binding collection and 7d metrics
-        defaults = {**mapped, **seven_d, "collection": collection_obj}
+        # Proceed with upsert, binding collection
+        defaults = {**mapped, "collection": collection_obj}
         obj, created = NFTItem.objects.update_or_create(
             product_code=product_code,
             defaults=defaults,
         )
+        record_price_points({obj.pk: obj.last_price_brl})
+
+        # 7d sales metrics from the stored series; only new sales are fetched
+        # from Immutable (best-effort)
+        try:
+            refresh_seven_day_stats(obj)
+        except Exception:
+            pass
         out = NFTItemSerializer(obj)
         return Response(
             out.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
         )
 
 
-class NFTItemListAPI(generics.ListAPIView):
+class NFTItemListAPI(CachedListMixin, generics.ListAPIView):
     queryset = NFTItem.objects.all()
-    serializer_class = NFTItemSerializer
+    serializer_class = NFTItemListSerializer
     permission_classes = [AllowAny]
     filterset_class = NFTItemFilter
     # Enable filtering, search and ordering backends
     filter_backends = [
         DjangoFilterBackend,
-        drf_filters.SearchFilter,
+        IndexedSearchFilter,
         drf_filters.OrderingFilter,
     ]
     # Include both English (name) and Portuguese (name_pt_br) for search
@@ -150,6 +162,14 @@ class NFTItemListAPI(generics.ListAPIView):
 
     def get_queryset(self):
         qs = super().get_queryset()
+        # Carrega só as colunas serializadas (sem blueprint) e a coleção no mesmo JOIN
+        fields = NFTItemListSerializer.requested_fields(self.request)
+        columns = NFTItemListSerializer.columns_for(fields)
+        if "collection" in columns and any(
+            c.startswith("collection__") for c in columns
+        ):
+            qs = qs.select_related("collection")
+        qs = qs.only(*columns)
         # Hard-enforce promo_only even if filters are misconfigured on some environments
         val = self.request.query_params.get("promo_only")
         truthy = {"1", "true", "t", "yes", "y", "on"}
@@ -175,6 +195,61 @@ class NFTItemListAPI(generics.ListAPIView):
         return qs
 
 
+class NFTItemAutocompleteAPI(APIView):
+    """Sugestões por prefixo para a caixa de busca do catálogo."""
+
+    permission_classes = [AllowAny]
+    MIN_QUERY_LENGTH = 2
+    DEFAULT_LIMIT = 8
+    MAX_LIMIT = 20
+    CACHE_TTL = 60
+
+    @nft_item_autocomplete_schema
+    def get(self, request):
+        q = normalize(request.query_params.get("q", ""))
+        if len(q) < self.MIN_QUERY_LENGTH:
+            return Response({"results": []})
+        try:
+            limit = int(request.query_params.get("limit", self.DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            limit = self.DEFAULT_LIMIT
+        limit = max(1, min(limit, self.MAX_LIMIT))
+
+        # Mesma versão de catálogo da listagem: invalida junto com ela
+        version = get_catalog_version()["version"]
+        digest = hashlib.sha1(q.encode("utf-8")).hexdigest()
+        cache_key = f"nft:autocomplete:{version}:{limit}:{digest}"
+        results = cache.get(cache_key)
+        if results is None:
+            qs = search_queryset(
+                NFTItem.objects.select_related("collection").only(
+                    "id",
+                    "product_code",
+                    "name",
+                    "name_pt_br",
+                    "image_url",
+                    "collection",
+                    "collection__slug",
+                ),
+                q,
+            )
+            results = [
+                {
+                    "id": item.id,
+                    "product_code": item.product_code,
+                    "name": item.name_pt_br or item.name,
+                    "original_name": item.name,
+                    "image_url": item.image_url,
+                    "collection_slug": (
+                        item.collection.slug if item.collection else None
+                    ),
+                }
+                for item in qs[:limit]
+            ]
+            cache.set(cache_key, results, timeout=self.CACHE_TTL)
+        return Response({"results": results})
+
+
 class PricingConfigAPI(APIView):
     """
     API para obter a configuração de markup global
@@ -284,20 +359,12 @@ class TrendingByAccessAPI(APIView):
     def get(self, request):
         limit = int(request.query_params.get("limit", 4))
         days = int(request.query_params.get("days", 7))
-        cutoff = timezone.now() - timedelta(days=days)
 
-        # Get top items by access count in the last N days
-        top_items = (
-            NFTItem.objects.filter(
-                accesses__accessed_at__gte=cutoff,
-            )
-            .annotate(
-                access_count=Count("accesses"),
-                last_access=Max("accesses__accessed_at"),
-            )
-            .filter(access_count__gt=0)
-            .order_by("-access_count", "-last_access")[:limit]
-        )
+        # Ranking vem dos totais diários consolidados (top-K em cache)
+        entries = get_trending(days, limit)
+        ids = [entry["item_id"] for entry in entries]
+        items = NFTItem.objects.select_related("collection").in_bulk(ids)
+        top_items = [items[pk] for pk in ids if pk in items]
 
         serializer = NFTItemSerializer(top_items, many=True)
         return Response({"results": serializer.data})
@@ -0,0 +1,104 @@
+"""
+Gravação de pedidos na finalização da compra.
+
+Reserva do cupom, pedido e itens são gravados numa única transação: o pedido
+entra com um ``INSERT`` só (o ``order_id`` é sorteado sem consulta prévia e a
+unicidade fica a cargo da constraint) e os itens com um ``bulk_create`` já com
+``total_price`` calculado. Se o ``order_id`` sorteado colidir, a transação
+inteira é desfeita (inclusive o uso do cupom) e repetida com outro código.
+
+O email de pedido criado só é enfileirado depois do commit, quando o worker já
+consegue ler o pedido.
+"""
+
+import logging
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from django.db import IntegrityError, transaction
+
+from .coupons import reserve_coupon_use
+from .models import ORDER_ID_ATTEMPTS, Coupon, Order, OrderItem
+from .utils import generate_order_id
+
+logger = logging.getLogger(__name__)
+
+
+class CouponUnavailable(Exception):
+    """O cupom não tem mais usos disponíveis (ou saiu da validade)."""
+
+
+def _enqueue_order_tasks(order_pk: int) -> None:
+    from .tasks import send_order_created_email_task
+
+    # Email de pedido criado (assíncrono para não bloquear a resposta); o
+    # cancelamento por falta de pagamento é feito em lote (orders.expiry)
+    send_order_created_email_task.delay(order_pk)
+
+
+def _insert_order(
+    order: Order, items_data: List[Dict[str, Any]], coupon: Optional[Coupon]
+) -> None:
+    with transaction.atomic():
+        # Reserva com UPDATE condicional; um rollback devolve o uso
+        if coupon and not reserve_coupon_use(coupon.pk):
+            raise CouponUnavailable(coupon.code)
+
+        order.save(force_insert=True)
+        # bulk_create não chama OrderItem.save: o total já vai calculado
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(
+                    order=order,
+                    content_type=item_data["content_type"],
+                    object_id=item_data["object_id"],
+                    quantity=item_data["quantity"],
+                    unit_price=item_data["unit_price"],
+                    total_price=item_data["unit_price"] * item_data["quantity"],
+                )
+                for item_data in items_data
+            ]
+        )
+        transaction.on_commit(lambda: _enqueue_order_tasks(order.pk))
+
+
+def create_order(
+    *,
+    user,
+    items_data: List[Dict[str, Any]],
+    subtotal: Decimal,
+    discount_amount: Decimal,
+    total: Decimal,
+    coupon: Optional[Coupon] = None,
+    notes: str = "",
+) -> Order:
+    """
+    Grava o pedido pendente e seus itens numa única transação.
+
+    Levanta ``CouponUnavailable`` se o uso do cupom não puder ser reservado.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        order = Order(
+            order_id=generate_order_id(),
+            user=user,
+            subtotal=subtotal,
+            discount_amount=discount_amount,
+            total=total,
+            coupon=coupon,
+            notes=notes,
+            status="pending",
+        )
+        try:
+            _insert_order(order, items_data, coupon)
+            return order
+        except IntegrityError:
+            # Só repete quando a falha foi a colisão do order_id sorteado
+            collided = Order.objects.filter(order_id=order.order_id).exists()
+            if not collided or attempt >= ORDER_ID_ATTEMPTS:
+                raise
+            logger.warning(
+                f"Colisão de order_id {order.order_id} (tentativa {attempt}), "
+                "sorteando outro"
+            )
@@ -0,0 +1,71 @@
+"""
+Reserva e devolução de usos de cupons.
+
+``uses_count`` é alterado só por ``UPDATE`` condicional com expressões ``F``,
+nunca por ``save()`` do objeto carregado: dois checkouts simultâneos não perdem
+incrementos e o ``WHERE uses_count < max_uses`` impede que o cupom seja usado
+além do limite. A linha é travada só durante o próprio ``UPDATE``.
+"""
+
+from typing import Dict, Optional
+
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Coupon
+
+
+def reserve_coupon_use(coupon_id: int) -> bool:
+    """
+    Consome um uso do cupom se ele ainda estiver ativo, no prazo e com usos.
+
+    Retorna False quando o cupom não pode mais ser usado (nada é alterado).
+    """
+    now = timezone.now()
+    updated = (
+        Coupon.objects.filter(
+            pk=coupon_id,
+            is_active=True,
+            valid_from__lte=now,
+            valid_until__gte=now,
+        )
+        .filter(Q(max_uses__isnull=True) | Q(uses_count__lt=F("max_uses")))
+        .update(uses_count=F("uses_count") + 1)
+    )
+    return updated == 1
+
+
+def release_coupon_use(coupon_id: Optional[int], uses: int = 1) -> bool:
+    """Devolve ``uses`` usos do cupom (sem deixar o contador negativo)."""
+    if not coupon_id or uses < 1:
+        return False
+    updated = Coupon.objects.filter(pk=coupon_id, uses_count__gte=uses).update(
+        uses_count=F("uses_count") - uses
+    )
+    if not updated:
+        # Contador menor que os usos devolvidos (ex.: ajuste manual): zera
+        updated = Coupon.objects.filter(pk=coupon_id, uses_count__gt=0).update(
+            uses_count=0
+        )
+    return updated == 1
+
+
+def release_coupon_uses(uses_by_coupon: Dict[int, int]) -> int:
+    """
+    Devolve usos de vários cupons num único ``UPDATE``.
+
+    ``uses_by_coupon`` mapeia id do cupom -> usos a devolver (ex.: pedidos
+    cancelados em lote). Retorna quantos cupons foram atualizados.
+    """
+    uses_by_coupon = {pk: n for pk, n in uses_by_coupon.items() if pk and n > 0}
+    if not uses_by_coupon:
+        return 0
+    released = Case(
+        *(When(pk=pk, then=Value(n)) for pk, n in uses_by_coupon.items()),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    return Coupon.objects.filter(pk__in=uses_by_coupon).update(
+        uses_count=Greatest(F("uses_count") - released, Value(0))
+    )
@@ -8,6 +8,8 @@ from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils.html import strip_tags
 
+from .queries import resolve_order_items
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,6 +18,12 @@ def get_admin_email():
     return getattr(settings, "ADMIN_EMAIL", settings.DEFAULT_FROM_EMAIL)
 
 
+def _order_items(order):
+    """Itens do pedido com os objetos apontados (item.item) carregados em lote"""
+    resolve_order_items([order])
+    return order.items.all()
+
+
 def send_order_created_email(order):
     """
     Envia email quando um pedido é criado
@@ -36,7 +44,7 @@ def send_order_created_email(order):
             "user": user,
             "order_id": order.order_id,
             "total": order.total,
-            "items": order.items.all(),
+            "items": _order_items(order),
             "site_url": (
                 getattr(settings, "FRONTEND_ORIGINS", ["http://localhost:3000"])[0]
                 if getattr(settings, "FRONTEND_ORIGINS", [])
@@ -142,7 +150,7 @@ def send_payment_confirmed_email(order):
             "order_id": order.order_id,
             "total": order.total,
             "paid_at": order.paid_at,
-            "items": order.items.all(),
+            "items": _order_items(order),
             "site_url": (
                 getattr(settings, "FRONTEND_ORIGINS", ["http://localhost:3000"])[0]
                 if getattr(settings, "FRONTEND_ORIGINS", [])
@@ -201,7 +209,7 @@ def send_payment_confirmed_admin_email(order):
             "order_id": order.order_id,
             "total": order.total,
             "paid_at": order.paid_at,
-            "items": order.items.all(),
+            "items": _order_items(order),
         }
 
         # Renderiza o template HTML
@@ -257,7 +265,7 @@ def send_order_delivered_email(order):
             "user": user,
             "order_id": order.order_id,
             "delivered_at": order.delivered_at,
-            "items": order.items.all(),
+            "items": _order_items(order),
             "site_url": (
                 getattr(settings, "FRONTEND_ORIGINS", ["http://localhost:3000"])[0]
                 if getattr(settings, "FRONTEND_ORIGINS", [])
@@ -318,7 +326,7 @@ def send_order_cancelled_email(order, reason="Tempo esgotado para pagamento"):
             "order_id": order.order_id,
             "total": order.total,
             "reason": reason,
-            "items": order.items.all(),
+            "items": _order_items(order),
             "site_url": (
                 getattr(settings, "FRONTEND_ORIGINS", ["http://localhost:3000"])[0]
                 if getattr(settings, "FRONTEND_ORIGINS", [])
@@ -0,0 +1,128 @@
+"""
+Expiração de pedidos pendentes não pagos.
+
+Em vez de uma task com ETA por pedido (que fica na memória dos workers até
+vencer), um único sweeper periódico (``orders.tasks.expire_unpaid_orders``)
+funciona como uma roda de tempo com um tique por execução: a cada tique todos os
+pedidos cujo prazo de pagamento (``ORDER_PAYMENT_TIMEOUT_MINUTES``) venceu desde
+o tique anterior são cancelados de uma vez.
+
+Cada lote trava os pedidos com ``SKIP LOCKED`` (duas execuções sobrepostas não
+disputam as mesmas linhas), cancela com um único ``UPDATE`` e devolve os usos de
+cupom agregados num único ``UPDATE`` por lote. Os emails de cancelamento saem
+como tasks separadas, enfileiradas após o commit.
+
+O relatório traz o atraso (lag) entre o vencimento de cada pedido e o seu
+cancelamento, e quantos pedidos vencidos ficaram para o próximo tique.
+"""
+
+import logging
+import time
+from collections import Counter
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .coupons import release_coupon_uses
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+
+EXPIRED_REASON = "Tempo esgotado para pagamento"
+
+
+def _setting(name: str, default: Any) -> Any:
+    return getattr(settings, name, default)
+
+
+def payment_timeout() -> timedelta:
+    return timedelta(minutes=int(_setting("ORDER_PAYMENT_TIMEOUT_MINUTES", 5)))
+
+
+def expired_orders(now=None):
+    """Pedidos pendentes cujo prazo de pagamento já venceu."""
+    cutoff = (now or timezone.now()) - payment_timeout()
+    return Order.objects.filter(
+        status="pending", paid_at__isnull=True, created_at__lt=cutoff
+    )
+
+
+def _enqueue_cancelled_emails(order_ids: List[int], reason: str) -> None:
+    from .tasks import send_order_cancelled_email_task
+
+    for order_id in order_ids:
+        send_order_cancelled_email_task.delay(order_id, reason)
+
+
+def _expire_batch(now, batch_size: int, reason: str) -> List[float]:
+    """Cancela um lote de pedidos vencidos e devolve o lag (s) de cada um."""
+    timeout = payment_timeout()
+    with transaction.atomic():
+        rows = list(
+            expired_orders(now)
+            .select_for_update(skip_locked=True)
+            .order_by("created_at")
+            .values_list("id", "coupon_id", "created_at")[:batch_size]
+        )
+        if not rows:
+            return []
+        ids = [order_id for order_id, _, _ in rows]
+        # QuerySet.update não mexe no updated_at (auto_now)
+        Order.objects.filter(id__in=ids, status="pending").update(
+            status="cancelled", updated_at=now
+        )
+        release_coupon_uses(Counter(coupon_id for _, coupon_id, _ in rows if coupon_id))
+        transaction.on_commit(lambda: _enqueue_cancelled_emails(ids, reason))
+    return [
+        max(0.0, (now - (created_at + timeout)).total_seconds())
+        for _, _, created_at in rows
+    ]
+
+
+def expire_unpaid_orders(
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    reason: str = EXPIRED_REASON,
+) -> Dict[str, Any]:
+    """
+    Cancela em lote os pedidos pendentes vencidos.
+
+    Para após ``max_batches`` lotes (o restante fica para o próximo tique).
+    """
+    batch_size = batch_size or int(_setting("ORDER_EXPIRY_BATCH_SIZE", 500))
+    max_batches = max_batches or int(_setting("ORDER_EXPIRY_MAX_BATCHES", 20))
+    started = time.monotonic()
+    now = timezone.now()
+
+    lags: List[float] = []
+    batches = 0
+    while batches < max_batches:
+        batch_lags = _expire_batch(now, batch_size, reason)
+        if not batch_lags:
+            break
+        batches += 1
+        lags.extend(batch_lags)
+
+    report = {
+        "cancelled": len(lags),
+        "batches": batches,
+        "remaining": expired_orders(now).count() if batches >= max_batches else 0,
+        "lag_max_seconds": round(max(lags), 1) if lags else 0.0,
+        "lag_avg_seconds": round(sum(lags) / len(lags), 1) if lags else 0.0,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    if report["cancelled"] or report["remaining"]:
+        logger.info(
+            "Expiração de pedidos: %d cancelado(s) em %d lote(s), lag máx %.1fs, "
+            "lag médio %.1fs, %d pendente(s) para o próximo tique",
+            report["cancelled"],
+            report["batches"],
+            report["lag_max_seconds"],
+            report["lag_avg_seconds"],
+            report["remaining"],
+        )
+    return report
@@ -2,7 +2,7 @@
 Modelos para o sistema de pedidos
 """
 
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.conf import settings
@@ -11,6 +11,9 @@ from decimal import Decimal
 
 from .utils import generate_order_id
 
+# Sorteios de order_id antes de desistir de gravar o pedido
+ORDER_ID_ATTEMPTS = 5
+
 
 class Coupon(models.Model):
     """
@@ -107,6 +110,10 @@ class Coupon(models.Model):
         indexes = [
             models.Index(fields=["code"]),
             models.Index(fields=["is_active"]),
+            # Paginação por cursor (core.pagination)
+            models.Index(
+                fields=["created_at", "id"], name="orders_coupon_created_id_idx"
+            ),
         ]
 
     def __str__(self):
@@ -274,20 +281,42 @@ class Order(models.Model):
             models.Index(fields=["status"]),
             models.Index(fields=["user"]),
             models.Index(fields=["delivered"]),
+            # Paginação por cursor (core.pagination)
+            models.Index(
+                fields=["created_at", "id"], name="orders_order_created_id_idx"
+            ),
+            # Sweeper de expiração (orders.expiry): só os pedidos pendentes
+            models.Index(
+                fields=["created_at"],
+                name="orders_order_pending_idx",
+                condition=models.Q(status="pending"),
+            ),
         ]
 
     def __str__(self):
         return f"Pedido {self.order_id} - {self.user.username} - {self.get_status_display()}"
 
     def save(self, *args, **kwargs):
-        """Gera order_id automaticamente se não existir"""
-        if not self.order_id:
-            while True:
-                order_id = generate_order_id()
-                if not Order.objects.filter(order_id=order_id).exists():
-                    self.order_id = order_id
-                    break
-        super().save(*args, **kwargs)
+        """
+        Gera order_id automaticamente se não existir.
+
+        O código é sorteado sem consulta prévia: a constraint de unicidade
+        detecta a colisão e o INSERT é repetido (num savepoint) com outro código.
+        A finalização da compra usa ``orders.checkout``, que já chega aqui com o
+        ``order_id`` preenchido.
+        """
+        if self.order_id:
+            return super().save(*args, **kwargs)
+        for attempt in range(1, ORDER_ID_ATTEMPTS + 1):
+            self.order_id = generate_order_id()
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                collided = Order.objects.filter(order_id=self.order_id).exists()
+                if not collided or attempt == ORDER_ID_ATTEMPTS:
+                    self.order_id = ""
+                    raise
 
     def mark_as_delivered(self, admin_user):
         """Marca o pedido como entregue"""
@@ -311,13 +340,27 @@ class Order(models.Model):
             # Não cancela pedidos já pagos, entregues ou já cancelados
             return False
 
+        from django.utils import timezone
+
+        from .coupons import release_coupon_use
+
+        # Transição condicional: se outro processo pagou ou cancelou o pedido
+        # nesse meio tempo, nada muda e o cupom não é devolvido duas vezes
+        now = timezone.now()
+        cancelled = (
+            Order.objects.filter(pk=self.pk)
+            .exclude(status__in=("paid", "delivered", "cancelled"))
+            .update(status="cancelled", updated_at=now)
+        )
+        if not cancelled:
+            return False
+
         # Reverte o uso do cupom se houver
-        if self.coupon:
-            self.coupon.uses_count = max(0, self.coupon.uses_count - 1)
-            self.coupon.save(update_fields=["uses_count"])
+        if self.coupon_id:
+            release_coupon_use(self.coupon_id)
 
         self.status = "cancelled"
-        self.save(update_fields=["status"])
+        self.updated_at = now
         return True
 
 
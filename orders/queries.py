@@ -0,0 +1,50 @@
+"""
+Consultas de pedidos com os itens já resolvidos.
+
+``OrderItem.item`` é uma GenericForeignKey (legacy.Item ou nft.NFTItem): sem
+prefetch cada linha custa uma consulta ao ContentType e outra ao item. Aqui os
+itens do pedido são carregados com o content type no mesmo JOIN e os objetos
+apontados são buscados agrupados por tipo, com um ``IN`` por modelo e só as
+colunas usadas pelo ``OrderItemSerializer``. Uma listagem de pedidos custa um
+número fixo de consultas, independente de pedidos e linhas na página.
+"""
+
+from typing import Iterable, List
+
+from django.contrib.contenttypes.prefetch import GenericPrefetch
+from django.db.models import Prefetch, QuerySet, prefetch_related_objects
+
+from .models import Order, OrderItem
+
+
+def _item_querysets() -> List[QuerySet]:
+    """Um queryset por modelo que pode estar num pedido (colunas do serializer)."""
+    from legacy.models import Item
+    from nft.models import NFTItem
+
+    return [
+        Item.objects.only("id", "name", "image_url"),
+        NFTItem.objects.only("id", "name", "name_pt_br", "image_url"),
+    ]
+
+
+def order_items_prefetch() -> Prefetch:
+    """Prefetch de ``Order.items`` com content type e itens resolvidos em lote."""
+    return Prefetch(
+        "items",
+        queryset=OrderItem.objects.select_related("content_type").prefetch_related(
+            GenericPrefetch("item", _item_querysets())
+        ),
+    )
+
+
+def with_order_items(queryset: QuerySet) -> QuerySet:
+    """Pedidos prontos para o ``OrderSerializer`` (usuário, cupom e itens)."""
+    return queryset.select_related("user", "coupon").prefetch_related(
+        order_items_prefetch()
+    )
+
+
+def resolve_order_items(orders: Iterable[Order]) -> None:
+    """Mesmo prefetch de ``with_order_items`` para pedidos já carregados."""
+    prefetch_related_objects(list(orders), order_items_prefetch())
@@ -33,13 +33,54 @@ def send_order_created_email_task(order_id: int):
         )
 
 
+@shared_task
+def send_order_cancelled_email_task(order_id: int, reason: str):
+    """
+    Task assíncrona para enviar email de pedido cancelado
+
+    Args:
+        order_id: ID do pedido
+        reason: Motivo do cancelamento
+    """
+    try:
+        order = Order.objects.select_related("user").get(id=order_id)
+        from .emails import send_order_cancelled_email
+
+        send_order_cancelled_email(order, reason=reason)
+    except Order.DoesNotExist:
+        logger.error(f"Pedido com ID {order_id} não encontrado para envio de email")
+    except Exception as e:
+        logger.error(
+            f"Erro ao enviar email de pedido cancelado para pedido {order_id}: {e}",
+            exc_info=True,
+        )
+
+
+@shared_task
+def expire_unpaid_orders():
+    """
+    Cancela em lote os pedidos pendentes cujo prazo de pagamento venceu.
+
+    Executada a cada minuto pelo beat (orders.expiry); os emails de cancelamento
+    são enviados por ``send_order_cancelled_email_task``.
+    """
+    try:
+        from .expiry import expire_unpaid_orders as expire
+
+        return {"status": "success", **expire()}
+    except Exception as e:
+        logger.error(f"Erro ao expirar pedidos não pagos: {e}", exc_info=True)
+        return {"status": "error", "error": str(e)}
+
+
 @shared_task
 def check_and_cancel_order(order_id: int):
     """
     Verifica se um pedido específico foi pago e cancela se não foi.
 
-    Esta task é lançada quando um pedido é criado, com countdown de 5 minutos.
-    Após 5 minutos, verifica se o pedido foi pago e cancela se não foi.
+    Os pedidos novos não agendam mais esta task (a expiração é feita em lote por
+    ``expire_unpaid_orders``); ela continua registrada para consumir as tasks com
+    ETA que já estavam na fila.
 
     Args:
         order_id: ID do pedido a ser verificado
@@ -117,74 +158,20 @@ def cancel_unpaid_orders_security_check():
     """
     Rotina de segurança que verifica e cancela pedidos não pagos.
 
-    Esta task é executada a cada 30 minutos como uma segunda camada de segurança,
-    verificando todos os pedidos pendentes criados há mais de 5 minutos.
-
-    Esta é uma rotina de backup caso alguma task individual não tenha sido executada.
+    Mantida por compatibilidade com agendamentos antigos: executa o mesmo
+    sweeper em lote de ``expire_unpaid_orders``.
     """
     try:
-        # Calcula o tempo limite (5 minutos atrás)
-        time_limit = timezone.now() - timedelta(minutes=5)
-
-        # Busca pedidos pendentes criados há mais de 5 minutos e não pagos
-        unpaid_orders = Order.objects.filter(
-            status="pending",
-            created_at__lt=time_limit,
-            paid_at__isnull=True,
-        )
-
-        count = unpaid_orders.count()
-
-        if count == 0:
-            logger.debug("Rotina de segurança: nenhum pedido pendente para cancelar")
-            return {
-                "status": "success",
-                "cancelled": 0,
-                "message": "Nenhum pedido para cancelar",
-            }
-
-        # Cancela os pedidos
-        cancelled_count = 0
-        for order in unpaid_orders:
-            try:
-                if order.cancel(
-                    reason="Pagamento não realizado (verificação de segurança)"
-                ):
-                    cancelled_count += 1
-                    logger.info(
-                        f"Pedido {order.order_id} cancelado pela rotina de segurança "
-                        f"(criado em {order.created_at}, não pago em 5 minutos)"
-                    )
-                    # Envia email de pedido cancelado
-                    from .emails import send_order_cancelled_email
-
-                    send_order_cancelled_email(
-                        order,
-                        reason="Tempo esgotado para pagamento (verificação de segurança)",
-                    )
-                else:
-                    logger.warning(
-                        f"Pedido {order.order_id} não pode ser cancelado "
-                        f"(status atual: {order.status})"
-                    )
-            except Exception as e:
-                logger.error(
-                    f"Erro ao cancelar pedido {order.order_id}: {e}",
-                    exc_info=True,
-                )
+        from .expiry import expire_unpaid_orders as expire
 
-        logger.info(
-            f"Rotina de segurança concluída: {cancelled_count} pedido(s) cancelado(s) "
-            f"(de {count} encontrados)"
+        report = expire(
+            reason="Tempo esgotado para pagamento (verificação de segurança)"
         )
-
         return {
             "status": "success",
-            "cancelled": cancelled_count,
-            "total_found": count,
-            "message": f"{cancelled_count} pedido(s) cancelado(s) pela rotina de segurança",
+            **report,
+            "message": f"{report['cancelled']} pedido(s) cancelado(s) pela rotina de segurança",
         }
-
     except Exception as e:
         logger.error(
             f"Erro na rotina de segurança cancel_unpaid_orders_security_check: {e}",
@@ -0,0 +1,107 @@
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from .coupons import release_coupon_use, reserve_coupon_use
+from .models import Coupon
+
+
+class CouponRedemptionConcurrencyTests(TransactionTestCase):
+    """Reserva/devolução de usos disputadas por várias threads ao mesmo tempo."""
+
+    THREADS = 20
+
+    def _coupon(self, **fields):
+        now = timezone.now()
+        return Coupon.objects.create(
+            code="PROMO",
+            discount_value=Decimal("10.00"),
+            valid_from=now - timedelta(days=1),
+            valid_until=now + timedelta(days=1),
+            **fields,
+        )
+
+    def _run_concurrently(self, func, *args):
+        """Roda ``func`` em THREADS threads liberadas juntas; devolve os resultados."""
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(50):
+                    try:
+                        result = func(*args)
+                        break
+                    except OperationalError:
+                        # SQLite trava a tabela inteira na escrita concorrente
+                        time.sleep(0.01)
+                else:
+                    raise AssertionError("banco travado durante todo o teste")
+                with lock:
+                    results.append(result)
+            except Exception as e:  # noqa: BLE001 - reportado pela thread principal
+                with lock:
+                    errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return results
+
+    def test_reserve_never_exceeds_max_uses(self):
+        coupon = self._coupon(max_uses=5)
+
+        results = self._run_concurrently(reserve_coupon_use, coupon.pk)
+
+        self.assertEqual(results.count(True), 5)
+        self.assertEqual(results.count(False), self.THREADS - 5)
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.uses_count, 5)
+
+    def test_reserve_counts_every_use_without_limit(self):
+        coupon = self._coupon()
+
+        results = self._run_concurrently(reserve_coupon_use, coupon.pk)
+
+        self.assertTrue(all(results))
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.uses_count, self.THREADS)
+
+    def test_release_never_goes_below_zero(self):
+        coupon = self._coupon(max_uses=10, uses_count=3)
+
+        results = self._run_concurrently(release_coupon_use, coupon.pk)
+
+        self.assertEqual(results.count(True), 3)
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.uses_count, 0)
+
+    def test_reserve_rejects_inactive_or_expired_coupon(self):
+        inactive = self._coupon(is_active=False)
+        self.assertFalse(reserve_coupon_use(inactive.pk))
+
+        expired = Coupon.objects.create(
+            code="VENCIDO",
+            discount_value=Decimal("10.00"),
+            valid_from=timezone.now() - timedelta(days=2),
+            valid_until=timezone.now() - timedelta(days=1),
+        )
+        self.assertFalse(reserve_coupon_use(expired.pk))
+
+        inactive.refresh_from_db()
+        expired.refresh_from_db()
+        self.assertEqual(inactive.uses_count, 0)
+        self.assertEqual(expired.uses_count, 0)
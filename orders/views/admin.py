@@ -10,6 +10,7 @@ from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParamet
 from drf_spectacular.types import OpenApiTypes
 
 from ..models import Order, Coupon
+from ..queries import resolve_order_items, with_order_items
 from ..serializers import OrderSerializer, CouponSerializer
 
 
@@ -20,11 +21,8 @@ class OrderListAdminView(generics.ListAPIView):
 
     permission_classes = [IsAdminUser]
     serializer_class = OrderSerializer
-    queryset = (
-        Order.objects.all()
-        .prefetch_related("items", "coupon", "user")
-        .order_by("-created_at")
-    )
+    # Itens, content types e objetos apontados em número fixo de consultas
+    queryset = with_order_items(Order.objects.all()).order_by("-created_at")
 
     @extend_schema(
         operation_id="admin_orders_list",
@@ -117,6 +115,7 @@ class OrderMarkDeliveredView(APIView):
 
         order.mark_as_delivered(request.user)
 
+        resolve_order_items([order])
         serializer = OrderSerializer(order)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -2,12 +2,16 @@
 Views para pedidos
 """
 
-from decimal import Decimal
+import logging
+from decimal import ROUND_HALF_UP, Decimal
+
 from rest_framework import status, generics
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
-from ..models import Order, OrderItem, Coupon
+from ..checkout import CouponUnavailable, create_order
+from ..models import Order, Coupon
+from ..queries import resolve_order_items, with_order_items
 from ..serializers import OrderSerializer, OrderCreateSerializer
 from ..docs import (
     orders_list_schema,
@@ -15,6 +19,8 @@ from ..docs import (
     orders_detail_schema,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class OrderListCreateView(generics.ListCreateAPIView):
     """
@@ -31,16 +37,89 @@ class OrderListCreateView(generics.ListCreateAPIView):
             return Order.objects.none()
         if not self.request.user.is_authenticated:
             return Order.objects.none()
-        return (
-            Order.objects.filter(user=self.request.user)
-            .prefetch_related("items", "coupon")
-            .order_by("-created_at")
+        # Itens, content types e objetos apontados em número fixo de consultas
+        return with_order_items(Order.objects.filter(user=self.request.user)).order_by(
+            "-created_at"
         )
 
     @orders_list_schema
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
+    def _revalidate_prices(self, items_data):
+        """
+        Atualiza ``unit_price`` de cada linha com o preço atual do item.
+
+        NFTs são revalidados na Immutable em paralelo, sob um único prazo
+        (``nft.services_checkout``); a linha cujo preço não chega a tempo mantém o
+        preço do banco. Itens legacy usam o ``last_price`` do banco. Os itens de
+        cada tipo são carregados numa única consulta.
+        """
+        from legacy.models import Item
+        from nft.models import NFTItem
+        from nft.services_checkout import get_checkout_prices
+
+        nft_lines = [d for d in items_data if d["content_type"].model == "nftitem"]
+        legacy_lines = [d for d in items_data if d["content_type"].model == "item"]
+
+        if nft_lines:
+            codes = dict(
+                NFTItem.objects.filter(
+                    id__in=[d["object_id"] for d in nft_lines]
+                ).values_list("id", "product_code")
+            )
+            try:
+                current = get_checkout_prices(c for c in codes.values() if c)
+            except Exception as e:
+                logger.error(f"Erro ao revalidar preços dos NFTs: {e}", exc_info=True)
+                current = {}
+
+            for item_data in nft_lines:
+                original_price = item_data["unit_price"]
+                product_code = codes.get(item_data["object_id"])
+                current_prices = current.get(product_code) if product_code else None
+                if not current_prices:
+                    # Falhou ou estourou o prazo: mantém o preço do banco
+                    logger.warning(
+                        f"Não foi possível recalcular preço para NFT {product_code or item_data['object_id']}, "
+                        f"usando preço do banco: R$ {original_price}"
+                    )
+                    continue
+
+                _, _, current_price_brl = current_prices
+                # Arredonda para 2 casas decimais (igual ao last_price_brl do modelo)
+                # Isso garante que o preço seja exatamente o mesmo exibido no frontend
+                current_price_brl_rounded = Decimal(current_price_brl).quantize(
+                    Decimal("0.01"), rounding=ROUND_HALF_UP
+                )
+                item_data["unit_price"] = current_price_brl_rounded
+
+                # Log se houver diferença significativa (mais de 1%)
+                price_diff = abs(float(current_price_brl_rounded - original_price))
+                if price_diff > float(original_price * Decimal("0.01")):
+                    logger.warning(
+                        f"Preço recalculado para NFT {product_code}: "
+                        f"Original: R$ {original_price}, Atualizado: R$ {current_price_brl_rounded}, "
+                        f"Diferença: R$ {price_diff:.2f}"
+                    )
+
+        if legacy_lines:
+            # Para itens legacy, apenas verifica se o preço no banco está atualizado
+            legacy_prices = dict(
+                Item.objects.filter(
+                    id__in=[d["object_id"] for d in legacy_lines]
+                ).values_list("id", "last_price")
+            )
+            for item_data in legacy_lines:
+                original_price = item_data["unit_price"]
+                current_price = legacy_prices.get(item_data["object_id"])
+                if current_price is not None and current_price != original_price:
+                    item_data["unit_price"] = current_price
+                    logger.warning(
+                        f"Preço atualizado para item legacy {item_data['object_id']}: "
+                        f"Original: R$ {original_price}, Atualizado: R$ {current_price}"
+                    )
+
     @orders_create_schema
     def post(self, request, *args, **kwargs):
         """Cria um novo pedido"""
@@ -53,91 +132,7 @@ class OrderListCreateView(generics.ListCreateAPIView):
         notes = validated_data.get("notes", "")
 
         # Segunda validação: recalcula preços dos itens para garantir que estão atualizados
-        import logging
-
-        logger = logging.getLogger(__name__)
-
-        for item_data in items_data:
-            original_price = item_data["unit_price"]
-
-            # Recalcula o preço atual do item
-            if item_data["content_type"].model == "nftitem":
-                # Para NFTs, busca o preço atualizado da API
-                try:
-                    from nft.models import NFTItem
-                    from nft.services import fetch_min_listing_prices
-
-                    nft_item = NFTItem.objects.get(id=item_data["object_id"])
-                    if nft_item.product_code:
-                        # Busca o preço mínimo atualizado (com timeout curto de 5s para não bloquear)
-                        # Se falhar ou demorar, usa o preço do banco
-                        current_prices = None
-                        try:
-                            # Tenta buscar preço atualizado com timeout curto
-                            # Usa o preço do banco como fallback se demorar
-                            current_prices = fetch_min_listing_prices(
-                                nft_item.product_code, timeout=5
-                            )
-                        except Exception as e:
-                            logger.warning(
-                                f"Erro ao buscar preço atualizado para NFT {nft_item.product_code}: {e}. "
-                                f"Usando preço do banco: R$ {original_price}"
-                            )
-                            current_prices = None
-
-                        if current_prices:
-                            _, _, current_price_brl = current_prices
-                            # Arredonda para 2 casas decimais (igual ao last_price_brl do modelo)
-                            # Isso garante que o preço seja exatamente o mesmo exibido no frontend
-                            from decimal import ROUND_HALF_UP
-
-                            current_price_brl_rounded = current_price_brl.quantize(
-                                Decimal("0.01"), rounding=ROUND_HALF_UP
-                            )
-                            # Atualiza o preço no item_data com o preço recalculado e arredondado
-                            item_data["unit_price"] = current_price_brl_rounded
-
-                            # Log se houver diferença significativa (mais de 1%)
-                            # Usa o valor arredondado para comparação
-                            price_diff = abs(
-                                float(current_price_brl_rounded - original_price)
-                            )
-                            if price_diff > float(original_price * Decimal("0.01")):
-                                logger.warning(
-                                    f"Preço recalculado para NFT {nft_item.product_code}: "
-                                    f"Original: R$ {original_price}, Atualizado: R$ {current_price_brl_rounded}, "
-                                    f"Diferença: R$ {price_diff:.2f}"
-                                )
-                        else:
-                            # Se não conseguir buscar preço atualizado, mantém o do banco
-                            logger.warning(
-                                f"Não foi possível recalcular preço para NFT {nft_item.product_code}, "
-                                f"usando preço do banco: R$ {original_price}"
-                            )
-                except Exception as e:
-                    logger.error(
-                        f"Erro ao recalcular preço do NFT {item_data['object_id']}: {e}",
-                        exc_info=True,
-                    )
-                    # Em caso de erro, mantém o preço original
-            elif item_data["content_type"].model == "item":
-                # Para itens legacy, apenas verifica se o preço no banco está atualizado
-                try:
-                    from legacy.models import Item
-
-                    legacy_item = Item.objects.get(id=item_data["object_id"])
-                    current_price = legacy_item.last_price
-                    if current_price != original_price:
-                        item_data["unit_price"] = current_price
-                        logger.warning(
-                            f"Preço atualizado para item legacy {legacy_item.id}: "
-                            f"Original: R$ {original_price}, Atualizado: R$ {current_price}"
-                        )
-                except Exception as e:
-                    logger.error(
-                        f"Erro ao verificar preço do item legacy {item_data['object_id']}: {e}",
-                        exc_info=True,
-                    )
+        self._revalidate_prices(items_data)
 
         # Calcula subtotal com os preços recalculados
         subtotal = Decimal("0.00")
@@ -153,9 +148,6 @@ class OrderListCreateView(generics.ListCreateAPIView):
             try:
                 coupon = Coupon.objects.get(code=coupon_code)
                 discount_amount = coupon.calculate_discount(subtotal)
-                # Incrementa contador de usos
-                coupon.uses_count += 1
-                coupon.save()
             except Coupon.DoesNotExist:
                 pass
 
@@ -167,43 +159,28 @@ class OrderListCreateView(generics.ListCreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Cria o pedido
-        order = Order.objects.create(
-            user=request.user,
-            subtotal=subtotal,
-            discount_amount=discount_amount,
-            total=total,
-            coupon=coupon,
-            notes=notes,
-            status="pending",
-        )
-
-        # Cria os itens do pedido
-        for item_data in items_data:
-            OrderItem.objects.create(
-                order=order,
-                content_type=item_data["content_type"],
-                object_id=item_data["object_id"],
-                quantity=item_data["quantity"],
-                unit_price=item_data["unit_price"],
+        # Reserva do cupom, pedido e itens numa única transação; as tasks do
+        # pedido são enfileiradas após o commit
+        try:
+            order = create_order(
+                user=request.user,
+                items_data=items_data,
+                subtotal=subtotal,
+                discount_amount=discount_amount,
+                total=total,
+                coupon=coupon,
+                notes=notes,
+            )
+        except CouponUnavailable:
+            return Response(
+                {"error": "Cupom não é válido ou expirou."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-
-        # Agenda task para verificar e cancelar pedido se não for pago em 5 minutos
-        from ..tasks import check_and_cancel_order
-
-        check_and_cancel_order.apply_async(
-            args=[order.id],
-            countdown=60 * 5,  # Executa após 5 minutos (300 segundos)
-        )
-
-        # Envia email de pedido criado (assíncrono para não bloquear a resposta)
-        from ..tasks import send_order_created_email_task
-
-        send_order_created_email_task.delay(order.id)
 
         # Pagamento será processado via AbacatePay (criar billing separadamente)
 
         # Retorna o pedido criado
+        resolve_order_items([order])
         response_serializer = OrderSerializer(order)
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
@@ -220,9 +197,7 @@ class OrderDetailView(generics.RetrieveAPIView):
 
     def get_queryset(self):
         """Retorna apenas os pedidos do usuário autenticado"""
-        return Order.objects.filter(user=self.request.user).prefetch_related(
-            "items", "coupon"
-        )
+        return with_order_items(Order.objects.filter(user=self.request.user))
 
     def get_object(self):
         """
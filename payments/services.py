@@ -8,6 +8,7 @@ import logging
 from decimal import Decimal
 from typing import Optional, Dict, Any, List
 from django.conf import settings
+from core import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -78,12 +79,14 @@ class AbacatePayService:
             logger.info(f"Payload enviado para {endpoint}: {log_data}")
 
         try:
+            # Sessão com keep-alive compartilhada; POST nunca é repetido para não
+            # duplicar cobranças
             if method.upper() == "GET":
-                response = requests.get(
+                response = http_client.get(
                     url, headers=headers, params=data, timeout=timeout
                 )
             elif method.upper() == "POST":
-                response = requests.post(
+                response = http_client.post(
                     url, headers=headers, json=data, timeout=timeout
                 )
             else: